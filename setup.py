@@ -13,5 +13,8 @@ setup(
 	install_requires=[
 	   'requests',
 	   'bs4',
-	]
+	],
+	extras_require={
+	   'json': ['orjson'],
+	}
 )
@@ -1,7 +1,15 @@
 from weatherapp.core.abstract.command import Command
-from weatherapp.core.abstract.provider import WeatherProvider
 from weatherapp.core.abstract.manager import Manager
 from weatherapp.core.abstract.formatter import Formatter
+from weatherapp.core.abstract.cache import Cache
 
 
-__all__ = ['Command', 'WeatherProvider', 'Manager', 'Formatter']
\ No newline at end of file
+__all__ = ['Command', 'WeatherProvider', 'Manager', 'Formatter', 'Cache']
+
+
+def __getattr__(name):
+	# provider brings in the http client, it is needed only to run providers
+	if name == 'WeatherProvider':
+		from weatherapp.core.abstract.provider import WeatherProvider
+		return WeatherProvider
+	raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
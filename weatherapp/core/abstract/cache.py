@@ -0,0 +1,198 @@
+import os
+import abc
+import time
+import threading
+
+from weatherapp.core import config
+from weatherapp.core.singleflight import remove_stale_locks
+
+
+class CacheEntry:
+
+	""" Cached page with its fetch time, time to live and headers.
+
+	:param key: url hash
+	:type key: str
+	:param url: page address
+	:type url: str
+	:param body: page source
+	:type body: bytes
+	:param fetched: when the page was fetched(unix time)
+	:type fetched: float
+	:param ttl: how long the page is valid(in seconds)
+	:type ttl: float
+	:param keep_until: when the page should be removed(unix time)
+	:type keep_until: float
+	:param headers: saved response headers, e.g. ETag
+	:type headers: dict
+	:param provider: name of the provider which saved the page
+	:type provider: str
+	"""
+
+	def __init__(self, key, url, body, fetched, ttl, keep_until,
+		         headers=None, provider=''):
+		self.key = key
+		self.url = url
+		self.body = body
+		self.fetched = fetched
+		self.ttl = ttl
+		self.keep_until = keep_until
+		self.headers = headers or {}
+		self.provider = provider
+
+	def age(self, now=None):
+		""" How long ago the page was fetched(in seconds).
+		"""
+
+		return (now or time.time()) - self.fetched
+
+	def is_valid(self, now=None):
+		""" Check if the page is not expired.
+		"""
+
+		return self.age(now) < self.ttl
+
+
+class Cache(abc.ABC):
+
+	""" Base abstract class for page cache stores.
+
+	:param directory: cache directory
+	:type directory: pathlib.Path
+	"""
+
+	def __init__(self, directory):
+		self.directory = directory
+		self._next_sweep = 0
+		self._sweep_lock = threading.Lock()
+		self._lookups_lock = threading.Lock()
+		self._hits = 0
+		self._misses = 0
+		self._accessed = {}
+
+	def sweep(self, interval=config.CACHE_SWEEP_INTERVAL, 
+		      max_bytes=config.CACHE_MAX_SIZE):
+		""" Run 'expire' and 'evict' at most once per 'interval' seconds.
+
+		Download lock files which are not used are removed too. Time of
+		the last sweep is kept as modification time of a stamp file in the
+		cache directory, so all processes share it and each run costs only
+		one 'stat' call. Returns number of removed entries. Counted lookups
+		are saved first, so eviction knows recent use.
+		"""
+
+		self.flush_lookups()
+		now = time.time()
+		with self._sweep_lock:
+			if now < self._next_sweep:
+				return 0
+			self._next_sweep = now + interval
+
+		stamp = self.directory / config.CACHE_SWEEP_FILE
+		try:
+			if now - stamp.stat().st_mtime < interval:
+				return 0
+		except FileNotFoundError:
+			if not self.directory.exists():
+				return 0
+
+		# mark the sweep first, so other processes don't start it too
+		stamp.touch()
+		os.utime(stamp, (now, now))
+		removed = self.expire(now)
+		if max_bytes:
+			removed += self.evict(max_bytes)
+		remove_stale_locks(self.directory / config.CACHE_LOCK_DIR,
+			               config.CACHE_LOCK_TTL, now)
+		return removed
+
+	@abc.abstractmethod
+	def get(self, key, body=True):
+		""" Return cache entry by url hash, even expired, or None.
+
+		Without 'body' stores may skip reading the page and return the
+		entry with None body.
+		"""
+
+	@abc.abstractmethod
+	def set(self, entry):
+		""" Save cache entry, replacing the entry with the same key.
+		"""
+
+	@abc.abstractmethod
+	def touch(self, key, fetched):
+		""" Mark the page as fetched again at 'fetched' time.
+
+		Used when the site answers that the page was not modified.
+		"""
+
+	@abc.abstractmethod
+	def delete(self, key):
+		""" Remove cache entry by url hash.
+		"""
+
+	@abc.abstractmethod
+	def expire(self, now=None):
+		""" Remove entries which are kept longer than 'keep_until'.
+
+		Returns number of removed entries.
+		"""
+
+	@abc.abstractmethod
+	def evict(self, max_bytes):
+		""" Remove the least recently used entries until pages take no
+		more than 'max_bytes' bytes.
+
+		Returns number of removed entries.
+		"""
+
+	@abc.abstractmethod
+	def purge(self, provider):
+		""" Remove all entries saved by the provider.
+
+		Returns number of removed entries.
+		"""
+
+	def record_lookup(self, key, hit):
+		""" Count the lookup in hit and miss stats, and mark the entry as
+		used now if it was found.
+
+		Lookups are counted in memory and saved by 'flush_lookups'.
+		"""
+
+		with self._lookups_lock:
+			if hit:
+				self._hits += 1
+				self._accessed[key] = time.time()
+			else:
+				self._misses += 1
+
+	def flush_lookups(self):
+		""" Save lookups counted since the last flush.
+
+		Called by 'sweep' and 'stats', and by the application at exit.
+		"""
+
+		with self._lookups_lock:
+			hits, misses, accessed = self._hits, self._misses, self._accessed
+			self._hits = self._misses = 0
+			self._accessed = {}
+		if hits or misses or accessed:
+			self.save_lookups(hits, misses, accessed)
+
+	@abc.abstractmethod
+	def save_lookups(self, hits, misses, accessed):
+		""" Add lookup counters to the saved stats and save last use time
+		of the found entries.
+
+		:param accessed: last use time(unix time) by url hash
+		:type accessed: dict
+		"""
+
+	@abc.abstractmethod
+	def stats(self):
+		""" Return dict with number of entries('count'), their size in
+		bytes('bytes'), fetch time of the oldest('oldest') and the
+		newest('newest') entry, and number of lookups found in cache
+		('hits') and not found('misses').
+		"""
@@ -1,18 +1,80 @@
+import io
 import abc
+import argparse
 
 
 class Formatter(abc.ABC):
 	
 	""" Base abstract class for formatters.
+
+	Formatters write rows to the stream one by one as they come from the
+	iterator, so output of any size takes constant memory.
 	"""
 
+	structured = False   # writes records by 'emit_records'
+
+	def __init__(self):
+		self.params = argparse.Namespace()
+
+	def get_parser(self):
+		""" Initialize argument parser for formatter options.
+		"""
+
+		return argparse.ArgumentParser(add_help=False)
+
+	def configure(self, argv):
+		""" Parse formatter options, arguments of others are ignored.
+
+		:param argv: remaining_args from parser
+		:type argv: list
+		"""
+
+		self.params, _ = self.get_parser().parse_known_args(argv)
+
 	@abc.abstractmethod
-	def emit(self, column_names, data):
-		""" Format and print data from the iterable source.
+	def emit_rows(self, column_names, rows, stream):
+		""" Format rows from the iterator and write them to the stream.
 
 		:param column_names: names of the columns
 		:type column_names: list
-		:param data: iterable data source, one tuple per object
+		:param rows: iterator of rows, one tuple per object
 		             with values in order of column names
-		:type data: list or tuple
-		"""
\ No newline at end of file
+		:type rows: iterator
+		:param stream: output stream, e.g. App.stdout
+		:type stream: io.TextIOBase
+		"""
+
+	def emit_records(self, records, stream):
+		""" Write weather records of all providers and locations.
+
+		Used instead of 'emit_rows' when 'structured' is set. Records are
+		dicts with 'provider', 'location', 'day', 'fetched'(unix time) and
+		'info'(WeatherInfo or dict) keys. By default each record is written
+		by 'emit_rows' with provider and location columns.
+
+		:param records: iterator of records
+		:type records: iterator
+		:param stream: output stream, e.g. App.stdout
+		:type stream: io.TextIOBase
+		"""
+
+		for record in records:
+			self.emit_rows([record['provider'], record['location']], 
+				           iter(record['info'].items()), stream)
+			stream.write('\n')
+
+	def emit(self, column_names, data, argv):
+		""" Format data and return it as a string.
+
+		:param column_names: names of the columns
+		:type column_names: list
+		:param data: weather info
+		:type data: dict or weatherinfo.WeatherInfo
+		:param argv: remaining_args from parser
+		:type argv: list
+		"""
+
+		self.configure(argv)
+		stream = io.StringIO()
+		self.emit_rows(column_names, iter(data.items()), stream)
+		return stream.getvalue()
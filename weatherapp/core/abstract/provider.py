@@ -1,16 +1,26 @@
-import os
 import abc
+import json
 import time
 import urllib
 import hashlib
 import logging
+import threading
 import configparser
 from pathlib import Path
-from urllib.request import urlopen, Request
+from urllib.parse import urlsplit
 
 from weatherapp.core import config
+from weatherapp.core import decorators
 from weatherapp.core.abstract.command import Command
-from weatherapp.core.exception import RequestError, ConfigParserError
+from weatherapp.core.abstract.cache import CacheEntry
+from weatherapp.core.circuitbreaker import CircuitBreaker
+from weatherapp.core.executor import DaemonExecutor
+from weatherapp.core.configservice import ConfigSection
+from weatherapp.core.httpclient import get_freshness_lifetime
+from weatherapp.core.singleflight import SingleFlight, FileLock
+from weatherapp.core.weatherinfo import normalize
+from weatherapp.core.exception import (RequestError, ConfigParserError, 
+	                                   SiteUnavailableError)
 
 
 class WeatherProvider(Command):
@@ -22,13 +32,22 @@ class WeatherProvider(Command):
 
 	logger = logging.getLogger(__name__)
 
+	# threads of urls which are refreshed in background at the moment
+	_refreshing = {}
+	_refreshing_lock = threading.Lock()
+
+	# downloads in flight shared by all providers
+	_flights = SingleFlight()
+
 	def __init__(self, app):
 
 		super().__init__(app)
 
+		self.settings = ConfigSection(self.get_name())
 		location, url = self._get_configuration()
 		self.location = location
 		self.url = url
+		self.configure_rate_limit()
 
 	@abc.abstractmethod
 	def get_name(self):
@@ -62,6 +81,9 @@ class WeatherProvider(Command):
 		    'temp':         ''  # temperature
 		    'feels_like':	''  # feels like temperature
 		}
+
+		Optional 'wind' and 'humidity' may be given too. The dict is
+		normalized to weatherinfo.WeatherInfo by 'run_locations'.
 		"""
 
 	@staticmethod
@@ -78,73 +100,329 @@ class WeatherProvider(Command):
 
 		return hashlib.md5(url.encode('utf-8')).hexdigest()
 
-	def save_cache(self, url, page_source):
-	    """ Save page source data to file.
-	    """
+	def get_cache_entry(self, url, body=True):
+		""" Return cache entry of the url, even expired, or None.
 
-	    url_hash = self.get_url_hash(url)
-	    cache_dir = self.get_cache_directory()
-	    if not cache_dir.exists():
-	    	cache_dir.mkdir(parents=True)
+		Without 'body' the page source may be not read.
+		"""
 
-	    with (cache_dir / url_hash).open('wb') as cache_file:
-	    	cache_file.write(page_source)
+		return self.app.cache.get(self.get_url_hash(url), body)
 
-	@staticmethod
-	def is_valid(path):
-	    """ Check if cache is valid.
+	def get_fetch_time(self, url):
+		""" Return when the cached page of the url was fetched, None if
+		there is no page.
+		"""
+
+		entry = self.get_cache_entry(url, body=False)
+		return entry.fetched if entry else None
+
+	def save_cache(self, url, page_source, headers=None):
+	    """ Save page source data to the cache.
+
+	    ETag and Last-Modified response headers are saved with the page
+	    source, to revalidate the page when it expires. Hash of the page
+	    is saved too, to check parsed information without reading it.
 	    """
 
-	    return (time.time() - path.stat().st_mtime) < config.CACH_TIME
+	    validators = {name: headers[name] for name in config.CACHE_VALIDATORS
+	                  if headers and headers.get(name)}
+	    ttl = self.get_cache_ttl(url, headers)
+	    keep_time = ttl + config.CACHE_STALE_TIME
+	    if validators:
+	    	keep_time = max(keep_time, config.CACHE_REVALIDATE_TIME)
+
+	    saved_headers = dict(validators, 
+	                         **{'page-hash': self.get_page_hash(page_source)})
+	    now = time.time()
+	    self.app.cache.set(CacheEntry(self.get_url_hash(url), url, page_source,
+	    	                          now, ttl, now + keep_time, saved_headers,
+	    	                          self.get_name()))
+
+	def get_cache_ttl(self, url, headers=None):
+		""" How long the page of the url is valid in cache(in seconds).
+
+		Taken from 'cache-ttl' option of the provider section, or from
+		'Cache-Control' and 'Expires' response headers when 
+		'cache-ttl-headers' option is on. Always kept between
+		config.CACHE_TTL_MIN and config.CACHE_TTL_MAX. Providers may
+		override it, e.g. to keep location search pages longer.
+		"""
+
+		ttl = self.get_number_setting('cache-ttl', config.CACH_TIME)
+
+		try:
+			use_headers = self.settings.getboolean(
+				'cache-ttl-headers', config.CACHE_TTL_FROM_HEADERS)
+		except ValueError:
+			use_headers = config.CACHE_TTL_FROM_HEADERS
+		if headers and use_headers:
+			lifetime = get_freshness_lifetime(headers)
+			if lifetime is not None:
+				ttl = lifetime
+
+		return min(max(ttl, config.CACHE_TTL_MIN), config.CACHE_TTL_MAX)
+
+	def get_stale_cache(self, url):
+		""" Return expired cache which is still in the stale grace window.
+		"""
+
+		entry = self.get_cache_entry(url)
+		if entry and entry.age() < entry.ttl + config.CACHE_STALE_TIME:
+			return entry.body
+		return b''
+
+	def refresh_in_background(self, url):
+		""" Update cache of the page in a background thread.
+
+		The thread is a daemon whichever thread starts it, the application
+		waits for refreshes at exit at most config.CACHE_REFRESH_WAIT
+		seconds by 'join_refreshes', so the next run finds a fresh page.
+		"""
+
+		def refresh():
+			try:
+				self.fetch_page_source(url)
+			except Exception:
+				self.logger.warning('Background refresh of %s failed', url,
+					                exc_info=self.app.options.debug)
+			finally:
+				with self._refreshing_lock:
+					self._refreshing.pop(url, None)
+
+		with self._refreshing_lock:
+			if url in self._refreshing:
+				return
+			thread = threading.Thread(target=refresh, name=f'refresh {url}',
+				                      daemon=True)
+			self._refreshing[url] = thread
+			thread.start()
+
+	@classmethod
+	def join_refreshes(cls, timeout):
+		""" Wait for background refreshes of all providers.
+
+		Returns True if all refreshes are finished within 'timeout'
+		seconds.
+		"""
+
+		deadline = time.monotonic() + timeout
+		with cls._refreshing_lock:
+			threads = list(cls._refreshing.values())
+		for thread in threads:
+			thread.join(max(0, deadline - time.monotonic()))
+		return not any(thread.is_alive() for thread in threads)
+
+	def get_cache_validators(self, url):
+		""" Return saved ETag and Last-Modified headers of the page if any.
+		"""
+
+		entry = self.get_cache_entry(url, body=False)
+		if entry is None:
+			return {}
+		return {name: entry.headers[name] for name in config.CACHE_VALIDATORS
+		        if name in entry.headers}
+
+	def get_conditional_headers(self, url):
+		""" Request headers to revalidate the expired cache of the page.
+		"""
+
+		validators = self.get_cache_validators(url)
+		headers = {}
+		if validators.get('ETag'):
+			headers['If-None-Match'] = validators['ETag']
+		if validators.get('Last-Modified'):
+			headers['If-Modified-Since'] = validators['Last-Modified']
+		return headers
+
+	def refresh_cache(self, url):
+		""" Mark expired cache of the page as valid again.
+
+		Used when the site answers that the page was not modified.
+		Returns page source, or None if the cache was removed meanwhile.
+		"""
+
+		url_hash = self.get_url_hash(url)
+		self.app.cache.touch(url_hash, time.time())
+		entry = self.app.cache.get(url_hash)
+		return entry.body if entry else None
 
 	def get_cache(self, url):
 	    """ Return cache by given url address if any.
 	    """
 
-	    cache = b''
-	    url_hash = self.get_url_hash(url)
-	    cache_dir = self.get_cache_directory()
-	    if cache_dir.exists():
-	    	cache_path = cache_dir / url_hash
-	    	if cache_path.exists() and self.is_valid(cache_path):
-	    		with cache_path.open('rb') as cache_file:
-	    			cache = cache_file.read()
-
-	    	return cache
+	    entry = self.get_cache_entry(url)
+	    if entry and entry.is_valid():
+	    	return entry.body
+	    return b''
 
 	def get_page_source(self, url):
 	    """ Getting page from server.
+
+	    Page expired less than config.CACHE_STALE_TIME seconds ago is
+	    returned at once and refreshed in background for the next call.
 	    """
 
 	    try:
 	    	cache = self.get_cache(url)
+	    	stale = not self.app.options.refresh and not cache and \
+	    	        self.get_stale_cache(url)
+	    	self.app.cache.record_lookup(self.get_url_hash(url), 
+	    		                         bool(cache or stale) and 
+	    		                         not self.app.options.refresh)
 	    	if cache and not self.app.options.refresh:
 	    		page_source = cache
+	    	elif stale:
+	    		self.refresh_in_background(url)
+	    		page_source = stale
 	    	else:
-	    		request = Request(url, headers=self.get_request_headers())
-	    		page_source = urlopen(request).read()
-	    		self.save_cache(url, page_source)
+	    		page_source = self.fetch_page_source(url)
 	    	return page_source.decode('utf-8')
-	    except (UnboundLocalError, urllib.error.HTTPError):
-	    	self.clear_configurate()
+	    except (UnboundLocalError, urllib.error.HTTPError) as error:
 	    	msg = 'Error!'
 	    	if self.app.options.debug:
 	    		self.logger.exception(msg)
 	    	else:
 	    		self.logger.error(msg)
-	    	raise RequestError(self.app).run('Incorrectly set location!', 
-	        	                             self.location)
+	    	if self.is_transient_error(error):
+	    		error = SiteUnavailableError(self.app)
+	    		error.run('Site is not available now!', 
+	    			      self.get_location_name(url))
+	    		raise error
+	    	if url != self.url:
+	    		error = RequestError(self.app)
+	    		error.run('Incorrectly set location!', 
+	    			      self.get_location_name(url))
+	    		raise error
+	    	self.reset_location()
+	    	error = RequestError(self.app)
+	    	error.run('Incorrectly set location!', self.location)
+	    	raise error
+	    except (SiteUnavailableError, urllib.error.URLError, OSError):
+	    	msg = 'Error!'
+	    	if self.app.options.debug:
+	    		self.logger.exception(msg)
+	    	else:
+	    		self.logger.error(msg)
+	    	error = SiteUnavailableError(self.app)
+	    	error.run('Site is not available now!', self.get_location_name(url))
+	    	raise error
+
+	@staticmethod
+	def is_transient_error(error):
+		""" Check if request may succeed when it is tried again.
+		"""
+
+		if isinstance(error, urllib.error.HTTPError):
+			return error.code in config.RETRY_STATUS_CODES
+		return isinstance(error, (urllib.error.URLError, OSError))
+
+	def get_circuit_breaker(self):
+		""" Circuit breaker of the provider site.
+		"""
+
+		return CircuitBreaker(self.get_cache_directory() / 
+			                  (self.get_name() + config.CIRCUIT_SUFFIX))
 	    
+	def fetch_page_source(self, url):
+		""" Download page from server and save it to the cache.
+
+		Only one download of the url runs at a time, in this process and
+		in other processes using the same cache directory. Others wait
+		and take the page it saved.
+		"""
+
+		url_hash = self.get_url_hash(url)
+		return self._flights.do(url_hash, self._fetch_page_source_locked, 
+			                    url)
+
+	def _fetch_page_source_locked(self, url):
+		""" Download page holding the cache directory lock of the url.
+		"""
+
+		fetched = self.get_fetch_time(url)
+		with FileLock(self.get_lock_path(url)):
+			entry = self.get_cache_entry(url)
+			if entry and entry.fetched != fetched and entry.is_valid():
+				# other process has saved the page while we waited
+				return entry.body
+			return self.download_page_source_with_retry(url)
+
+	def get_lock_path(self, url):
+		""" Lock file of the url download shared between processes.
+
+		Each url has its own lock file, so downloads of other urls don't
+		wait for it. Unused lock files are removed by cache sweep.
+		"""
+
+		lock_dir = self.get_cache_directory() / config.CACHE_LOCK_DIR
+		lock_dir.mkdir(parents=True, exist_ok=True)
+		return lock_dir / (self.get_url_hash(url) + '.lock')
+
+	def download_page_source_with_retry(self, url):
+		""" Download page retrying transient errors.
+
+		Does not even try while the provider circuit breaker is open, i.e.
+		the site has failed too many times in a row recently.
+		"""
+
+		circuit_breaker = self.get_circuit_breaker()
+		if not circuit_breaker.allow():
+			self.logger.warning('%s site is down, request is skipped', 
+				                self.get_name())
+			raise SiteUnavailableError(self.app)
+
+		download = decorators.retry(attempts=config.RETRY_ATTEMPTS,
+			                        delay=config.RETRY_DELAY,
+			                        max_delay=config.RETRY_MAX_DELAY,
+			                        when=self.is_transient_error)(
+		                                    self.download_page_source)
+		try:
+			page_source = download(url)
+		except Exception as error:
+			if self.is_transient_error(error):
+				circuit_breaker.record_failure()
+			else:
+				circuit_breaker.record_success()
+			raise
+
+		circuit_breaker.record_success()
+		return page_source
+
+	def download_page_source(self, url):
+		""" Download page and save it to the cache.
+
+		Expired cache is revalidated with conditional request, so the
+		page is not downloaded again if it was not modified.
+		"""
+
+		headers = self.get_request_headers()
+		if not self.app.options.refresh:
+			headers.update(self.get_conditional_headers(url))
+
+		response = self.app.http_client.get(url, headers=headers)
+		if response.status == 304:
+			page_source = self.refresh_cache(url)
+			if page_source is not None:
+				return page_source
+			# cache was cleared meanwhile, download the whole page
+			response = self.app.http_client.get(
+				             url, headers=self.get_request_headers())
+
+		self.save_cache(url, response.body, response.headers)
+		return response.body
+
 	def _get_configuration(self):
 		""" Returns configurated location name and url
+
+		All options of the provider section are kept in 'settings' as 
+		read-only view of the configuration shared by the application.
 		"""
 
 		name = self.get_default_location()
 		url = self.get_default_url()
-		parser = configparser.ConfigParser(interpolation=None)
 
 		try:
-			parser.read(self.get_configuration_file())
+			settings = self.app.configuration.section(self.get_name())
 		except (configparser.Error, configparser.ParsingError,
 			    configparser.MissingSectionHeaderError):
 		    self.clear_configurate()
@@ -156,12 +434,39 @@ class WeatherProvider(Command):
 		    raise ConfigParserError(self.app).run(('Bad configuration file. '
 		    	          'Please reconfigurate your provider: '), self.name)		    	
 
-		if self.get_name() in parser.sections():
-			location_config = parser[self.get_name()]
-			name, url = location_config['name'], location_config['url']
+		self.settings = settings
+		if 'name' in settings and 'url' in settings:
+			name, url = settings['name'], settings['url']
 
 		return name, url
 
+	def configure_rate_limit(self):
+		""" Set requests rate limit for the provider site.
+
+		Rate and burst are taken from 'rate-limit' and 'rate-burst' 
+		options of the provider section in configuration file.
+		"""
+
+		host = urlsplit(self.url).hostname
+		if not host:
+			return
+
+		rate = self.get_number_setting('rate-limit', config.RATE_LIMIT)
+		burst = int(self.get_number_setting('rate-burst', config.RATE_BURST))
+
+		self.app.rate_limiter.configure(host, rate, burst)
+
+	def get_number_setting(self, name, default):
+		""" Return number option of the provider section.
+		"""
+
+		try:
+			return self.settings.getfloat(name, default)
+		except ValueError:
+			self.logger.warning('Bad %s option of %s provider, '
+				                'default is used.', name, self.get_name())
+			return default
+
 	def save_configuration(self, name, url):
 	    """ Save selected location to configuration file.
 
@@ -176,16 +481,121 @@ class WeatherProvider(Command):
 	    param type: str
 	    """
 
-	    parser = configparser.ConfigParser(interpolation=None)
-	    config_file = self.get_configuration_file()
+	    # other provider options, e.g. rate limit, are kept
+	    self.app.configuration.update(self.get_name(), 
+	    	                          {'name': name, 'url': url})
+
+	def reset_location(self):
+		""" Remove saved location of the provider, so the default one is
+		used until it is configured again.
+
+		Other options of the provider and other sections are kept.
+		"""
+
+		self.app.configuration.remove_options(self.get_name(), 
+			                                  ('name', 'url'))
+
+	def get_mode(self, tomorrow=None):
+		""" Return if weather for tomorrow is asked, by the application
+		mode when 'tomorrow' is None.
+		"""
+
+		return self.app.options.tomorrow if tomorrow is None else tomorrow
+
+	def get_weather_info_key(self, url, tomorrow=None):
+		""" Cache key of parsed weather information of the url.
+		"""
+
+		mode = 'tomorrow' if self.get_mode(tomorrow) else 'today'
+		return self.get_url_hash(f'weather_info:{self.get_name()}:{mode}:'
+			                     f'{url}')
 
-	    if config_file.exists():
-	    	parser.read(config_file)
+	@staticmethod
+	def get_page_hash(page_source):
+		""" Hash of the page source which parsed information belongs to.
+		"""
+
+		return hashlib.md5(page_source).hexdigest()
+
+	def get_weather_info_cache(self, url, tomorrow=None):
+		""" Return parsed weather information of the valid cached page.
+
+		Parsed information is valid only for the same page source it was
+		parsed from, which is checked by the page hash saved with both.
+		"""
+
+		page = self.get_cache_entry(url, body=False)
+		if page is None or not page.is_valid() or \
+		   not page.headers.get('page-hash'):
+			return None
+
+		entry = self.app.cache.get(self.get_weather_info_key(url, tomorrow))
+		if entry is None or \
+		   entry.headers.get('page-hash') != page.headers['page-hash']:
+			return None
+		return json.loads(entry.body)
+
+	def save_weather_info_cache(self, url, content, weather_info, 
+		                        tomorrow=None):
+		""" Save parsed weather information of the cached page.
+		"""
+
+		page = self.get_cache_entry(url, body=False)
+		page_hash = self.get_page_hash(content.encode('utf-8'))
+		# page could be refreshed in background while we parsed it
+		if page is None or page.headers.get('page-hash') != page_hash:
+			return
+
+		body = json.dumps(weather_info, ensure_ascii=False).encode('utf-8')
+		headers = {'page-hash': page_hash}
+		key = self.get_weather_info_key(url, tomorrow)
+		self.app.cache.set(CacheEntry(key, url, body, page.fetched, page.ttl, 
+			                          page.keep_until, headers,
+			                          self.get_name()))
+
+	def get_weather_info_for(self, url, tomorrow=None):
+		""" Collects weather information of the url using caches.
+
+		Both download and parsing of the page are skipped when parsed
+		information of the valid cached page is saved. The mode is taken
+		once, so the cache key can't change while the page is parsed.
+		"""
+
+		tomorrow = self.get_mode(tomorrow)
+		if not self.app.options.refresh:
+			weather_info = self.get_weather_info_cache(url, tomorrow)
+			if weather_info is not None:
+				self.app.cache.record_lookup(self.get_url_hash(url), True)
+				return weather_info
+
+		content = self.get_page_source(url)
+		weather_info = self.get_weather_info(content)
+		self.save_weather_info_cache(url, content, weather_info, tomorrow)
+		return weather_info
+
+	def prefetch(self, url, margin=config.PREFETCH_MARGIN, tomorrow=None):
+		""" Warm cache of the url ahead of time.
+
+		The page is downloaded when it is missing or expires in less than
+		'margin' seconds, then parsed information is saved for the given
+		mode, the application mode by default. Pages are parsed by the
+		mode of the application, so 'prefetch' command gives providers
+		of each mode their own options. Lookups are not counted in cache
+		stats.
+		"""
+
+		tomorrow = self.get_mode(tomorrow)
+		entry = self.get_cache_entry(url)
+		if entry is None or entry.age() + margin >= entry.ttl:
+			page_source = self.fetch_page_source(url)
+		else:
+			page_source = entry.body
 
-	    parser[self.get_name()] = {'name': name, 'url': url}
-	    with open(config_file, 'w', 
-	              encoding='utf-8') as configfile:
-	        parser.write(configfile)
+		if self.get_weather_info_cache(url, tomorrow) is None:
+			content = page_source.decode('utf-8')
+			self.save_weather_info_cache(url, content, 
+				                         self.get_weather_info(content),
+				                         tomorrow)
 
 	def run(self, argv):
 		""" Run provider.
@@ -193,15 +603,88 @@ class WeatherProvider(Command):
 
 		self.clear_not_valid_cache()
 
-		content = self.get_page_source(self.url)
-		return self.get_weather_info(content)
+		return self.get_weather_info_for(self.url)
+
+	def get_locations(self):
+		""" Return all configured locations as (name, url) pairs.
+
+		The location chosen by 'configurate' goes first, then locations
+		of 'locations' option of the provider section, one 'name = url'
+		per line.
+		"""
+
+		locations = [(self.location, self.url)]
+		urls = {self.url}
+		for line in self.settings.get('locations', '').splitlines():
+			name, sep, url = (part.strip() for part in line.partition('='))
+			if not (sep and name and url):
+				if line.strip():
+					self.logger.warning('Bad location "%s" of %s provider is '
+						                'skipped.', line.strip(), 
+						                self.get_name())
+				continue
+			if url not in urls:
+				locations.append((name, url))
+				urls.add(url)
+
+		return locations
+
+	def get_location_name(self, url):
+		""" Return name of the configured location of the url.
+
+		The url itself is returned when no location has it.
+		"""
+
+		for name, location_url in self.get_locations():
+			if location_url == url:
+				return name
+		return url
+
+	def run_locations(self, argv):
+		""" Run provider for all configured locations.
+
+		Locations are fetched by at most config.LOCATION_WORKERS threads,
+		which share this provider and connections of the application.
+		Returns (location name, WeatherInfo) pairs in configured order,
+		locations which failed are logged and left out.
+		"""
+
+		locations = self.get_locations()
+		if len(locations) == 1:
+			return [(self.location, normalize(self.run(argv), 
+				                              self.get_fetch_time(self.url)))]
+
+		self.clear_not_valid_cache()
+
+		workers = min(config.LOCATION_WORKERS, len(locations))
+		with DaemonExecutor(max_workers=workers) as executor:
+			futures = [(name, url, 
+			            executor.submit(self.get_weather_info_for, url))
+			           for name, url in locations]
+
+			results = []
+			for name, url, future in futures:
+				try:
+					results.append((name, normalize(future.result(), 
+						                            self.get_fetch_time(url))))
+				except Exception:
+					msg = 'Error during %s location of %s provider.'
+					if self.app.options.debug:
+						self.logger.exception(msg, name, self.get_name())
+					else:
+						self.logger.error(msg, name, self.get_name())
+
+		return results
 
 	def clear_not_valid_cache(self):
 	    """ Clear all not valid cache.
+
+	    Expired cache is kept for config.CACHE_STALE_TIME seconds, cache
+	    which can be revalidated is kept for config.CACHE_REVALIDATE_TIME
+	    seconds. The cache is cleared at most once per
+	    config.CACHE_SWEEP_INTERVAL seconds by all providers and runs.
 	    """
 
-	    cache_dir = self.get_cache_directory()
-	    if cache_dir.exists():
-	    	for file in os.listdir(cache_dir):
-	    		if not self.is_valid(cache_dir/file):
-	    			os.remove(cache_dir/file)
+	    removed = self.app.cache.sweep()
+	    if removed:
+	    	self.logger.debug('Removed %d not valid cache entries', removed)
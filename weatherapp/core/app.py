@@ -3,19 +3,23 @@
 
 import os
 import sys
-import html
+import time
 import logging
+import threading
 import configparser
 from pathlib import Path
 from argparse import ArgumentParser
 
 from weatherapp.core.managers import (ProviderManager, 
 	                                  CommandManager, 
-	                                  FormatterManager)
+	                                  FormatterManager,
+	                                  CacheManager)
 from weatherapp.core.exception import ConfigParserError
-from weatherapp.core.commands import Configurate
 from weatherapp.core.abstract import Command
-from weatherapp.core import decorators
+from weatherapp.core.ratelimit import RateLimiter
+from weatherapp.core.configservice import ConfigService
+from weatherapp.core.weatherinfo import normalize
+from weatherapp.core import caches
 from weatherapp.core import config
 
 
@@ -40,9 +44,45 @@ class App:
 		self.stdout = stdout or sys.stdout
 		self.stderr = stderr or sys.stderr
 		self.arg_parser = self._arg_parse() 
+		self.configuration = ConfigService(
+			Command.get_configuration_file(),
+			Command.get_cache_directory() / config.CACHE_LOCK_DIR / 
+			config.CONFIG_LOCK_FILE)
 		self.providermanager = ProviderManager()
 		self.commandmanager = CommandManager()
 		self.formattermanager = FormatterManager()
+		self.cachemanager = CacheManager()
+		self.rate_limiter = RateLimiter()
+		self._cache = None
+		self._http_client = None
+		self._formatter = None
+		self._lock = threading.Lock()
+
+	@property
+	def cache(self):
+		""" Page cache, created on first use.
+		"""
+
+		with self._lock:
+			if self._cache is None:
+				cache = self.cachemanager.get(config.CACHE_BACKEND)(
+					                          Command.get_cache_directory())
+				if config.CACHE_MEMORY_SIZE:
+					cache = caches.TieredCache(caches.MemoryCache(), cache)
+				self._cache = cache
+			return self._cache
+
+	@property
+	def http_client(self):
+		""" Http client shared by all providers, created on first use.
+		"""
+
+		with self._lock:
+			if self._http_client is None:
+				# commands which don't download pages skip http.client import
+				from weatherapp.core.httpclient import HttpClient
+				self._http_client = HttpClient(rate_limiter=self.rate_limiter)
+			return self._http_client
 
 	def _arg_parse(self):
 		""" Initialize argument parser.
@@ -70,6 +110,19 @@ class App:
 		arg_parser.add_argument('-f', '--formatter', action='store',
 			                    default='list',
 			                    help='Output format, defaults to list')
+		arg_parser.add_argument('--workers', action='store', type=int,
+			                    default=config.PROVIDER_WORKERS,
+			                    help='Number of providers run at once')
+		arg_parser.add_argument('--timeout', action='store', type=float,
+			                    default=config.PROVIDER_TIMEOUT,
+			                    help='Seconds to wait for providers')
+		arg_parser.add_argument('--stream', 
+			                    help='Show providers as soon as they finish', 
+			                    action='store_true')
+		arg_parser.add_argument('--combined', 
+			                    help='Show all providers and locations in '
+			                         'one table or CSV', 
+			                    action='store_true')
 
 		return arg_parser
 
@@ -92,13 +145,12 @@ class App:
 		""" Returns configurated logging level, logging output, logfile name.
 		"""
 
-		configuration = configparser.ConfigParser()
 		console_level = logging.WARNING
 		log_output = 'console'
 		log_filename = 'weatherapp.log'
 
 		try:
-			configuration.read(self.get_log_configuration_file())
+			sections = self.configuration.sections()
 		except (configparser.Error, configparser.ParsingError,
 			    configparser.MissingSectionHeaderError):
 		    self.clear_configurate()
@@ -110,8 +162,8 @@ class App:
 		    raise ConfigParserError(self.app).run(('Bad configuration file.\n'
 		    	          'Please reconfigurate your provider: '), self.name)
 		else:
-		 	if 'App' in configuration.sections():
-		 		app_config = configuration['App']
+		 	if 'App' in sections:
+		 		app_config = self.configuration.section('App')
 		 		log_level = app_config.get('log-level', '')
 		 		if log_level:
 		 			log_level = self.LOG_LEVEL_NAMES.get(log_level, 
@@ -148,16 +200,44 @@ class App:
 			fl.setFormatter(formatter)
 			root_logger.addHandler(fl)
 
+	@property
+	def messages(self):
+		""" Stream for messages of errors, see weatherapp.core.exception.
+
+		Messages go to stderr when the formatter writes structured output,
+		e.g. JSON, which must not be mixed with text.
+		"""
+
+		name = getattr(getattr(self, 'options', None), 'formatter', None)
+		if name in self.formattermanager and \
+		   self.formattermanager.get(name).structured:
+			return self.stderr
+		return self.stdout
+
+	def get_formatter(self, argv):
+		""" Return formatter chosen by '--formatter'.
+
+		The formatter is created and its options are parsed once per run.
+		Returns None and logs the error when there is no such formatter.
+		"""
+
+		if self._formatter is None:
+			name = self.options.formatter or 'list'
+			if name not in self.formattermanager:
+				msg = ('Error during command: unknown formatter %s.\n'
+					   'The program can not continue to work!')
+				self.logger.error(msg, name)
+				return None
+			formatter = self.formattermanager.get(name)()
+			formatter.configure(argv)
+			self._formatter = formatter
+		return self._formatter
+
 	def produce_output(self, title, location, data, argv):
 	    """ Displays the final result of the program
 	    """
 
-	    if self.options.formatter:
-	    	name = self.options.formatter
-	    	formatter = self.formattermanager.get(name)()
-	    else:
-	    	formatter = self.formattermanager.get('list')()
-
+	    formatter = self.get_formatter(argv)
 	    columns = [title, location]
 
 	    if self.options.tomorrow:
@@ -165,16 +245,80 @@ class App:
 	    else:
 	    	self.stdout.write('Today \n')
 
-	    self.stdout.write(formatter.emit(columns, data, argv))
+	    formatter.emit_rows(columns, iter(data.items()), self.stdout)
 	    self.stdout.write('\n')
+	    self.stdout.flush()
 
 	    if self.options.write_file:
 	    	self.write_file(title, location, data)
 
+	def iter_records(self, results):
+		""" Yield a record of each provider result, see
+		Formatter.emit_records, and write it to file with '--write_file'.
+
+		Fetch time is of the provider page, or the time the result is
+		shown if the page is not cached.
+
+		:param results: iterator of provider title, location and
+		                WeatherInfo
+		"""
+
+		day = 'tomorrow' if self.options.tomorrow else 'today'
+		for title, location, data in results:
+			if self.options.write_file:
+				self.write_file(title, location, data)
+			fetched = data.fetched or time.time()
+			yield {'provider': title, 'location': location, 'day': day,
+			       'fetched': fetched, 'info': data}
+
+	def produce_combined_output(self, results, argv):
+		""" Displays results of all providers in one output.
+
+		Each weather value is a row with day, provider and location
+		columns, so CSV output has nothing but the table. Rows are written
+		as providers finish.
+
+		:param results: iterator of provider title, location and info
+		"""
+
+		def rows():
+			for record in self.iter_records(results):
+				for name, value in record['info'].items():
+					yield (record['day'].capitalize(), record['provider'],
+					       record['location'], name, value)
+
+		self.get_formatter(argv).emit_rows(config.COMBINED_COLUMNS, rows(),
+			                               self.stdout)
+		self.stdout.write('\n')
+		self.stdout.flush()
+
+	def show_results(self, results, argv):
+		""" Display provider results, one output for each location or
+		all in one with '--combined'.
+
+		Structured formatters, e.g. JSON, always write one output of
+		records.
+
+		:param results: iterator of provider title, location and info
+		"""
+
+		formatter = self.get_formatter(argv)
+		if formatter is None:
+			return
+		if formatter.structured:
+			formatter.emit_records(self.iter_records(results), self.stdout)
+			self.stdout.flush()
+		elif self.options.combined:
+			self.produce_combined_output(results, argv)
+		else:
+			for title, location, data in results:
+				self.produce_output(title, location, data, argv)
+
 	def write_file(self, title, location, info):
 		""" Write the weather data to text file.
 		"""
 
+		info = dict(info.items())
 		with open(config.WRITE_FILE, 'w') as f:
 			if not self.options.tomorrow:
 				f.write(title + '\n' + location + '\n' + str(info))
@@ -205,37 +349,97 @@ class App:
 		provider = self.providermanager.get(name)
 		if provider:
 			provider = provider(self)
-			try:
-				self.produce_output(provider.title, 
-	    		                    provider.location, 
-	    		                    provider.run(argv),
-	    		                    argv)
-			except Exception:
-				msg = ('Error during command: %s run.\n'
-	    		       'The program can not continue to work!')
-				if self.options.debug:
-					self.logger.exception(msg, name)
-				else:
-					self.logger.error(msg, name)
+			self.show_results(self.iter_provider_results(
+				name, provider, lambda: provider.run_locations(argv)), argv)
+
+	def iter_provider_results(self, name, provider, get_results):
+		""" Yield title, location and WeatherInfo of each provider
+		location.
+
+		:param get_results: callable which returns the provider results,
+		                    errors raised by it are logged
+		"""
+
+		try:
+			for location, data in get_results():
+				yield provider.title, location, normalize(data)
+		except Exception:
+			msg = ('Error during command: %s run.\n'
+				   'The program can not continue to work!')
+			if self.options.debug:
+				self.logger.exception(msg, name)
+			else:
+				self.logger.error(msg, name)
 
 	def run_providers(self, argv):
-		""" Execute all available providers.
+		""" Execute all available providers concurrently.
+
+		Providers are run in a thread pool of '--workers' size, so the whole
+		run takes about as long as the slowest provider. Results are shown
+		in entry point order, or in order of completion with '--stream'.
+		Providers not finished within '--timeout' seconds from the start
+		of the run are skipped.
 		"""
 
+		providers = []
 		for name, provider in self.providermanager:
-			provider = provider(self)
 			try:
-				self.produce_output(provider.title, 
-					                provider.location, 
-					                provider.run(argv),
-					                argv)
+				providers.append((name, provider(self)))
 			except Exception:
-				msg = ('Error during command.\n'
+				msg = ('Error during command: %s run.\n'
 					   'The program can not continue to work!')
 				if self.options.debug:
-					self.logger.exception(msg)
+					self.logger.exception(msg, name)
 				else:
-					self.logger.error(msg)
+					self.logger.error(msg, name)
+
+		if not providers:
+			return
+
+		self.show_results(self.iter_providers_results(providers, argv), argv)
+
+	def iter_providers_results(self, providers, argv):
+		""" Run providers in the thread pool and yield their results like
+		'iter_provider_results' as they are shown by 'run_providers'.
+
+		:param providers: list of provider names and instances
+		"""
+
+		from concurrent.futures import TimeoutError, as_completed
+		from weatherapp.core.executor import DaemonExecutor
+
+		executor = DaemonExecutor(max_workers=self.options.workers)
+		deadline = time.monotonic() + self.options.timeout
+		futures = {executor.submit(provider.run_locations, argv): 
+		           (name, provider)
+		           for name, provider in providers}
+		pending = set(futures)
+		try:
+			if self.options.stream:
+				finished = as_completed(futures, timeout=self.options.timeout)
+			else:
+				finished = futures
+			for future in finished:
+				try:
+					future.exception(timeout=max(0, deadline - time.monotonic()))
+				except TimeoutError:
+					continue
+				pending.discard(future)
+				name, provider = futures[future]
+				yield from self.iter_provider_results(name, provider,
+					                                  future.result)
+		except TimeoutError:
+			# as_completed gives up when some providers are still running
+			pass
+		finally:
+			# do not wait for hung providers, they run on daemon threads
+			# which don't keep the process alive after the run
+			executor.shutdown(wait=False, cancel_futures=True)
+
+		for future, (name, provider) in futures.items():
+			if future in pending:
+				self.logger.error('Provider %s did not respond in %s seconds.',
+					              name, self.options.timeout)
 
 	def run(self, argv):
 	    """ Run aplication.
@@ -247,16 +451,39 @@ class App:
 	    self.configure_logging()
 	    self.logger.debug('Got the following args %s', argv)
 
-	    command_name = self.options.command
-	    if not command_name:
-	    	# run all command providers by default
-	    	return self.run_providers(remaining_args)
+	    try:
+	    	command_name = self.options.command
+	    	if not command_name:
+	    		# run all command providers by default
+	    		return self.run_providers(remaining_args)
+
+	    	if command_name in self.commandmanager:
+	    		return self.run_command(command_name, remaining_args)
+
+	    	if command_name in self.providermanager:
+	    		return self.run_provider(command_name, remaining_args)
+	    finally:
+	    	self.close()
 
-	    if command_name in self.commandmanager:
-	    	return self.run_command(command_name, remaining_args)
+	def close(self):
+		""" Wait for background refreshes of pages and save cache lookups
+		counted during the run.
+		"""
+
+		# providers module is imported only when providers are run
+		provider = sys.modules.get('weatherapp.core.abstract.provider')
+		if provider is not None and not \
+		   provider.WeatherProvider.join_refreshes(config.CACHE_REFRESH_WAIT):
+			self.logger.debug('Background refreshes are not finished.')
 
-	    if command_name in self.providermanager:
-	    	return self.run_provider(command_name, remaining_args)
+		with self._lock:
+			cache = self._cache
+		if cache is not None:
+			try:
+				cache.flush_lookups()
+			except Exception:
+				self.logger.warning('Cache stats are not saved.', 
+					                exc_info=self.options.debug)
 		    	
 
 def main(argv=sys.argv[1:]):
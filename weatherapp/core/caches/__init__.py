@@ -0,0 +1,21 @@
+""" Page cache stores, a store module is imported on first access.
+"""
+
+import importlib
+
+
+_MODULES = {
+	'FileCache': 'file',
+	'SqliteCache': 'sqlite',
+	'MemoryCache': 'memory',
+	'TieredCache': 'tiered',
+}
+
+__all__ = ['FileCache', 'SqliteCache', 'MemoryCache', 'TieredCache']
+
+
+def __getattr__(name):
+	if name in _MODULES:
+		module = importlib.import_module(f'{__name__}.{_MODULES[name]}')
+		return getattr(module, name)
+	raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
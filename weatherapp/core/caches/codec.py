@@ -0,0 +1,42 @@
+""" Compression of page sources kept on disk.
+"""
+
+import lzma
+import zlib
+
+from weatherapp.core import config
+
+
+CODECS = {
+	'': (bytes, bytes),
+	'zlib': (zlib.compress, zlib.decompress),
+	'lzma': (lzma.compress, lzma.decompress),
+}
+
+
+def encode(data, codec=None):
+	""" Compress data with the codec, config.CACHE_CODEC by default.
+
+	Returns compressed data and name of the codec, data which doesn't
+	get smaller is kept as is with empty codec name.
+	"""
+
+	codec = config.CACHE_CODEC if codec is None else codec
+	if codec not in CODECS:
+		raise ValueError(f'Unknown cache codec: {codec}')
+
+	compressed = CODECS[codec][0](data)
+	if len(compressed) >= len(data):
+		return bytes(data), ''
+	return compressed, codec
+
+
+def decode(data, codec):
+	""" Decompress data saved with the codec.
+
+	:param data: compressed data, any bytes-like object, e.g. mmap
+	:param codec: codec name returned by 'encode'
+	:type codec: str
+	"""
+
+	return CODECS[codec][1](data)
@@ -0,0 +1,246 @@
+import os
+import json
+import mmap
+import time
+import string
+import threading
+
+from weatherapp.core import config
+from weatherapp.core.abstract import Cache
+from weatherapp.core.abstract.cache import CacheEntry
+from weatherapp.core.caches import codec
+from weatherapp.core.singleflight import FileLock
+
+
+class FileCache(Cache):
+
+	""" Cache store with one file per page.
+
+	Page source is kept in '<url hash>' file with modification time set
+	to the fetch time, url, time to live, headers and provider name are
+	kept next to it in '<url hash>.meta' file with modification time set
+	to the last use. Hit and miss counters are kept in a stats file.
+	Pages are compressed with config.CACHE_CODEC, big files are read by
+	mmap, so they are not copied before decompression.
+	"""
+
+	name = 'file'
+
+	@staticmethod
+	def is_key(name):
+		""" Check if file name is url hash, i.e. page source file.
+		"""
+
+		return len(name) == 32 and all(c in string.hexdigits for c in name)
+
+	def get_meta_path(self, key):
+		return self.directory / (key + config.CACHE_META_SUFFIX)
+
+	def _write(self, path, data):
+		""" Write file through temporary one, so readers never see a half
+		written file.
+		"""
+
+		tmp_path = path.with_name(f'{path.name}.{os.getpid()}.'
+			                      f'{threading.get_ident()}.tmp')
+		with tmp_path.open('wb') as tmp_file:
+			tmp_file.write(data)
+		os.replace(tmp_path, path)
+
+	def _read_meta(self, key):
+		try:
+			with self.get_meta_path(key).open() as meta_file:
+				return json.load(meta_file)
+		except (OSError, ValueError):
+			return None
+
+	def get(self, key, body=True):
+		""" Return cache entry by url hash, even expired, or None.
+		"""
+
+		meta = self._read_meta(key)
+		if meta is None:
+			return None
+
+		try:
+			if not body:
+				fetched = (self.directory / key).stat().st_mtime
+				return CacheEntry(key, meta.get('url', ''), None, fetched, 
+					              meta['ttl'], fetched + meta['keep'], 
+					              meta.get('headers'), meta.get('provider', ''))
+			with (self.directory / key).open('rb') as cache_file:
+				stat = os.fstat(cache_file.fileno())
+				fetched = stat.st_mtime
+				if stat.st_size >= config.CACHE_MMAP_SIZE:
+					with mmap.mmap(cache_file.fileno(), 0, 
+						           access=mmap.ACCESS_READ) as data:
+						body = codec.decode(data, meta.get('codec', ''))
+				else:
+					body = codec.decode(cache_file.read(), 
+						                meta.get('codec', ''))
+		except OSError:
+			return None
+
+		return CacheEntry(key, meta.get('url', ''), body, fetched, 
+			              meta['ttl'], fetched + meta['keep'], 
+			              meta.get('headers'), meta.get('provider', ''))
+
+	def set(self, entry):
+		""" Save cache entry, replacing the entry with the same key.
+		"""
+
+		self.directory.mkdir(parents=True, exist_ok=True)
+		body, name = codec.encode(entry.body)
+		meta = {'codec': name,
+		        'url': entry.url,
+		        'ttl': entry.ttl,
+		        'keep': entry.keep_until - entry.fetched,
+		        'headers': entry.headers,
+		        'provider': entry.provider}
+		self._write(self.get_meta_path(entry.key), 
+			        json.dumps(meta).encode('utf-8'))
+		self._write(self.directory / entry.key, body)
+		os.utime(self.directory / entry.key, (entry.fetched, entry.fetched))
+
+	def touch(self, key, fetched):
+		""" Mark the page as fetched again at 'fetched' time.
+		"""
+
+		os.utime(self.directory / key, (fetched, fetched))
+
+	def delete(self, key):
+		""" Remove cache entry by url hash.
+		"""
+
+		for path in (self.directory / key, self.get_meta_path(key)):
+			try:
+				os.remove(path)
+			except FileNotFoundError:
+				pass
+
+	def expire(self, now=None):
+		""" Remove entries which are kept longer than 'keep_until'.
+		"""
+
+		removed = 0
+		if not self.directory.exists():
+			return removed
+
+		for name in os.listdir(self.directory):
+			if not self.is_key(name):
+				continue
+			meta = self._read_meta(name)
+			try:
+				fetched = (self.directory / name).stat().st_mtime
+			except FileNotFoundError:
+				# other process has removed it meanwhile
+				continue
+			if meta is None or fetched + meta['keep'] <= (now or time.time()):
+				self.delete(name)
+				removed += 1
+
+		return removed
+
+	def iter_entries(self):
+		""" Yield url hash, page file stat and meta file stat of entries.
+		"""
+
+		if not self.directory.exists():
+			return
+
+		for name in os.listdir(self.directory):
+			if not self.is_key(name):
+				continue
+			try:
+				yield (name, (self.directory / name).stat(), 
+					   self.get_meta_path(name).stat())
+			except FileNotFoundError:
+				# other process has removed it meanwhile
+				continue
+
+	def evict(self, max_bytes):
+		""" Remove the least recently used entries over 'max_bytes' size.
+		"""
+
+		entries = sorted(self.iter_entries(), key=lambda item: item[2].st_mtime)
+		size = sum(stat.st_size for _, stat, _ in entries)
+		removed = 0
+		for key, stat, _ in entries:
+			if size <= max_bytes:
+				break
+			self.delete(key)
+			size -= stat.st_size
+			removed += 1
+		return removed
+
+	def purge(self, provider):
+		""" Remove all entries saved by the provider.
+		"""
+
+		removed = 0
+		for key, _, _ in list(self.iter_entries()):
+			meta = self._read_meta(key)
+			if meta is not None and meta.get('provider') == provider:
+				self.delete(key)
+				removed += 1
+		return removed
+
+	def get_stats_path(self):
+		return self.directory / config.CACHE_STATS_FILE
+
+	def read_counters(self):
+		try:
+			with self.get_stats_path().open() as stats_file:
+				return json.load(stats_file)
+		except (OSError, ValueError):
+			return {}
+
+	def save_lookups(self, hits, misses, accessed):
+		""" Add counters to the stats file and set access time of the
+		entries as modification time of their meta files.
+		"""
+
+		if not self.directory.exists():
+			return
+
+		for key, used in accessed.items():
+			try:
+				os.utime(self.get_meta_path(key), (used, used))
+			except FileNotFoundError:
+				pass
+
+		stats_path = self.get_stats_path()
+		with FileLock(stats_path.with_name(stats_path.name + '.lock')):
+			counters = self.read_counters()
+			counters['hits'] = counters.get('hits', 0) + hits
+			counters['misses'] = counters.get('misses', 0) + misses
+			self._write(stats_path, json.dumps(counters).encode('utf-8'))
+
+	def stats(self):
+		""" Return number of entries, their size, fetch time range and
+		lookup counters.
+		"""
+
+		self.flush_lookups()
+		counters = self.read_counters()
+		stats = {'count': 0, 'bytes': 0, 'oldest': None, 'newest': None,
+		         'hits': counters.get('hits', 0), 
+		         'misses': counters.get('misses', 0)}
+		if not self.directory.exists():
+			return stats
+
+		for name in os.listdir(self.directory):
+			if not self.is_key(name):
+				continue
+			try:
+				stat = (self.directory / name).stat()
+			except FileNotFoundError:
+				continue
+			stats['count'] += 1
+			stats['bytes'] += stat.st_size
+			if stats['oldest'] is None or stat.st_mtime < stats['oldest']:
+				stats['oldest'] = stat.st_mtime
+			if stats['newest'] is None or stat.st_mtime > stats['newest']:
+				stats['newest'] = stat.st_mtime
+
+		return stats
@@ -0,0 +1,138 @@
+import time
+import threading
+from collections import OrderedDict
+
+from weatherapp.core import config
+from weatherapp.core.abstract import Cache
+
+
+class MemoryCache(Cache):
+
+	""" In-process LRU cache store limited by size of the pages.
+
+	Entries are returned only while they are valid, expired ones are
+	dropped, so the next tier is asked for a fresh copy. The least
+	recently used entries are evicted when pages take more than 
+	'max_bytes' bytes.
+	"""
+
+	name = 'memory'
+
+	def __init__(self, directory=None, max_bytes=config.CACHE_MEMORY_SIZE):
+		super().__init__(directory)
+		self.max_bytes = max_bytes
+		self.size = 0
+		self.hits = 0
+		self.misses = 0
+		self.evictions = 0
+		self._entries = OrderedDict()
+		self._lock = threading.Lock()
+
+	def _remove(self, key):
+		entry = self._entries.pop(key, None)
+		if entry is not None:
+			self.size -= len(entry.body)
+		return entry
+
+	def get(self, key, body=True):
+		""" Return valid cache entry by url hash or None.
+		"""
+
+		with self._lock:
+			entry = self._entries.get(key)
+			if entry is None or not entry.is_valid():
+				self._remove(key)
+				self.misses += 1
+				return None
+			self._entries.move_to_end(key)
+			self.hits += 1
+			return entry
+
+	def set(self, entry):
+		""" Save cache entry, evicting the least recently used ones.
+		"""
+
+		with self._lock:
+			self._remove(entry.key)
+			if len(entry.body) > self.max_bytes:
+				return
+			self._entries[entry.key] = entry
+			self.size += len(entry.body)
+			while self.size > self.max_bytes:
+				self._remove(next(iter(self._entries)))
+				self.evictions += 1
+
+	def touch(self, key, fetched):
+		""" Mark the page as fetched again at 'fetched' time.
+		"""
+
+		with self._lock:
+			entry = self._entries.get(key)
+			if entry is not None:
+				entry.keep_until += fetched - entry.fetched
+				entry.fetched = fetched
+
+	def delete(self, key):
+		""" Remove cache entry by url hash.
+		"""
+
+		with self._lock:
+			self._remove(key)
+
+	def expire(self, now=None):
+		""" Remove entries which are kept longer than 'keep_until'.
+		"""
+
+		now = now or time.time()
+		with self._lock:
+			expired = [key for key, entry in self._entries.items()
+			           if entry.keep_until <= now]
+			for key in expired:
+				self._remove(key)
+		return len(expired)
+
+	def evict(self, max_bytes):
+		""" Remove the least recently used entries over 'max_bytes' size.
+		"""
+
+		removed = 0
+		with self._lock:
+			while self.size > max_bytes:
+				self._remove(next(iter(self._entries)))
+				removed += 1
+		return removed
+
+	def purge(self, provider):
+		""" Remove all entries saved by the provider.
+		"""
+
+		with self._lock:
+			purged = [key for key, entry in self._entries.items()
+			          if entry.provider == provider]
+			for key in purged:
+				self._remove(key)
+		return len(purged)
+
+	def record_lookup(self, key, hit):
+		# 'get' counts lookups of the memory tier itself
+		pass
+
+	def save_lookups(self, hits, misses, accessed):
+		pass
+
+	def sweep(self, interval=None, max_bytes=None):
+		return self.expire()
+
+	def stats(self):
+		""" Return number and size of entries with hit and miss counters.
+		"""
+
+		with self._lock:
+			fetched = [entry.fetched for entry in self._entries.values()]
+			return {'count': len(self._entries), 
+			        'bytes': self.size,
+			        'oldest': min(fetched, default=None),
+			        'newest': max(fetched, default=None),
+			        'hits': self.hits,
+			        'misses': self.misses,
+			        'evictions': self.evictions}
@@ -0,0 +1,228 @@
+import json
+import time
+import sqlite3
+import threading
+
+from weatherapp.core import config
+from weatherapp.core.abstract import Cache
+from weatherapp.core.abstract.cache import CacheEntry
+from weatherapp.core.caches import codec
+
+
+class SqliteCache(Cache):
+
+	""" Cache store with all pages in a single SQLite database.
+
+	Every lookup, expiry and stats request is one query, entries are
+	removed using indexes on their 'keep_until' and 'accessed' time.
+	Space of removed pages is given back to the file system. Pages are
+	compressed with config.CACHE_CODEC. The database is read by mmap up
+	to config.CACHE_DB_MMAP_SIZE, which saves read calls, but sqlite3
+	still copies each page body to bytes before decompression, unlike
+	the 'file' store.
+	"""
+
+	name = 'sqlite'
+
+	SCHEMA = '''
+		CREATE TABLE IF NOT EXISTS pages (
+			key TEXT PRIMARY KEY,
+			url TEXT NOT NULL,
+			body BLOB NOT NULL,
+			fetched REAL NOT NULL,
+			ttl REAL NOT NULL,
+			keep_until REAL NOT NULL,
+			headers TEXT NOT NULL DEFAULT '{}',
+			provider TEXT NOT NULL DEFAULT '',
+			accessed REAL NOT NULL DEFAULT 0,
+			codec TEXT NOT NULL DEFAULT ''
+		);
+		CREATE TABLE IF NOT EXISTS counters (
+			name TEXT PRIMARY KEY,
+			value INTEGER NOT NULL
+		);
+	'''
+
+	# columns added after the first version of the table
+	COLUMNS = {'provider': "TEXT NOT NULL DEFAULT ''",
+	           'accessed': 'REAL NOT NULL DEFAULT 0',
+	           'codec': "TEXT NOT NULL DEFAULT ''"}
+
+	INDEXES = '''
+		CREATE INDEX IF NOT EXISTS pages_keep_until ON pages (keep_until);
+		CREATE INDEX IF NOT EXISTS pages_accessed ON pages (accessed);
+		CREATE INDEX IF NOT EXISTS pages_provider ON pages (provider);
+	'''
+
+	def __init__(self, directory):
+		super().__init__(directory)
+		self.path = directory / config.CACHE_DB_FILE
+		self._local = threading.local()
+
+	def connect(self):
+		""" Return database connection of the current thread.
+		"""
+
+		connection = getattr(self._local, 'connection', None)
+		if connection is None:
+			self.directory.mkdir(parents=True, exist_ok=True)
+			connection = sqlite3.connect(str(self.path), 
+				                         timeout=config.CACHE_DB_TIMEOUT,
+				                         isolation_level=None)
+			# takes effect only for a new database, before any table
+			connection.execute('PRAGMA auto_vacuum=INCREMENTAL')
+			# readers don't block the writer of other process
+			connection.execute('PRAGMA journal_mode=WAL')
+			connection.execute('PRAGMA synchronous=NORMAL')
+			connection.execute(
+				f'PRAGMA mmap_size={int(config.CACHE_DB_MMAP_SIZE)}')
+			connection.executescript(self.SCHEMA)
+			self.migrate(connection)
+			connection.executescript(self.INDEXES)
+			self._local.connection = connection
+		return connection
+
+	def migrate(self, connection):
+		""" Add columns missing in the table of an older version.
+		"""
+
+		columns = {row[1] for row in 
+		           connection.execute('PRAGMA table_info(pages)')}
+		for name, definition in self.COLUMNS.items():
+			if name not in columns:
+				try:
+					connection.execute(
+						f'ALTER TABLE pages ADD COLUMN {name} {definition}')
+				except sqlite3.OperationalError:
+					# other process has added it meanwhile
+					pass
+
+	def get(self, key, body=True):
+		""" Return cache entry by url hash, even expired, or None.
+		"""
+
+		row = self.connect().execute(
+			'SELECT url, {}, fetched, ttl, keep_until, headers, provider, '
+			'codec FROM pages WHERE key = ?'.format('body' if body else 'NULL'),
+			(key,)).fetchone()
+		if row is None:
+			return None
+
+		url, data, fetched, ttl, keep_until, headers, provider, name = row
+		if data is not None:
+			data = codec.decode(data, name)
+		return CacheEntry(key, url, data, fetched, ttl, keep_until, 
+			              json.loads(headers), provider)
+
+	def set(self, entry):
+		""" Save cache entry, replacing the entry with the same key.
+		"""
+
+		body, name = codec.encode(entry.body)
+		self.connect().execute(
+			'INSERT OR REPLACE INTO pages '
+			'(key, url, body, fetched, ttl, keep_until, headers, provider, '
+			'accessed, codec) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+			(entry.key, entry.url, body, entry.fetched, entry.ttl,
+			 entry.keep_until, json.dumps(entry.headers), entry.provider,
+			 time.time(), name))
+
+	def touch(self, key, fetched):
+		""" Mark the page as fetched again at 'fetched' time.
+		"""
+
+		self.connect().execute(
+			'UPDATE pages SET keep_until = keep_until + (? - fetched), '
+			'fetched = ? WHERE key = ?', (fetched, fetched, key))
+
+	def delete(self, key):
+		""" Remove cache entry by url hash.
+		"""
+
+		self.connect().execute('DELETE FROM pages WHERE key = ?', (key,))
+
+	def expire(self, now=None):
+		""" Remove entries which are kept longer than 'keep_until'.
+		"""
+
+		cursor = self.connect().execute(
+			'DELETE FROM pages WHERE keep_until <= ?', (now or time.time(),))
+		return self.vacuum(cursor.rowcount)
+
+	def evict(self, max_bytes):
+		""" Remove the least recently used entries over 'max_bytes' size.
+		"""
+
+		connection = self.connect()
+		# no other process may add pages while we count them
+		connection.execute('BEGIN IMMEDIATE')
+		try:
+			size, = connection.execute(
+				'SELECT COALESCE(SUM(LENGTH(body)), 0) FROM pages').fetchone()
+			evicted = []
+			if size > max_bytes:
+				rows = connection.execute(
+					'SELECT key, LENGTH(body) FROM pages ORDER BY accessed')
+				for key, length in rows.fetchall():
+					evicted.append((key,))
+					size -= length
+					if size <= max_bytes:
+						break
+			connection.executemany('DELETE FROM pages WHERE key = ?', evicted)
+			connection.execute('COMMIT')
+		except BaseException:
+			connection.execute('ROLLBACK')
+			raise
+		return self.vacuum(len(evicted))
+
+	def purge(self, provider):
+		""" Remove all entries saved by the provider.
+		"""
+
+		cursor = self.connect().execute(
+			'DELETE FROM pages WHERE provider = ?', (provider,))
+		return self.vacuum(cursor.rowcount)
+
+	def vacuum(self, removed):
+		""" Give space of removed entries back to the file system.
+		"""
+
+		if removed:
+			self.connect().execute('PRAGMA incremental_vacuum')
+		return removed
+
+	def save_lookups(self, hits, misses, accessed):
+		""" Add counters and update access time in one transaction.
+		"""
+
+		connection = self.connect()
+		connection.execute('BEGIN IMMEDIATE')
+		try:
+			connection.executemany(
+				'INSERT INTO counters (name, value) VALUES (?, ?) '
+				'ON CONFLICT (name) DO UPDATE '
+				'SET value = value + excluded.value',
+				[('hits', hits), ('misses', misses)])
+			connection.executemany(
+				'UPDATE pages SET accessed = ? WHERE key = ?',
+				[(used, key) for key, used in accessed.items()])
+			connection.execute('COMMIT')
+		except BaseException:
+			connection.execute('ROLLBACK')
+			raise
+
+	def stats(self):
+		""" Return number of entries, their size, fetch time range and
+		lookup counters.
+		"""
+
+		self.flush_lookups()
+		connection = self.connect()
+		count, size, oldest, newest = connection.execute(
+			'SELECT COUNT(*), COALESCE(SUM(LENGTH(body)), 0), '
+			'MIN(fetched), MAX(fetched) FROM pages').fetchone()
+		counters = dict(connection.execute('SELECT name, value FROM counters'))
+		return {'count': count, 'bytes': size, 
+		        'oldest': oldest, 'newest': newest,
+		        'hits': counters.get('hits', 0),
+		        'misses': counters.get('misses', 0)}
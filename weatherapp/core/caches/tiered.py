@@ -0,0 +1,76 @@
+from weatherapp.core.abstract import Cache
+
+
+class TieredCache(Cache):
+
+	""" Memory cache in front of the disk cache store.
+
+	Pages found on disk are kept in memory, so next lookups in the same
+	process skip reading the disk.
+
+	:param memory: first tier
+	:type memory: caches.MemoryCache
+	:param disk: second tier
+	:type disk: abstract.Cache
+	"""
+
+	def __init__(self, memory, disk):
+		super().__init__(disk.directory)
+		self.memory = memory
+		self.disk = disk
+
+	def get(self, key, body=True):
+		""" Return cache entry from memory, or from disk if missed.
+		"""
+
+		entry = self.memory.get(key)
+		if entry is None:
+			entry = self.disk.get(key, body)
+			if body and entry is not None and entry.is_valid():
+				self.memory.set(entry)
+		return entry
+
+	def set(self, entry):
+		self.disk.set(entry)
+		self.memory.set(entry)
+
+	def touch(self, key, fetched):
+		self.disk.touch(key, fetched)
+		self.memory.touch(key, fetched)
+
+	def delete(self, key):
+		self.disk.delete(key)
+		self.memory.delete(key)
+
+	def expire(self, now=None):
+		self.memory.expire(now)
+		return self.disk.expire(now)
+
+	def evict(self, max_bytes):
+		return self.disk.evict(max_bytes)
+
+	def purge(self, provider):
+		self.memory.purge(provider)
+		return self.disk.purge(provider)
+
+	def record_lookup(self, key, hit):
+		# counted in memory by the disk store, saved in batches
+		self.disk.record_lookup(key, hit)
+
+	def flush_lookups(self):
+		self.disk.flush_lookups()
+
+	def save_lookups(self, hits, misses, accessed):
+		self.disk.save_lookups(hits, misses, accessed)
+
+	def sweep(self, *args, **kwargs):
+		self.memory.expire()
+		return self.disk.sweep(*args, **kwargs)
+
+	def stats(self):
+		""" Return disk stats with memory tier stats under 'memory' key.
+		"""
+
+		stats = self.disk.stats()
+		stats['memory'] = self.memory.stats()
+		return stats
@@ -0,0 +1,104 @@
+""" Circuit breaker which stops requests to sites that are down.
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+
+from weatherapp.core import config
+
+
+class CircuitBreaker:
+
+	""" Circuit breaker with state saved to a file.
+
+	After 'failures' failed calls in a row the circuit opens, and calls
+	are refused for 'reset_time' seconds. Then one trial call is allowed,
+	its success closes the circuit and its failure opens it again. The
+	state is kept in a file, so it is shared between application runs.
+	"""
+
+	logger = logging.getLogger(__name__)
+
+	# guards updates of the state by threads fetching locations
+	_lock = threading.Lock()
+
+	def __init__(self, path, failures=config.CIRCUIT_FAILURES,
+		         reset_time=config.CIRCUIT_RESET_TIME):
+		self.path = path
+		self.failures = failures
+		self.reset_time = reset_time
+
+	def get_state(self):
+		""" Return saved number of failures and time the circuit opened.
+		"""
+
+		try:
+			with open(self.path) as state_file:
+				state = json.load(state_file)
+			return int(state['failures']), float(state['opened_at'])
+		except (OSError, ValueError, KeyError, TypeError):
+			return 0, 0.0
+
+	def save_state(self, failures, opened_at):
+		""" Save number of failures and time the circuit opened.
+		"""
+
+		self.path.parent.mkdir(parents=True, exist_ok=True)
+		tmp_path = self.path.with_name(f'{self.path.name}.{os.getpid()}.'
+			                           f'{threading.get_ident()}.tmp')
+		with open(tmp_path, 'w') as state_file:
+			json.dump({'failures': failures, 'opened_at': opened_at},
+				      state_file)
+		os.replace(tmp_path, self.path)
+
+	def is_open(self):
+		""" Check if calls are refused now.
+		"""
+
+		failures, opened_at = self.get_state()
+		return failures >= self.failures and \
+		       time.time() - opened_at < self.reset_time
+
+	def allow(self):
+		""" Check if call may be done.
+
+		When reset time is over the trial call is allowed, and the circuit
+		is kept open for others until the trial call ends.
+		"""
+
+		with self._lock:
+			failures, opened_at = self.get_state()
+			if failures < self.failures:
+				return True
+			if time.time() - opened_at < self.reset_time:
+				return False
+
+			self.logger.info('Trial call through circuit %s', self.path.name)
+			self.save_state(failures, time.time())
+			return True
+
+	def record_success(self):
+		""" Close the circuit.
+		"""
+
+		if self.path.exists():
+			try:
+				os.remove(self.path)
+			except FileNotFoundError:
+				pass
+
+	def record_failure(self):
+		""" Count failed call, open the circuit after too many failures.
+		"""
+
+		with self._lock:
+			failures, opened_at = self.get_state()
+			failures += 1
+			if failures >= self.failures:
+				opened_at = time.time()
+				self.logger.warning('Circuit %s is open for %s seconds',
+					                self.path.name, self.reset_time)
+			self.save_state(failures, opened_at)
@@ -1,3 +1,22 @@
-from weatherapp.core.commands.configurate import Configurate
-from weatherapp.core.commands.providers import Providers
-from weatherapp.core.commands.clearcachedir import ClearCacheDir
\ No newline at end of file
+""" Application commands, imported on first access by class name.
+"""
+
+import importlib
+
+
+_MODULES = {
+	'Configurate': 'configurate',
+	'Providers': 'providers',
+	'ClearCacheDir': 'clearcachedir',
+	'CacheStats': 'cachestats',
+	'Prefetch': 'prefetch',
+}
+
+__all__ = ['Configurate', 'Providers', 'ClearCacheDir', 'CacheStats', 'Prefetch']
+
+
+def __getattr__(name):
+	if name in _MODULES:
+		module = importlib.import_module(f'{__name__}.{_MODULES[name]}')
+		return getattr(module, name)
+	raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
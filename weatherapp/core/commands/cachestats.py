@@ -0,0 +1,50 @@
+import time
+
+from weatherapp.core import config
+from weatherapp.core.abstract import Command
+
+
+class CacheStats(Command):
+
+	""" Print cache statistics or remove cache of a provider.
+	"""
+
+	name = 'cache'
+
+	def get_parser(self):
+		parser = super().get_parser()
+		parser.add_argument('--purge', metavar='PROVIDER',
+			                help='Remove cache of the provider')
+
+		return parser
+
+	@staticmethod
+	def format_time(timestamp):
+		if timestamp is None:
+			return '-'
+		return time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(timestamp))
+
+	def run(self, argv):
+		""" Run command.
+		"""
+
+		params = self.get_parser().parse_args(argv)
+
+		if params.purge:
+			removed = self.app.cache.purge(params.purge)
+			self.app.stdout.write(f'Removed {removed} cache entries of '
+				                  f'{params.purge}. \n')
+			return
+
+		stats = self.app.cache.stats()
+		lookups = stats['hits'] + stats['misses']
+		hit_ratio = f'{stats["hits"] / lookups:.1%}' if lookups else '-'
+		limit = config.CACHE_MAX_SIZE or 'no limit'
+
+		self.app.stdout.write(
+			f'Entries: {stats["count"]} \n'
+			f'Size: {stats["bytes"]} bytes (limit {limit}) \n'
+			f'Hit ratio: {hit_ratio} ({stats["hits"]} hits, '
+			f'{stats["misses"]} misses) \n'
+			f'Oldest entry: {self.format_time(stats["oldest"])} \n'
+			f'Newest entry: {self.format_time(stats["newest"])} \n')
@@ -1,6 +1,5 @@
 import re
 import logging
-import configparser
 
 from weatherapp.core import config
 from weatherapp.core.abstract import Command
@@ -111,17 +110,9 @@ class Configurate(Command):
 		""" Save log level, log output and logfile name for application.
 		"""
 
-		parser = configparser.ConfigParser()
-		config_file = self.get_configuration_file()
-
-		if config_file.exists():
-			parser.read(config_file)
-
-		parser['App'] = {'log-level': log_level,
-		                 'log-output': log_output,
-		                 'log-filename': log_filename}
-		with open(config_file, 'w') as configfile:
-			parser.write(configfile)
+		self.app.configuration.update('App', {'log-level': log_level,
+			                                   'log-output': log_output,
+			                                   'log-filename': log_filename})
 
 	def logging_file_or_console(self):
 		""" Choice logging into a file or console.
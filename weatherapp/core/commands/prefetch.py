@@ -0,0 +1,107 @@
+import logging
+import argparse
+from concurrent.futures import wait
+
+from weatherapp.core import config
+from weatherapp.core.abstract import Command
+from weatherapp.core.executor import DaemonExecutor
+
+
+class ModeApp:
+
+	""" View of the application with its own 'tomorrow' option.
+
+	Providers parse pages by the mode of their application, so providers
+	of both modes may run at once without changing shared options.
+	"""
+
+	def __init__(self, app, tomorrow):
+		self._app = app
+		self.options = argparse.Namespace(**vars(app.options))
+		self.options.tomorrow = tomorrow
+
+	def __getattr__(self, name):
+		return getattr(self._app, name)
+
+
+class Prefetch(Command):
+
+	""" Fill the cache for all providers for today and tomorrow.
+
+	Pages which expire soon are downloaded again, so it can be run from
+	cron to keep the cache warm for interactive runs.
+	"""
+
+	name = 'prefetch'
+	logger = logging.getLogger(__name__)
+
+	def get_parser(self):
+		parser = super().get_parser()
+		parser.add_argument('--margin', type=float, 
+			                default=config.PREFETCH_MARGIN,
+			                help='Download pages which expire sooner '
+			                     '(in seconds)')
+
+		return parser
+
+	def get_providers(self, tomorrow):
+		""" Return instances of all available providers for the mode.
+		"""
+
+		app = ModeApp(self.app, tomorrow)
+		providers = []
+		for name, provider in self.app.providermanager:
+			try:
+				providers.append((name, provider(app)))
+			except Exception:
+				msg = 'Error during prefetch of %s provider.'
+				if self.app.options.debug:
+					self.logger.exception(msg, name)
+				else:
+					self.logger.error(msg, name)
+		return providers
+
+	def prefetch_all(self, providers, margin):
+		""" Prefetch pages of all locations of all providers concurrently.
+
+		Returns number of prefetched and all pages. Providers not finished
+		within '--timeout' seconds are not counted.
+		"""
+
+		executor = DaemonExecutor(max_workers=self.app.options.workers)
+		futures = {executor.submit(provider.prefetch, url, margin, 
+			                       provider.app.options.tomorrow): name
+		           for name, provider in providers
+		           for _, url in provider.get_locations()}
+		done, not_done = wait(futures, timeout=self.app.options.timeout)
+		executor.shutdown(wait=False, cancel_futures=True)
+
+		prefetched = 0
+		for future in done:
+			if future.exception() is None:
+				prefetched += 1
+				continue
+			msg = 'Error during prefetch of %s provider.'
+			if self.app.options.debug:
+				self.logger.error(msg, futures[future],
+					              exc_info=future.exception())
+			else:
+				self.logger.error(msg, futures[future])
+		for future in not_done:
+			self.logger.error('Provider %s did not respond in %s seconds.',
+				              futures[future], self.app.options.timeout)
+
+		return prefetched, len(futures)
+
+	def run(self, argv):
+		""" Run command.
+		"""
+
+		params = self.get_parser().parse_args(argv)
+		providers = self.get_providers(False) + self.get_providers(True)
+		self.app.cache.sweep()
+
+		prefetched, total = self.prefetch_all(providers, params.margin)
+
+		self.app.stdout.write(f'Prefetched {prefetched} of {total} '
+			                  f'pages. \n')
@@ -8,14 +8,81 @@ FAKE_MOZILLA_AGENT = 'Mozilla/5.0 (X11; Ubuntu; Linux x86_64;)'
 # Configuration settings
 CONFIG_LOCATION = 'location'
 CONFIG_FILE = 'weatherapp_ini'           # configuration file name
+CONFIG_LOCK_FILE = 'config.lock'         # lock file for configuration writes
 
 # Write to text file
 WRITE_FILE = 'weatherapp.txt'
 
+# Column names of '--combined' output
+COMBINED_COLUMNS = ('Day', 'Provider', 'Location', 'Parameter', 'Value')
+
 # Cache settings
 CACHE_DIR = '.wappcache'       #cache directory name
-CACH_TIME = 300                # how long cache files are valid(in seconds)
+CACH_TIME = 300                # how long cache files are valid(in seconds),
+                               # set for providers by 'cache-ttl' option
+CACHE_TTL_MIN = 60             # the shortest cache time(in seconds)
+CACHE_TTL_MAX = 7 * 86400      # the longest cache time(in seconds)
+CACHE_TTL_FROM_HEADERS = False # take cache time from Cache-Control and 
+                               # Expires headers, set for providers by
+                               # 'cache-ttl-headers' option
+CACHE_STALE_TIME = 600         # how long expired cache is still shown while
+                               # it is refreshed in background(in seconds)
+CACHE_REFRESH_WAIT = 3         # how long to wait for background refreshes
+                               # at exit(in seconds)
+CACHE_REVALIDATE_TIME = 86400  # how long to keep pages with ETag or 
+                               # Last-Modified to revalidate them(in seconds)
+CACHE_BACKEND = 'sqlite'       # cache store: 'sqlite' or 'file'
+CACHE_DB_FILE = 'cache.sqlite' # database file name of 'sqlite' cache store
+CACHE_DB_TIMEOUT = 10          # how long to wait for locked database(in seconds)
+CACHE_MEMORY_SIZE = 16 * 1024 * 1024   # memory cache size, 0 - no memory cache
+CACHE_MAX_SIZE = 50 * 1024 * 1024      # disk cache size, the least recently
+                                       # used pages are removed over it,
+                                       # 0 - no limit
+CACHE_CODEC = 'zlib'           # page compression on disk: 'zlib', 'lzma' 
+                               # or '' - no compression
+CACHE_MMAP_SIZE = 256 * 1024   # bigger cache files are read by mmap(in bytes)
+CACHE_DB_MMAP_SIZE = 64 * 1024 * 1024  # how much of 'sqlite' store database
+                                       # is read by mmap(in bytes), 0 - none
+CACHE_STATS_FILE = 'stats'     # file with hit and miss counters of 'file' store
+CACHE_META_SUFFIX = '.meta'    # file suffix for page info of 'file' store
+CACHE_LOCK_DIR = 'locks'       # directory name for download locks
+CACHE_LOCK_TTL = 3600          # unused lock files older than that are
+                               # removed by sweep(in seconds)
+CACHE_SWEEP_INTERVAL = 300     # how often not valid cache is removed(in seconds)
+CACHE_SWEEP_FILE = 'last_sweep'   # stamp file with time of the last removal
+CACHE_VALIDATORS = ('ETag', 'Last-Modified')
+
+# Concurrent providers run settings
+PROVIDER_WORKERS = 8           # maximum number of providers run at once
+PROVIDER_TIMEOUT = 30          # how long to wait for providers(in seconds)
+LOCATION_WORKERS = 4           # maximum number of locations of a provider
+                               # fetched at once
+REQUEST_TIMEOUT = 20           # socket timeout for site requests(in seconds)
+PREFETCH_MARGIN = 120          # 'prefetch' downloads pages which expire 
+                               # sooner(in seconds)
+
+# HTTP client settings
+HTTP_POOL_SIZE = 10            # maximum number of open connections
+HTTP_MAX_REDIRECTS = 5         # how many redirects to follow
+DNS_CACHE_TIME = 300           # how long resolved hosts are valid(in seconds)
+
+# Retries of failed site requests
+RETRY_ATTEMPTS = 3             # how many times to try the request
+RETRY_DELAY = 0.5              # delay before the second attempt(in seconds)
+RETRY_MAX_DELAY = 5            # the longest delay between attempts(in seconds)
+RETRY_STATUS_CODES = (408, 429, 500, 502, 503, 504)   # transient errors
+
+# Circuit breaker settings
+CIRCUIT_FAILURES = 3           # failed requests in a row to stop requests
+CIRCUIT_RESET_TIME = 60        # how long requests are stopped(in seconds)
+CIRCUIT_SUFFIX = '.circuit'    # file suffix for circuit state in cache dir
+
+# Default requests rate limit for each site, can be set for providers in 
+# configuration file by 'rate-limit' and 'rate-burst' options
+RATE_LIMIT = 2                 # requests per second, 0 - no limit
+RATE_BURST = 5                 # how many requests may be sent at once
 
 # entry points group for providers
 PROVIDER_EP_NAMESPACE = 'weatherapp.provider'
+PROVIDER_INDEX_FILE = 'providers.json'   # saved provider entry points
 
@@ -0,0 +1,184 @@
+""" Configuration file shared by the application, providers and commands.
+"""
+
+import os
+import threading
+import contextlib
+import configparser
+from collections.abc import Mapping
+
+from weatherapp.core.singleflight import FileLock
+
+
+class ConfigSection(Mapping):
+
+	""" Read-only view of a configuration section with typed getters.
+
+	:param name: section name
+	:type name: str
+	:param options: section options
+	:type options: dict
+	"""
+
+	BOOLEAN_STATES = configparser.ConfigParser.BOOLEAN_STATES
+
+	def __init__(self, name, options=None):
+		self.name = name
+		self._options = dict(options or {})
+
+	def __getitem__(self, option):
+		return self._options[option]
+
+	def __iter__(self):
+		return iter(self._options)
+
+	def __len__(self):
+		return len(self._options)
+
+	def __repr__(self):
+		return f'ConfigSection({self.name!r}, {self._options!r})'
+
+	def getint(self, option, fallback=None):
+		""" Return option as int, raise ValueError for a bad value.
+		"""
+
+		value = self.get(option)
+		return fallback if value is None else int(value)
+
+	def getfloat(self, option, fallback=None):
+		""" Return option as float, raise ValueError for a bad value.
+		"""
+
+		value = self.get(option)
+		return fallback if value is None else float(value)
+
+	def getboolean(self, option, fallback=None):
+		""" Return option as bool, e.g. 'yes', 'on', '1' are True.
+		"""
+
+		value = self.get(option)
+		if value is None:
+			return fallback
+		if value.lower() not in self.BOOLEAN_STATES:
+			raise ValueError(f'Not a boolean: {value}')
+		return self.BOOLEAN_STATES[value.lower()]
+
+
+class ConfigService:
+
+	""" Configuration file parsed once and shared by all its users.
+
+	The file is parsed again only when its modification time or size
+	changes. Sections are given as read-only snapshots, changes are
+	saved with 'update', which rewrites the file atomically holding a
+	lock shared between processes.
+
+	:param path: configuration file
+	:type path: pathlib.Path
+	:param lock_path: lock file for writes
+	:type lock_path: pathlib.Path
+	"""
+
+	def __init__(self, path, lock_path=None):
+		self.path = path
+		self.lock_path = lock_path
+		self._parser = None
+		self._version = None
+		self._sections = {}
+		self._lock = threading.RLock()
+
+	def get_version(self):
+		""" Return modification time and size of the file, None if there
+		is no file.
+		"""
+
+		try:
+			stat = self.path.stat()
+		except FileNotFoundError:
+			return None
+		return stat.st_mtime_ns, stat.st_size
+
+	def read(self):
+		""" Parse the file, raise configparser.Error for a bad file.
+		"""
+
+		parser = configparser.ConfigParser(interpolation=None)
+		if self.path.exists():
+			parser.read(self.path, encoding='utf-8')
+		return parser
+
+	def get_parser(self):
+		""" Return parsed file, parse it if it has changed.
+		"""
+
+		version = self.get_version()
+		with self._lock:
+			if self._parser is None or version != self._version:
+				self._parser = self.read()
+				self._version = version
+				self._sections = {}
+			return self._parser
+
+	def sections(self):
+		""" Return names of all sections.
+		"""
+
+		return self.get_parser().sections()
+
+	def section(self, name):
+		""" Return read-only view of the section, empty if there is none.
+		"""
+
+		with self._lock:
+			parser = self.get_parser()
+			view = self._sections.get(name)
+			if view is None:
+				options = parser[name] if parser.has_section(name) else {}
+				view = self._sections[name] = ConfigSection(name, options)
+			return view
+
+	def update(self, name, options):
+		""" Set options of the section, keeping its other options.
+
+		The file is read again and written through a temporary file
+		holding the lock, so concurrent updates don't lose each other.
+		"""
+
+		self._modify(name, lambda section: section.update(options))
+
+	def remove_options(self, name, options):
+		""" Remove options of the section, keeping other options and
+		sections, like 'update'.
+		"""
+
+		def remove(section):
+			for option in options:
+				section.pop(option, None)
+
+		self._modify(name, remove)
+
+	def _modify(self, name, change):
+		""" Apply 'change' to the section read again and write the file.
+		"""
+
+		if self.lock_path is not None:
+			self.lock_path.parent.mkdir(parents=True, exist_ok=True)
+			lock = FileLock(self.lock_path)
+		else:
+			lock = contextlib.nullcontext()
+
+		with self._lock, lock:
+			parser = self.read()
+			if not parser.has_section(name):
+				parser.add_section(name)
+			change(parser[name])
+
+			tmp_path = self.path.with_name(
+				f'{self.path.name}.{os.getpid()}.tmp')
+			with open(tmp_path, 'w', encoding='utf-8') as configfile:
+				parser.write(configfile)
+			os.replace(tmp_path, self.path)
+
+			self._parser = parser
+			self._version = self.get_version()
+			self._sections = {}
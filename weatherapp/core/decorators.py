@@ -1,4 +1,7 @@
 import time
+import random
+
+from weatherapp.core.ratelimit import TokenBucket
 
 
 def one_moment(func):
@@ -12,13 +15,45 @@ def one_moment(func):
 def slow_down(sec=1):
 	""" Waits for a given number of seconds before calling function"""
 	def one_moment(func):
-		"" "Waits one second before calling function"""
+		""" Waits 'sec' seconds before calling function"""
 		def wrapper(*args, **kwargs):
-			time.sleep(1)
+			time.sleep(sec)
 			return func(*args, **kwargs)
 		return wrapper
 	return one_moment
 
+
+def rate_limit(rate=1, burst=1):
+	""" Allows 'rate' calls per second with 'burst' calls at once,
+	    waits only when the function is called more often
+	"""
+	def decorator(func):
+		bucket = TokenBucket(rate, burst)
+		def wrapper(*args, **kwargs):
+			bucket.acquire()
+			return func(*args, **kwargs)
+		wrapper.bucket = bucket
+		return wrapper
+	return decorator
+
+def retry(attempts=3, delay=0.5, max_delay=5, when=None):
+	""" Calls function again on errors, waiting exponentially longer
+	    random time between the attempts. 'when' decides which errors
+	    are worth another attempt
+	"""
+	def decorator(func):
+		def wrapper(*args, **kwargs):
+			for attempt in range(1, attempts + 1):
+				try:
+					return func(*args, **kwargs)
+				except Exception as exc:
+					if attempt >= attempts or (when and not when(exc)):
+						raise
+					backoff = min(max_delay, delay * 2 ** (attempt - 1))
+					time.sleep(random.uniform(backoff / 2, backoff))
+		return wrapper
+	return decorator
+
 def timer(func):
 	""" Print the runtime of the decorated function"""
 	def wrapper(*args, **kwargs):
@@ -10,7 +10,7 @@ class ProgramError(Command, Exception):
 
 
 	def run(self,data, module_name):
-		self.app.stdout.write(f'{self.name}, {module_name}: {data}\n')
+		self.app.messages.write(f'{self.name}, {module_name}: {data}\n')
 
 
 class WeatherProviderError(ProgramError):
@@ -23,7 +23,12 @@ class RequestError(WeatherProviderError):
 	name = 'RequestError'
 
 	def run(self, data, location):
-		self.app.stdout.write(f'{self.name}: {data}. Location = {location} ???\n')
+		self.app.messages.write(f'{self.name}: {data}. Location = {location} ???\n')
+
+
+class SiteUnavailableError(RequestError):
+
+	name = 'SiteUnavailableError'
 
 
 class ConfigParserError(WeatherProviderError):
@@ -31,7 +36,7 @@ class ConfigParserError(WeatherProviderError):
 	name = 'ConfigParserError'
 
 	def run(self, data, module_name):
-		self.app.stdout.write(f'{self.name}: {data} {module_name}\n')
+		self.app.messages.write(f'{self.name}: {data} {module_name}\n')
 				
 
 class AppRunError(ProgramError):
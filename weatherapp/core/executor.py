@@ -0,0 +1,87 @@
+""" Thread pool which doesn't keep the process alive.
+"""
+
+import queue
+import threading
+from concurrent.futures import Future
+
+
+class DaemonExecutor:
+
+	""" Thread pool of daemon threads with ThreadPoolExecutor interface.
+
+	Threads of ThreadPoolExecutor are joined at interpreter exit, so
+	a provider which hangs on a slow site keeps the application running
+	after its timeout. Daemon threads are dropped at exit instead.
+
+	:param max_workers: maximum number of threads
+	:type max_workers: int
+	"""
+
+	def __init__(self, max_workers):
+		self.max_workers = max(1, max_workers)
+		self._queue = queue.SimpleQueue()
+		self._threads = []
+		self._lock = threading.Lock()
+		self._shutdown = False
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exc_info):
+		self.shutdown(wait=True)
+
+	def submit(self, fn, *args, **kwargs):
+		""" Schedule the call and return its Future.
+		"""
+
+		future = Future()
+		with self._lock:
+			if self._shutdown:
+				raise RuntimeError('cannot schedule new futures after shutdown')
+			self._queue.put((future, fn, args, kwargs))
+			if len(self._threads) < self.max_workers:
+				thread = threading.Thread(target=self._work, daemon=True)
+				thread.start()
+				self._threads.append(thread)
+		return future
+
+	def _work(self):
+		while True:
+			item = self._queue.get()
+			if item is None:
+				return
+			future, fn, args, kwargs = item
+			if not future.set_running_or_notify_cancel():
+				continue
+			try:
+				result = fn(*args, **kwargs)
+			except BaseException as error:
+				future.set_exception(error)
+			else:
+				future.set_result(result)
+
+	def shutdown(self, wait=True, cancel_futures=False):
+		""" Stop threads when queued calls are done.
+
+		With 'cancel_futures' calls which are not started are cancelled,
+		without 'wait' running calls are left to finish on their own.
+		"""
+
+		with self._lock:
+			self._shutdown = True
+			if cancel_futures:
+				while True:
+					try:
+						item = self._queue.get_nowait()
+					except queue.Empty:
+						break
+					if item is not None:
+						item[0].cancel()
+			for _ in self._threads:
+				self._queue.put(None)
+			threads = list(self._threads)
+
+		if wait:
+			for thread in threads:
+				thread.join()
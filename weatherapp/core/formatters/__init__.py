@@ -1,3 +1,26 @@
-from weatherapp.core.formatters.table import TableFormatter
-from weatherapp.core.formatters.list import ListFormatter
-from weatherapp.core.formatters.csv import CsvFormatter
\ No newline at end of file
+""" Output formatters.
+
+Formatter modules are imported when they are used, so e.g. 'prettytable'
+is imported only for table output.
+"""
+
+import importlib
+
+
+_MODULES = {
+	'TableFormatter': 'table',
+	'ListFormatter': 'list',
+	'CsvFormatter': 'csv',
+	'JsonFormatter': 'json',
+	'NdjsonFormatter': 'json',
+}
+
+__all__ = ['TableFormatter', 'ListFormatter', 'CsvFormatter', 
+           'JsonFormatter', 'NdjsonFormatter']
+
+
+def __getattr__(name):
+	if name in _MODULES:
+		module = importlib.import_module(f'{__name__}.{_MODULES[name]}')
+		return getattr(module, name)
+	raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
@@ -1,42 +1,23 @@
+import csv
+
 from weatherapp.core.abstract import Formatter
 
 
 class CsvFormatter(Formatter):
 
-    """ CSV formatter for app output.
-    """
-
-
-    name = 'csv'
-
-    def emit(self, columns, data, argv):
-        """ Format and print data from the iterable source.
-
-        :param columns: names of the columns
-        :type columns: list
-        :param data: iterable data source, one tuple per object
-                     with values in order of column names
-        :type data: list or tuple
-        :param argv: remaining_args from parser
-        :type argv: str or int
-        """
+	""" CSV formatter for app output.
 
-        title = columns[0]
-        location = columns[1]
+	Values are quoted by the 'csv' module, so commas, quotes and line
+	breaks in them are kept.
+	"""
 
-        a = ' ' + title + ',' + location  
-        b = []
+	name = 'csv'
 
-        for key, value in data.items():
-        	if ' ' in value:
-        		value = '"' + value + '"'
-        	c = str(key + ',' + value)
-        	b.append(c)
+	def emit_rows(self, column_names, rows, stream):
+		""" Write the header row, then the rows one by one.
+		"""
 
-        b = str(b)
-        b = b.replace("',", "'\n")
-        b = b.replace("[", ' ')
-        b = b.replace("]", '')
-        b = b.replace("'", '')
-        return a + '\n' + b + '\n'
-       
+		writer = csv.writer(stream)
+		writer.writerow(column_names)
+		for row in rows:
+			writer.writerow(row)
@@ -0,0 +1,88 @@
+""" JSON formatters for machine consumers.
+
+Objects are serialized by 'orjson' when it is installed, otherwise by
+the standard 'json' module.
+"""
+
+import json
+from datetime import datetime, timezone
+
+try:
+	import orjson
+except ImportError:  # optional fast backend
+	orjson = None
+
+from weatherapp.core.abstract import Formatter
+from weatherapp.core.weatherinfo import normalize
+
+
+def dumps(obj):
+	""" Serialize object to one line of JSON text.
+	"""
+
+	if orjson is not None:
+		return orjson.dumps(obj).decode('utf-8')
+	return json.dumps(obj, ensure_ascii=False, separators=(',', ':'))
+
+
+def get_object(record):
+	""" Return JSON object of the weather record.
+
+	Info dicts of providers are normalized, so temperature, wind and
+	humidity are numbers.
+	"""
+
+	fetched = record.get('fetched')
+	if fetched is not None:
+		fetched = datetime.fromtimestamp(fetched, timezone.utc).isoformat(
+			                                               timespec='seconds')
+	return {
+		'provider': record['provider'],
+		'location': record['location'],
+		'day': record.get('day'),
+		'fetched': fetched,
+		'info': normalize(record['info']).as_dict(),
+	}
+
+
+class JsonFormatter(Formatter):
+
+	""" JSON formatter, writes one array of all providers and locations.
+	"""
+
+	name = 'json'
+	structured = True
+
+	def emit_rows(self, column_names, rows, stream):
+		""" Write info of provider 'column_names[0]' and location
+		'column_names[1]' from (name, value) rows.
+		"""
+
+		self.emit_records([{'provider': column_names[0], 
+		                    'location': column_names[1],
+		                    'info': dict(rows)}], stream)
+
+	def emit_records(self, records, stream):
+		""" Write records as array items one by one.
+		"""
+
+		separator = '[\n'
+		for record in records:
+			stream.write(separator + dumps(get_object(record)))
+			separator = ',\n'
+		stream.write('[]\n' if separator == '[\n' else '\n]\n')
+
+
+class NdjsonFormatter(JsonFormatter):
+
+	""" Newline delimited JSON formatter, writes one object per line.
+	"""
+
+	name = 'ndjson'
+
+	def emit_records(self, records, stream):
+		""" Write records one per line.
+		"""
+
+		for record in records:
+			stream.write(dumps(get_object(record)) + '\n')
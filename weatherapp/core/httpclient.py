@@ -0,0 +1,436 @@
+""" HTTP client shared by all weather providers.
+"""
+
+import io
+import time
+import zlib
+import base64
+import socket
+import logging
+import threading
+import http.client
+import urllib.error
+import urllib.request
+import email.utils
+from collections import OrderedDict
+from urllib.parse import urlsplit, urljoin, quote, unquote
+
+from weatherapp.core import config
+
+
+class HttpResponse:
+
+	""" Fully read response of the site.
+
+	'wire_bytes' is the size of the body as it was transferred, 
+	'decoded_bytes' is its size after decompression.
+	"""
+
+	def __init__(self, url, status, reason, headers, body, wire_bytes=None):
+		self.url = url
+		self.status = status
+		self.reason = reason
+		self.headers = headers
+		self.body = body
+		self.decoded_bytes = len(body)
+		self.wire_bytes = self.decoded_bytes if wire_bytes is None \
+		                  else wire_bytes
+
+	def read(self):
+		return self.body
+
+
+def get_freshness_lifetime(headers, now=None):
+	""" How long the response stays fresh by its headers(in seconds).
+
+	Uses 'Cache-Control' max-age, or 'Expires' compared with 'Date', and
+	subtracts 'Age'. Returns 0 for 'no-cache' and 'no-store' responses,
+	None when headers don't tell.
+	"""
+
+	cache_control = headers.get('Cache-Control') or ''
+	directives = {}
+	for directive in cache_control.split(','):
+		name, _, value = directive.strip().partition('=')
+		directives[name.lower()] = value.strip('"')
+
+	if 'no-store' in directives or 'no-cache' in directives:
+		return 0
+
+	lifetime = None
+	if 'max-age' in directives:
+		try:
+			lifetime = int(directives['max-age'])
+		except ValueError:
+			pass
+
+	if lifetime is None and headers.get('Expires'):
+		try:
+			expires = email.utils.parsedate_to_datetime(headers['Expires'])
+			date = headers.get('Date')
+			date = email.utils.parsedate_to_datetime(date).timestamp() \
+			       if date else (now or time.time())
+			lifetime = expires.timestamp() - date
+		except (TypeError, ValueError, IndexError):
+			# invalid 'Expires' means already expired
+			lifetime = 0
+
+	if lifetime is None:
+		return None
+
+	try:
+		age = int(headers.get('Age') or 0)
+	except ValueError:
+		age = 0
+	return max(0, lifetime - age)
+
+
+class ContentDecoder:
+
+	""" Streaming decoder of gzip and deflate encoded bodies.
+	"""
+
+	WBITS = {'gzip': 16 + zlib.MAX_WBITS,
+	         'x-gzip': 16 + zlib.MAX_WBITS,
+	         'deflate': zlib.MAX_WBITS}
+
+	def __init__(self, encoding):
+		self.encoding = (encoding or 'identity').strip().lower()
+		wbits = self.WBITS.get(self.encoding)
+		self._decompressor = wbits and zlib.decompressobj(wbits)
+		self._started = False
+
+	def decompress(self, chunk):
+		""" Decode next chunk of the body.
+		"""
+
+		if not self._decompressor:
+			return chunk
+
+		try:
+			data = self._decompressor.decompress(chunk)
+		except zlib.error:
+			if self.encoding != 'deflate' or self._started:
+				raise
+			# some servers send raw deflate stream without zlib header
+			self._decompressor = zlib.decompressobj(-zlib.MAX_WBITS)
+			data = self._decompressor.decompress(chunk)
+		self._started = True
+		return data
+
+	def flush(self):
+		""" Decode data left in the decoder.
+		"""
+
+		return self._decompressor.flush() if self._decompressor else b''
+
+
+class DnsCache:
+
+	""" Caches resolved addresses of the hosts for 'ttl' seconds.
+	"""
+
+	def __init__(self, ttl=config.DNS_CACHE_TIME):
+		self.ttl = ttl
+		self._addresses = {}
+		self._lock = threading.Lock()
+
+	def resolve(self, host, port):
+		""" Return list of socket addresses for host and port.
+		"""
+
+		key = (host, port)
+		with self._lock:
+			cached = self._addresses.get(key)
+		if cached and time.monotonic() - cached[0] < self.ttl:
+			return cached[1]
+
+		addresses = socket.getaddrinfo(host, port, 0, socket.SOCK_STREAM)
+		with self._lock:
+			self._addresses[key] = (time.monotonic(), addresses)
+		return addresses
+
+	def forget(self, host, port):
+		""" Drop cached addresses, e.g. when host stops answering.
+		"""
+
+		with self._lock:
+			self._addresses.pop((host, port), None)
+
+	def create_connection(self, address, 
+		                  timeout=socket._GLOBAL_DEFAULT_TIMEOUT,
+		                  source_address=None):
+		""" Same as 'socket.create_connection' but with cached addresses.
+		"""
+
+		host, port = address
+		error = None
+		for family, type_, proto, _, sockaddr in self.resolve(host, port):
+			sock = None
+			try:
+				sock = socket.socket(family, type_, proto)
+				if timeout is not socket._GLOBAL_DEFAULT_TIMEOUT:
+					sock.settimeout(timeout)
+				if source_address:
+					sock.bind(source_address)
+				sock.connect(sockaddr)
+				return sock
+			except OSError as exc:
+				error = exc
+				if sock is not None:
+					sock.close()
+
+		self.forget(host, port)
+		raise error or OSError(f'getaddrinfo returns an empty list for {host}')
+
+
+class HttpClient:
+
+	""" Keep-alive HTTP client with a bounded connection pool.
+
+	Idle connections are kept per host and reused by next requests to the
+	same site. No more than 'pool_size' connections are open at once, the
+	least recently used idle connection is closed to make room for a new
+	host.
+
+	Proxies are taken from 'http_proxy', 'https_proxy' and 'no_proxy'
+	environment variables like 'urlopen' does. Plain http requests are
+	forwarded by the proxy, https requests are tunneled through it.
+	"""
+
+	logger = logging.getLogger(__name__)
+
+	CONNECTION_CLASSES = {'http': http.client.HTTPConnection,
+	                      'https': http.client.HTTPSConnection}
+
+	REDIRECT_CODES = (301, 302, 303, 307, 308)
+
+	ACCEPT_ENCODING = 'gzip, deflate'
+
+	CHUNK_SIZE = 64 * 1024
+
+	def __init__(self, pool_size=config.HTTP_POOL_SIZE,
+		         timeout=config.REQUEST_TIMEOUT, dns_cache=None,
+		         rate_limiter=None, proxies=None):
+		self.pool_size = pool_size
+		self.timeout = timeout
+		self.dns_cache = dns_cache or DnsCache()
+		self.rate_limiter = rate_limiter
+		self.proxies = urllib.request.getproxies() if proxies is None \
+		               else proxies
+		self._idle = OrderedDict()
+		self._open = 0
+		self._condition = threading.Condition()
+
+	def get_proxy(self, scheme, host):
+		""" Return host, port and headers of the proxy for the site, None
+		if the site is connected directly.
+		"""
+
+		proxy = self.proxies.get(scheme)
+		if not proxy or \
+		   urllib.request.proxy_bypass_environment(host, self.proxies):
+			return None
+
+		parts = urlsplit(proxy if '://' in proxy else 'http://' + proxy)
+		headers = {}
+		if parts.username:
+			credentials = f'{unquote(parts.username)}:' \
+			              f'{unquote(parts.password or "")}'
+			headers['Proxy-Authorization'] = 'Basic ' + \
+				base64.b64encode(credentials.encode('utf-8')).decode('ascii')
+		return parts.hostname, parts.port or 80, headers
+
+	def _new_connection(self, scheme, host, port, proxy=None):
+		""" Create not connected connection to the host, or to the proxy
+		which tunnels https connections to the host.
+		"""
+
+		if proxy is None:
+			connection = self.CONNECTION_CLASSES[scheme](
+				                              host, port, timeout=self.timeout)
+		else:
+			proxy_host, proxy_port, proxy_headers = proxy
+			connection = self.CONNECTION_CLASSES[scheme](
+				                  proxy_host, proxy_port, timeout=self.timeout)
+			if scheme == 'https':
+				connection.set_tunnel(host, port, proxy_headers)
+		connection._create_connection = self.dns_cache.create_connection
+		return connection
+
+	def _acquire(self, key):
+		""" Take idle connection to the host or a free pool slot.
+
+		Returns a tuple of connection(None if the slot is free) and
+		flag if the connection was used before.
+		"""
+
+		with self._condition:
+			while True:
+				idle = self._idle.get(key)
+				if idle:
+					connection = idle.pop()
+					if not idle:
+						del self._idle[key]
+					return connection, True
+
+				if self._open < self.pool_size:
+					self._open += 1
+					return None, False
+
+				if self._idle:
+					# close connection to the least recently used host
+					other_key, other = next(iter(self._idle.items()))
+					other.pop(0).close()
+					if not other:
+						del self._idle[other_key]
+					return None, False
+
+				self._condition.wait()
+
+	def _release(self, key, connection, reusable):
+		""" Return connection to the pool or close it.
+		"""
+
+		with self._condition:
+			if reusable:
+				self._idle.setdefault(key, []).append(connection)
+				self._idle.move_to_end(key)
+			else:
+				if connection is not None:
+					connection.close()
+				self._open -= 1
+			self._condition.notify()
+
+	def _read_body(self, response):
+		""" Read and decompress response body chunk by chunk.
+
+		Returns tuple of decoded body and its size on the wire.
+		"""
+
+		decoder = ContentDecoder(response.getheader('Content-Encoding'))
+		if decoder.encoding not in decoder.WBITS and \
+		   decoder.encoding != 'identity':
+			self.logger.warning('Unsupported content encoding %r', 
+				                decoder.encoding)
+
+		chunks = []
+		wire_bytes = 0
+		while True:
+			chunk = response.read(self.CHUNK_SIZE)
+			if not chunk:
+				break
+			wire_bytes += len(chunk)
+			chunks.append(decoder.decompress(chunk))
+		chunks.append(decoder.flush())
+		return b''.join(chunks), wire_bytes
+
+	def _request(self, method, url, headers):
+		""" Send single request without following redirects.
+		"""
+
+		parts = urlsplit(url)
+		scheme = parts.scheme.lower()
+		if scheme not in self.CONNECTION_CLASSES:
+			raise urllib.error.URLError(f'unknown url type: {scheme}')
+
+		host = parts.hostname
+		port = parts.port or (443 if scheme == 'https' else 80)
+		path = quote(parts.path or '/', safe="/%:@!$&'()*+,;=-._~")
+		if parts.query:
+			path += '?' + parts.query
+		key = (scheme, host, port)
+
+		proxy = self.get_proxy(scheme, host)
+		if proxy is not None and scheme == 'http':
+			# proxy forwards requests with absolute url
+			path = f'http://{parts.netloc.rpartition("@")[2]}{path}'
+			headers = dict(headers, **proxy[2])
+
+		if self.rate_limiter:
+			delay = self.rate_limiter.acquire(host)
+			if delay:
+				self.logger.debug('Waited %.2f seconds for %s rate limit', 
+					              delay, host)
+
+		connection, reused = self._acquire(key)
+		while True:
+			if connection is None:
+				connection = self._new_connection(scheme, host, port, proxy)
+			try:
+				connection.request(method, path, headers=headers)
+				response = connection.getresponse()
+				body, wire_bytes = self._read_body(response)
+			except (http.client.RemoteDisconnected, ConnectionResetError,
+				    BrokenPipeError) as exc:
+				connection.close()
+				connection = None
+				if reused:
+					# keep-alive connection was closed by the server
+					reused = False
+					continue
+				self._release(key, None, False)
+				raise urllib.error.URLError(exc)
+			except (OSError, http.client.HTTPException, zlib.error) as exc:
+				self._release(key, connection, False)
+				raise urllib.error.URLError(exc)
+			break
+
+		self._release(key, connection, not response.will_close)
+		self.logger.debug('%s %s: %s, %s connection, %d bytes on the wire, '
+			              '%d bytes decoded', method, url, response.status, 
+			              'reused' if reused else 'new', wire_bytes, len(body))
+
+		return HttpResponse(url, response.status, response.reason,
+			                response.msg, body, wire_bytes)
+
+	def request(self, method, url, headers=None):
+		""" Send request and follow redirects.
+
+		:param method: HTTP method
+		:type method: str
+		:param url: site address
+		:type url: str
+		:param headers: request headers
+		:type headers: dict
+		"""
+
+		headers = dict(headers or {})
+		if not any(name.lower() == 'accept-encoding' for name in headers):
+			headers['Accept-Encoding'] = self.ACCEPT_ENCODING
+
+		for _ in range(config.HTTP_MAX_REDIRECTS + 1):
+			response = self._request(method, url, headers)
+			location = response.headers.get('Location')
+			if response.status not in self.REDIRECT_CODES or not location:
+				break
+			url = urljoin(url, location)
+		else:
+			raise urllib.error.HTTPError(url, response.status,
+				                         'Too many redirects',
+				                         response.headers, None)
+
+		if response.status >= 400:
+			raise urllib.error.HTTPError(url, response.status,
+				                         response.reason, response.headers,
+				                         io.BytesIO(response.body))
+
+		return response
+
+	def get(self, url, headers=None):
+		""" Send GET request.
+		"""
+
+		return self.request('GET', url, headers)
+
+	def close(self):
+		""" Close all idle connections.
+		"""
+
+		with self._condition:
+			for connections in self._idle.values():
+				for connection in connections:
+					connection.close()
+					self._open -= 1
+			self._idle.clear()
+			self._condition.notify_all()
@@ -1,3 +1,4 @@
 from weatherapp.core.managers.commandmanager import CommandManager
 from weatherapp.core.managers.providermanager import ProviderManager
-from weatherapp.core.managers.formattermanager import FormatterManager
\ No newline at end of file
+from weatherapp.core.managers.formattermanager import FormatterManager
+from weatherapp.core.managers.cachemanager import CacheManager
\ No newline at end of file
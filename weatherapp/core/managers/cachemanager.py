@@ -0,0 +1,11 @@
+from weatherapp.core.managers import commandmanager
+
+
+class CacheManager(commandmanager.CommandManager):
+	""" Manager for app cache stores.
+	"""
+
+	COMMANDS = {
+		'file': 'weatherapp.core.caches.file:FileCache',
+		'sqlite': 'weatherapp.core.caches.sqlite:SqliteCache',
+	}
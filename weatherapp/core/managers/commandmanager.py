@@ -1,22 +1,58 @@
+import importlib
+
 from weatherapp.core.abstract import Manager
 
-from weatherapp.core.commands import Configurate, Providers, ClearCacheDir
+
+class LazyCommand:
+
+	""" Command which is not imported yet.
+
+	:param name: command name
+	:type name: str
+	:param value: object reference, 'module:attribute'
+	:type value: str
+	"""
+
+	def __init__(self, name, value):
+		self.name = name
+		self.value = value
+
+	def load(self):
+		""" Import the command class.
+		"""
+
+		module_name, _, attributes = self.value.partition(':')
+		command = importlib.import_module(module_name.strip())
+		for attribute in filter(None, attributes.strip().split('.')):
+			command = getattr(command, attribute)
+		return command
 
 
 class CommandManager(Manager):
 	""" Manager for app commands.
+
+	Commands are registered by name and imported on first access, so
+	the application starts without importing all of them.
 	"""
 
+	COMMANDS = {
+		'configurate': 'weatherapp.core.commands.configurate:Configurate',
+		'providers': 'weatherapp.core.commands.providers:Providers',
+		'clear_cache': 'weatherapp.core.commands.clearcachedir:ClearCacheDir',
+		'cache': 'weatherapp.core.commands.cachestats:CacheStats',
+		'prefetch': 'weatherapp.core.commands.prefetch:Prefetch',
+	}
+
 	def __init__(self):
 		self._commands = {}
 		self._load_commands()
 
 	def _load_commands(self):
-		""" Loads all external (from an entrypoints)commands.
+		""" Registers all commands without importing them.
 		"""
 
-		for command in [Configurate, Providers, ClearCacheDir]:
-		    self.add(command.name, command)
+		for name, value in self.COMMANDS.items():
+		    self.add(name, LazyCommand(name, value))
 
 	def add(self, name, command):
 		""" Registers command under specified name.
@@ -30,10 +66,13 @@ class CommandManager(Manager):
 		self._commands[name] = command
 
 	def get(self, name):
-		""" Get provider by name.
+		""" Get command by name, import it on first access.
 		"""
 
-		return self._commands.get(name, None)
+		command = self._commands.get(name, None)
+		if isinstance(command, LazyCommand):
+			command = self._commands[name] = command.load()
+		return command
 
 	def __len__(self):
 		return len(self._commands)
@@ -42,9 +81,10 @@ class CommandManager(Manager):
 		return name in self._commands
 
 	def __getitem__(self, name):
-		return self._commands[name]
+		if name not in self._commands:
+			raise KeyError(name)
+		return self.get(name)
 
 	def __iter__(self):
-		for key, value in self._commands.items():
-			yield key, value
-
+		for key in list(self._commands):
+			yield key, self.get(key)
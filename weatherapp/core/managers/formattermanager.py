@@ -1,21 +1,14 @@
-from weatherapp.core.abstract import Manager
-
 from weatherapp.core.managers import commandmanager
-from weatherapp.core.formatters import (TableFormatter, 
-	                                    ListFormatter, 
-	                                    CsvFormatter)
 
 
 class FormatterManager(commandmanager.CommandManager):
 	""" Manager for app formatters.
 	"""
 
-
-	def _load_commands(self):
-		""" Loads all availble formatters.
-		"""
-
-		for command in [TableFormatter, ListFormatter, CsvFormatter]:
-		    self.add(command.name, command)
-
-	
\ No newline at end of file
+	COMMANDS = {
+		'table': 'weatherapp.core.formatters.table:TableFormatter',
+		'list': 'weatherapp.core.formatters.list:ListFormatter',
+		'csv': 'weatherapp.core.formatters.csv:CsvFormatter',
+		'json': 'weatherapp.core.formatters.json:JsonFormatter',
+		'ndjson': 'weatherapp.core.formatters.json:NdjsonFormatter',
+	}
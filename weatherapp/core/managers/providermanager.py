@@ -1,23 +1,148 @@
+import os
+import sys
+import site
+import json
 import logging
-import pkg_resources
 
 from weatherapp.core import config
+from weatherapp.core.abstract import Command
 from weatherapp.core.managers import commandmanager
+from weatherapp.core.managers.commandmanager import LazyCommand
+
 
 class ProviderManager(commandmanager.CommandManager):
 	""" Discovers registered providers and loads them from an entrypoint.
+
+	Providers are imported only when they are accessed. Discovered entry
+	points are saved in the cache directory and scanned again only when
+	installed distributions change, e.g. a package is installed.
 	"""
 
 	logger = logging.getLogger(__name__)
 
 	def _load_commands(self):
-		""" Loads all existing providers.
+		""" Registers all existing providers without importing them.
+		"""
+
+		for name, value in self.get_entry_points().items():
+			self.logger.debug('found provider %r', name)
+			self._commands[name] = LazyCommand(name, value)
+
+	@staticmethod
+	def get_index_path():
+		""" File with saved entry points of providers.
+		"""
+
+		return Command.get_cache_directory() / config.PROVIDER_INDEX_FILE
+
+	@staticmethod
+	def get_index_key():
+		""" Return key of installed distributions.
+
+		Installing or removing a package changes modification time of
+		its site-packages directory, where .pth files of editable installs
+		are kept too. Other 'sys.path' directories, e.g. the current one,
+		are keyed only by entry points files of distributions in them, so
+		changes of other files don't make providers scanned again.
+		"""
+
+		site_dirs = {*site.getsitepackages(), site.getusersitepackages()}
+		key = [sys.version]
+		for path in sys.path:
+			if not path:
+				# the current directory of the script
+				continue
+			if path in site_dirs or \
+			   os.path.basename(path) in ('site-packages', 'dist-packages'):
+				files = [path]
+			else:
+				files = ProviderManager.get_metadata_files(path)
+			for file_path in files:
+				try:
+					key.append([file_path, os.stat(file_path).st_mtime_ns])
+				except OSError:
+					continue
+		return key
+
+	@staticmethod
+	def get_metadata_files(path):
+		""" Return entry points files of distributions in the directory.
+		"""
+
+		try:
+			with os.scandir(path) as entries:
+				return [os.path.join(entry.path, 'entry_points.txt')
+				        for entry in entries
+				        if entry.name.endswith(('.dist-info', '.egg-info'))]
+		except OSError:
+			return []
+
+	@staticmethod
+	def scan_entry_points():
+		""" Return provider entry points of installed distributions.
 		"""
 
-		entry_points = pkg_resources.iter_entry_points(
-			                         config.PROVIDER_EP_NAMESPACE)
-		for entry_point in entry_points:
-			self.logger.debug('found provider %r', entry_point.name)
-			self._commands[entry_point.name] = entry_point.load()
+		# slow to import, needed only when installed packages change
+		from importlib import metadata
+
+		try:
+			entry_points = metadata.entry_points(
+				group=config.PROVIDER_EP_NAMESPACE)
+		except TypeError:
+			# before python 3.10 entry points are grouped in a dict
+			entry_points = metadata.entry_points().get(
+				config.PROVIDER_EP_NAMESPACE, [])
+		return {entry_point.name: entry_point.value
+		        for entry_point in entry_points}
+
+	def get_entry_points(self):
+		""" Return provider entry points, saved ones if they are actual.
+		"""
+
+		index_path = self.get_index_path()
+		key = self.get_index_key()
+		try:
+			with open(index_path, encoding='utf-8') as index_file:
+				index = json.load(index_file)
+			if index['key'] == key:
+				return index['entry_points']
+		except (OSError, ValueError, KeyError, TypeError):
+			pass
+
+		entry_points = self.scan_entry_points()
+		try:
+			index_path.parent.mkdir(parents=True, exist_ok=True)
+			tmp_path = index_path.with_name(
+				f'{index_path.name}.{os.getpid()}.tmp')
+			with open(tmp_path, 'w', encoding='utf-8') as index_file:
+				json.dump({'key': key, 'entry_points': entry_points},
+					      index_file)
+			os.replace(tmp_path, index_path)
+		except OSError:
+			self.logger.debug('Providers index is not saved', exc_info=True)
+
+		return entry_points
+
+	def get(self, name):
+		""" Get provider by name, import it on first access.
+
+		Returns None if there is no provider or it can't be imported.
+		"""
+
+		try:
+			return super().get(name)
+		except Exception:
+			self.logger.exception('Provider %s can not be imported', name)
+			return None
+
+	def __getitem__(self, name):
+		provider = self.get(name)
+		if provider is None:
+			raise KeyError(name)
+		return provider
 
-	
+	def __iter__(self):
+		for name in list(self._commands):
+			provider = self.get(name)
+			if provider is not None:
+				yield name, provider
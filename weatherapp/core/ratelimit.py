@@ -0,0 +1,94 @@
+""" Rate limiting of requests to weather sites.
+"""
+
+import time
+import threading
+
+from weatherapp.core import config
+
+
+class TokenBucket:
+
+	""" Token bucket with 'rate' tokens per second and 'burst' capacity.
+
+	Calls take one token each and wait only when the bucket is empty.
+	"""
+
+	def __init__(self, rate=config.RATE_LIMIT, burst=config.RATE_BURST):
+		self.rate = float(rate)
+		self.burst = max(1, int(burst))
+		self._tokens = float(self.burst)
+		self._updated = time.monotonic()
+		self._lock = threading.Lock()
+
+	def reserve(self):
+		""" Take one token and return how long to wait for it(in seconds).
+		"""
+
+		with self._lock:
+			now = time.monotonic()
+			self._tokens = min(self.burst,
+				               self._tokens + (now - self._updated) * self.rate)
+			self._updated = now
+			self._tokens -= 1
+			if self._tokens >= 0 or self.rate <= 0:
+				return 0
+			return -self._tokens / self.rate
+
+	def acquire(self):
+		""" Wait until the call fits in the budget.
+		"""
+
+		delay = self.reserve()
+		if delay:
+			time.sleep(delay)
+		return delay
+
+
+class RateLimiter:
+
+	""" Token buckets per host shared by all providers.
+	"""
+
+	def __init__(self, rate=config.RATE_LIMIT, burst=config.RATE_BURST):
+		self.rate = rate
+		self.burst = burst
+		self._buckets = {}
+		self._lock = threading.Lock()
+
+	def configure(self, host, rate=None, burst=None):
+		""" Set rate and burst for the host.
+
+		:param host: site host name
+		:type host: str
+		:param rate: allowed requests per second
+		:type rate: float
+		:param burst: how many requests may be sent at once
+		:type burst: int
+		"""
+
+		bucket = TokenBucket(self.rate if rate is None else rate,
+			                 self.burst if burst is None else burst)
+		with self._lock:
+			current = self._buckets.get(host)
+			# keep spent tokens if the same limit is set again
+			if current is None or (current.rate, current.burst) != \
+			                      (bucket.rate, bucket.burst):
+				self._buckets[host] = bucket
+
+	def get_bucket(self, host):
+		""" Return token bucket of the host.
+		"""
+
+		with self._lock:
+			bucket = self._buckets.get(host)
+			if bucket is None:
+				bucket = self._buckets[host] = TokenBucket(self.rate,
+					                                       self.burst)
+			return bucket
+
+	def acquire(self, host):
+		""" Wait until request to the host fits in its budget.
+		"""
+
+		return self.get_bucket(host).acquire()
@@ -0,0 +1,164 @@
+""" Coalescing of identical calls made at the same time.
+"""
+
+import os
+import time
+import threading
+
+try:
+	import fcntl
+except ImportError:  # not available on Windows
+	fcntl = None
+
+
+class _Call:
+
+	""" Call in flight, other callers wait for its result.
+	"""
+
+	def __init__(self):
+		self.done = threading.Event()
+		self.result = None
+		self.error = None
+
+
+class SingleFlight:
+
+	""" Runs only one call per key at a time.
+
+	Callers which come while the call with the same key is in flight
+	don't run it again, they wait and get the result of the first call.
+	"""
+
+	def __init__(self):
+		self._calls = {}
+		self._lock = threading.Lock()
+
+	def do(self, key, func, *args, **kwargs):
+		""" Run 'func' or wait for the same call in flight.
+
+		:param key: call key, e.g. url hash
+		:type key: str
+		:param func: function to call
+		:type func: callable
+		"""
+
+		with self._lock:
+			call = self._calls.get(key)
+			leader = call is None
+			if leader:
+				call = self._calls[key] = _Call()
+
+		if not leader:
+			call.done.wait()
+			if call.error is not None:
+				raise call.error
+			return call.result
+
+		try:
+			call.result = func(*args, **kwargs)
+		except BaseException as exc:
+			call.error = exc
+			raise
+		finally:
+			with self._lock:
+				del self._calls[key]
+			call.done.set()
+
+		return call.result
+
+
+class FileLock:
+
+	""" Exclusive lock shared between processes through a lock file.
+
+	Lock files may be removed by 'remove_if_free', so the lock is taken
+	again if the file was removed while it was awaited. Does nothing
+	where 'fcntl' is not available.
+	"""
+
+	def __init__(self, path):
+		self.path = path
+		self._fd = None
+
+	def _is_current(self, fd):
+		""" Check if the descriptor is of the file at the lock path.
+		"""
+
+		try:
+			stat = os.stat(self.path)
+		except FileNotFoundError:
+			return False
+		fd_stat = os.fstat(fd)
+		return (stat.st_dev, stat.st_ino) == (fd_stat.st_dev, fd_stat.st_ino)
+
+	def acquire(self):
+		while True:
+			fd = os.open(self.path, os.O_CREAT | os.O_RDWR, 0o644)
+			if not fcntl:
+				break
+			fcntl.flock(fd, fcntl.LOCK_EX)
+			if self._is_current(fd):
+				break
+			os.close(fd)
+		self._fd = fd
+
+	def remove_if_free(self):
+		""" Remove the lock file unless somebody holds it.
+
+		Returns True if the file was removed.
+		"""
+
+		try:
+			fd = os.open(self.path, os.O_RDWR)
+		except FileNotFoundError:
+			return False
+		try:
+			if fcntl:
+				try:
+					fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+				except BlockingIOError:
+					return False
+			if not self._is_current(fd):
+				return False
+			os.remove(self.path)
+			return True
+		finally:
+			os.close(fd)
+
+	def release(self):
+		if self._fd is not None:
+			if fcntl:
+				fcntl.flock(self._fd, fcntl.LOCK_UN)
+			os.close(self._fd)
+			self._fd = None
+
+	def __enter__(self):
+		self.acquire()
+		return self
+
+	def __exit__(self, *exc_info):
+		self.release()
+
+
+def remove_stale_locks(directory, max_age, now=None):
+	""" Remove lock files of the directory which are older than 'max_age'
+	seconds and not held now.
+
+	Returns number of removed files.
+	"""
+
+	now = now or time.time()
+	removed = 0
+	try:
+		paths = list(directory.glob('*.lock'))
+	except OSError:
+		return 0
+	for path in paths:
+		try:
+			if now - path.stat().st_mtime < max_age:
+				continue
+		except FileNotFoundError:
+			continue
+		removed += FileLock(path).remove_if_free()
+	return removed
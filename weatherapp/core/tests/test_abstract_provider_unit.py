@@ -1,15 +1,99 @@
+import io
 import os
 import time
 import hashlib
 import urllib
 import unittest
+import tempfile
+import threading
+import argparse
 import configparser
+from unittest import mock
 from pathlib import Path
 from shutil import rmtree
 from urllib.request import urlopen, Request
 
 
+from weatherapp.core import config
 from weatherapp.core.abstract import WeatherProvider
+from weatherapp.core.httpclient import HttpResponse
+from weatherapp.core.ratelimit import RateLimiter
+from weatherapp.core.caches import SqliteCache
+from weatherapp.core.singleflight import FileLock
+from weatherapp.core.exception import RequestError, SiteUnavailableError
+from weatherapp.core.configservice import ConfigSection, ConfigService
+
+
+class DummyHttpClient:
+	""" Http client which returns prepared responses.
+	"""
+
+	def __init__(self, *responses, delay=0):
+		self.responses = list(responses)
+		self.requests = []
+		self.delay = delay
+
+	def get(self, url, headers=None):
+		self.requests.append(headers)
+		time.sleep(self.delay)
+		response = self.responses.pop(0)
+		if isinstance(response, Exception):
+			raise response
+		return response
+
+
+class UrlHttpClient(DummyHttpClient):
+	""" Http client which answers with the last part of the url.
+	"""
+
+	def get(self, url, headers=None):
+		self.requests.append(url)
+		return HttpResponse(url, 200, 'OK', {}, 
+			                url.rsplit('/', 1)[-1].encode('utf-8'))
+
+
+class DummyApp:
+	""" Application stub for providers.
+	"""
+
+	def __init__(self, http_client, refresh=False, cache=None):
+		self.http_client = http_client
+		self.cache = cache
+		self.rate_limiter = RateLimiter()
+		self.options = argparse.Namespace(refresh=refresh, debug=False,
+			                              tomorrow=False)
+		self.messages = io.StringIO()
+
+
+class DummyProvider(WeatherProvider):
+	""" Concrete provider for abstract methods tests.
+	"""
+
+	name = 'dummy'
+	title = 'Dummy'
+
+	def get_name(self):
+		return self.name
+
+	def get_default_location(self):
+		return 'Kyiv'
+
+	def get_default_url(self):
+		return 'http://dummy/kyiv'
+
+	def configurate(self):
+		pass
+
+	parsed = 0
+
+	def get_weather_info(self, content):
+		DummyProvider.parsed += 1
+		return {'temp': content}
+
+	def _get_configuration(self):
+		self.settings = ConfigSection(self.name, {'rate-limit': '5', 
+			                                      'rate-burst': '2'})
+		return self.get_default_location(), self.get_default_url()
 
 
 class ProviderAbstractTestCase(unittest.TestCase):
@@ -117,6 +201,23 @@ class ProviderAbstractTestCase(unittest.TestCase):
 
 		os.remove(config_path)
 
+	def test_configuration_service(self):
+		""" Test location is saved and read through the configuration
+		service of the application.
+		"""
+
+		with tempfile.TemporaryDirectory() as config_dir:
+			app = DummyApp(DummyHttpClient())
+			app.configuration = ConfigService(Path(config_dir) / 'config')
+			provider = DummyProvider(app)
+
+			provider.save_configuration('Lviv', 'http://dummy/lviv')
+			app.configuration.update('dummy', {'rate-limit': '3'})
+			name, url = WeatherProvider._get_configuration(provider)
+
+		self.assertEqual((name, url), ('Lviv', 'http://dummy/lviv'))
+		self.assertEqual(provider.settings.getfloat('rate-limit'), 3)
+
 	def test_clear_not_valid_cache(self):
 		""" Test 'clear_not_valid_cache' method.
 		"""
@@ -148,6 +249,435 @@ class ProviderAbstractTestCase(unittest.TestCase):
 
 		self.assertEqual(n, 1)
 		
+	def test_configure_rate_limit(self):
+		""" Test provider sets rate limit of its site.
+		"""
+
+		provider = DummyProvider(DummyApp(None))
+		bucket = provider.app.rate_limiter.get_bucket('dummy')
+
+		self.assertEqual(bucket.rate, 5)
+		self.assertEqual(bucket.burst, 2)
+
+
+class ProviderCacheTestCase(unittest.TestCase):
+
+	""" Unit test case for provider page cache.
+	"""
+
+	def setUp(self):
+		self.cache_dir = tempfile.TemporaryDirectory()
+		patcher = mock.patch.object(DummyProvider, 'get_cache_directory',
+			                        return_value=Path(self.cache_dir.name))
+		patcher.start()
+		self.addCleanup(patcher.stop)
+		self.addCleanup(self.cache_dir.cleanup)
+		self.cache = SqliteCache(Path(self.cache_dir.name))
+		self.url = 'http://dummy/kyiv'
+
+	def get_provider(self, *responses, refresh=False):
+		return DummyProvider(DummyApp(DummyHttpClient(*responses), refresh,
+			                          self.cache))
+
+	def expire(self, provider, url, age=1000):
+		""" Make cache of the url older than cache time.
+		"""
+
+		self.cache.touch(provider.get_url_hash(url), time.time() - age)
+
+	def test_save_cache_validators(self):
+		""" Test 'save_cache' keeps ETag and Last-Modified headers.
+		"""
+
+		provider = self.get_provider()
+		provider.save_cache(self.url, b'page', {'ETag': '"v1"', 
+			                                    'Server': 'dummy'})
+
+		self.assertEqual(provider.get_cache(self.url), b'page')
+		self.assertEqual(provider.get_cache_validators(self.url), 
+			             {'ETag': '"v1"'})
+
+	def test_cache_ttl(self):
+		""" Test cache time is set by provider options and headers.
+		"""
+
+		provider = self.get_provider()
+		headers = {'Cache-Control': 'max-age=3600'}
+		self.assertEqual(provider.get_cache_ttl(self.url, headers), 
+			             config.CACH_TIME)
+
+		provider.settings = ConfigSection('dummy', {'cache-ttl': '900'})
+		self.assertEqual(provider.get_cache_ttl(self.url), 900)
+
+		provider.settings = ConfigSection('dummy', {'cache-ttl': '900', 
+			                                        'cache-ttl-headers': 'yes'})
+		self.assertEqual(provider.get_cache_ttl(self.url, headers), 3600)
+		self.assertEqual(provider.get_cache_ttl(self.url, {}), 900)
+		self.assertEqual(provider.get_cache_ttl(
+			self.url, {'Cache-Control': 'no-store'}), config.CACHE_TTL_MIN)
+
+		provider.save_cache(self.url, b'page', headers)
+		entry = provider.get_cache_entry(self.url)
+		self.assertEqual(entry.ttl, 3600)
+		self.assertGreaterEqual(entry.keep_until - entry.fetched, 
+			                    3600 + config.CACHE_STALE_TIME)
+
+	def test_cache_lookups(self):
+		""" Test pages found in cache are counted as hits.
+		"""
+
+		provider = self.get_provider(HttpResponse(self.url, 200, 'OK', {}, 
+			                                      b'page'))
+		provider.get_page_source(self.url)
+		provider.get_page_source(self.url)
+		stats = self.cache.stats()
+
+		self.assertEqual((stats['hits'], stats['misses']), (1, 1))
+		self.assertEqual(provider.get_cache_entry(self.url).provider, 
+			             provider.get_name())
+
+	def test_revalidate_not_modified(self):
+		""" Test expired cache is reused when the page is not modified.
+		"""
+
+		provider = self.get_provider(
+			HttpResponse(self.url, 304, 'Not Modified', {}, b''))
+		provider.save_cache(self.url, b'page', 
+			                {'ETag': '"v1"', 
+			                 'Last-Modified': 'Mon, 01 Jan 2024 00:00:00 GMT'})
+		self.expire(provider, self.url)
+		self.assertFalse(provider.get_cache(self.url))
+
+		page = provider.get_page_source(self.url)
+
+		self.assertEqual(page, 'page')
+		self.assertEqual(provider.app.http_client.requests[0]['If-None-Match'],
+			             '"v1"')
+		self.assertIn('If-Modified-Since', 
+			          provider.app.http_client.requests[0])
+		self.assertEqual(provider.get_cache(self.url), b'page')
+
+	def test_revalidate_modified(self):
+		""" Test expired cache is replaced when the page is modified.
+		"""
+
+		provider = self.get_provider(
+			HttpResponse(self.url, 200, 'OK', {'ETag': '"v2"'}, b'new'))
+		provider.save_cache(self.url, b'page', {'ETag': '"v1"'})
+		self.expire(provider, self.url)
+
+		self.assertEqual(provider.get_page_source(self.url), 'new')
+		self.assertEqual(provider.get_cache_validators(self.url), 
+			             {'ETag': '"v2"'})
+
+	def test_refresh_skips_revalidation(self):
+		""" Test '--refresh' downloads the whole page.
+		"""
+
+		provider = self.get_provider(
+			HttpResponse(self.url, 200, 'OK', {}, b'new'), refresh=True)
+		provider.save_cache(self.url, b'page', {'ETag': '"v1"'})
+
+		self.assertEqual(provider.get_page_source(self.url), 'new')
+		self.assertNotIn('If-None-Match', 
+			             provider.app.http_client.requests[0])
+		self.assertEqual(provider.get_cache_validators(self.url), {})
+
+	def test_stale_while_revalidate(self):
+		""" Test stale cache is shown and refreshed in background.
+		"""
+
+		provider = self.get_provider(
+			HttpResponse(self.url, 200, 'OK', {}, b'new'))
+		provider.save_cache(self.url, b'page')
+		self.expire(provider, self.url, age=400)
+
+		self.assertEqual(provider.get_page_source(self.url), 'page')
+		for thread in threading.enumerate():
+			if thread.name == f'refresh {self.url}':
+				thread.join()
+
+		self.assertEqual(provider.get_cache(self.url), b'new')
+
+	def test_fetch_page_source_once(self):
+		""" Test same page requested at the same time is downloaded once.
+		"""
+
+		http_client = DummyHttpClient(
+			HttpResponse(self.url, 200, 'OK', {}, b'page'), delay=0.2)
+		providers = [DummyProvider(DummyApp(http_client, cache=self.cache)) 
+		             for _ in range(3)]
+		pages = []
+
+		threads = [threading.Thread(
+			           target=lambda p: pages.append(p.get_page_source(self.url)),
+			           args=(provider,)) 
+		           for provider in providers]
+		for thread in threads:
+			thread.start()
+		for thread in threads:
+			thread.join()
+
+		self.assertEqual(len(http_client.requests), 1)
+		self.assertEqual(pages, ['page'] * 3)
+
+	def test_lock_other_urls(self):
+		""" Test download lock of one url doesn't hold other urls.
+		"""
+
+		provider = self.get_provider()
+		lock_path = provider.get_lock_path(self.url)
+		other_path = next(provider.get_lock_path(f'http://dummy/{number}') 
+		                  for number in range(1000) 
+		                  if provider.get_url_hash(f'http://dummy/{number}')[:2]
+		                     == provider.get_url_hash(self.url)[:2])
+
+		self.assertNotEqual(lock_path, other_path)
+		with FileLock(lock_path):
+			acquired = threading.Event()
+
+			def take():
+				with FileLock(other_path):
+					acquired.set()
+
+			threading.Thread(target=take).start()
+			self.assertTrue(acquired.wait(1))
+
+	def unavailable(self, url):
+		return urllib.error.HTTPError(url, 503, 'Service Unavailable', {}, 
+			                          None)
+
+	@mock.patch.object(config, 'RETRY_DELAY', 0.01)
+	@mock.patch.object(DummyProvider, 'reset_location')
+	def test_retry_transient_error(self, reset_location):
+		""" Test transient errors are retried without reconfiguration.
+		"""
+
+		provider = self.get_provider(
+			self.unavailable(self.url),
+			HttpResponse(self.url, 200, 'OK', {}, b'page'))
+
+		self.assertEqual(provider.get_page_source(self.url), 'page')
+		self.assertEqual(len(provider.app.http_client.requests), 2)
+		self.assertFalse(provider.get_circuit_breaker().is_open())
+		reset_location.assert_not_called()
+
+	@mock.patch.object(config, 'RETRY_DELAY', 0.01)
+	@mock.patch.object(config, 'RETRY_ATTEMPTS', 1)
+	@mock.patch.object(DummyProvider, 'reset_location')
+	def test_circuit_breaker(self, reset_location):
+		""" Test site is not requested after too many failures.
+		"""
+
+		responses = [self.unavailable(self.url)] * config.CIRCUIT_FAILURES
+		provider = self.get_provider(*responses)
+		for _ in responses:
+			with self.assertRaises(urllib.error.HTTPError):
+				provider.fetch_page_source(self.url)
+
+		with self.assertRaises(SiteUnavailableError):
+			provider.get_page_source(self.url)
+
+		self.assertEqual(len(provider.app.http_client.requests), 
+			             config.CIRCUIT_FAILURES)
+		self.assertTrue(provider.get_circuit_breaker().is_open())
+		reset_location.assert_not_called()
+
+	@mock.patch.object(config, 'RETRY_DELAY', 0.01)
+	@mock.patch.object(config, 'RETRY_ATTEMPTS', 1)
+	def test_transient_error(self):
+		""" Test transient failure raises SiteUnavailableError naming
+		the location.
+		"""
+
+		provider = self.get_provider(self.unavailable(self.url))
+		provider.url = self.url
+
+		with self.assertRaises(SiteUnavailableError):
+			provider.get_page_source(self.url)
+
+		self.assertIn('Location = Kyiv', provider.app.messages.getvalue())
+
+	def test_not_found_error(self):
+		""" Test not found page resets only the saved location.
+		"""
+
+		provider = self.get_provider(
+			urllib.error.HTTPError(self.url, 404, 'Not Found', {}, None))
+		config_dir = tempfile.TemporaryDirectory()
+		self.addCleanup(config_dir.cleanup)
+		configuration = ConfigService(Path(config_dir.name) / 'config')
+		provider.app.configuration = configuration
+		provider.save_configuration('Lviv', self.url)
+		configuration.update('dummy', {'rate-limit': '3'})
+		configuration.update('App', {'log-level': '10'})
+		provider.url = self.url
+
+		with self.assertRaises(RequestError):
+			provider.get_page_source(self.url)
+
+		self.assertEqual(len(provider.app.http_client.requests), 1)
+		self.assertEqual(dict(configuration.section('dummy')), 
+			             {'rate-limit': '3'})
+		self.assertEqual(dict(configuration.section('App')), 
+			             {'log-level': '10'})
+
+	def test_weather_info_cache(self):
+		""" Test warm run skips both download and parsing.
+		"""
+
+		DummyProvider.parsed = 0
+		provider = self.get_provider(
+			HttpResponse(self.url, 200, 'OK', {}, b'+12'))
+
+		self.assertEqual(provider.run([]), {'temp': '+12'})
+		self.assertEqual(self.get_provider().run([]), {'temp': '+12'})
+		self.assertEqual(DummyProvider.parsed, 1)
+
+		provider = self.get_provider()
+		provider.app.options.tomorrow = True
+		self.assertEqual(provider.run([]), {'temp': '+12'})
+		self.assertEqual(DummyProvider.parsed, 2)
+
+	def test_weather_info_cache_page_not_read(self):
+		""" Test warm run checks the page hash without reading the page.
+		"""
+
+		provider = self.get_provider(
+			HttpResponse(self.url, 200, 'OK', {}, b'+12'))
+		provider.run([])
+		page_key = provider.get_url_hash(self.url)
+
+		with mock.patch.object(self.cache, 'get', 
+			                   wraps=self.cache.get) as get:
+			self.assertEqual(self.get_provider().run([]), {'temp': '+12'})
+
+		self.assertTrue(get.call_args_list)
+		self.assertTrue(all(call.args[1:] == (False,) 
+			                for call in get.call_args_list 
+			                if call.args[0] == page_key))
+
+	def test_prefetch(self):
+		""" Test prefetch downloads missing and soon expiring pages only.
+		"""
+
+		DummyProvider.parsed = 0
+		provider = self.get_provider(
+			HttpResponse(self.url, 200, 'OK', {}, b'+12'),
+			HttpResponse(self.url, 200, 'OK', {}, b'+15'))
+
+		provider.prefetch(self.url)
+		provider.prefetch(self.url)
+		self.assertEqual(len(provider.app.http_client.requests), 1)
+		self.assertEqual(DummyProvider.parsed, 1)
+
+		self.expire(provider, self.url, age=config.CACH_TIME - 60)
+		provider.prefetch(self.url, margin=120)
+		self.assertEqual(len(provider.app.http_client.requests), 2)
+
+		self.assertEqual(self.get_provider().run([]), {'temp': '+15'})
+		self.assertEqual(DummyProvider.parsed, 2)
+		self.assertEqual(self.cache.stats()['hits'], 1)
+
+	def test_weather_info_cache_page_changed(self):
+		""" Test parsed information is dropped when its page changes.
+		"""
+
+		DummyProvider.parsed = 0
+		provider = self.get_provider(
+			HttpResponse(self.url, 200, 'OK', {}, b'+12'))
+		provider.run([])
+		provider.save_cache(self.url, b'+15')
+
+		self.assertEqual(self.get_provider().run([]), {'temp': '+15'})
+		self.assertEqual(DummyProvider.parsed, 2)
+
+	def test_get_locations(self):
+		""" Test locations are read from 'locations' option.
+		"""
+
+		provider = self.get_provider()
+		provider.settings = ConfigSection('dummy', {'locations': 
+			'\nLviv = http://dummy/lviv\nbad line\n'
+			'Kyiv = http://dummy/kyiv\nOdesa = http://dummy/odesa?q=1'})
+
+		with self.assertLogs(provider.logger, 'WARNING'):
+			locations = provider.get_locations()
+
+		self.assertEqual(locations, [('Kyiv', 'http://dummy/kyiv'),
+			                         ('Lviv', 'http://dummy/lviv'),
+			                         ('Odesa', 'http://dummy/odesa?q=1')])
+
+	def test_run_locations(self):
+		""" Test all locations are fetched and failed ones are left out.
+		"""
+
+		provider = DummyProvider(DummyApp(UrlHttpClient(), cache=self.cache))
+		provider.settings = ConfigSection('dummy', {'locations': 
+			'Lviv = http://dummy/lviv\nOdesa = http://dummy/bad\n'
+			'Dnipro = http://dummy/dnipro'})
+		get_weather_info_for = provider.get_weather_info_for
+
+		def get_weather_info(url):
+			if url.endswith('bad'):
+				raise ValueError('bad page')
+			return get_weather_info_for(url)
+
+		provider.get_weather_info_for = get_weather_info
+		with self.assertLogs(provider.logger, 'ERROR'):
+			results = provider.run_locations([])
+
+		self.assertEqual([(name, info.as_dict()) for name, info in results], 
+			             [('Kyiv', {'temp': 'kyiv'}),
+			              ('Lviv', {'temp': 'lviv'}),
+			              ('Dnipro', {'temp': 'dnipro'})])
+		self.assertEqual(results[1][1].fetched, 
+			             provider.get_fetch_time('http://dummy/lviv'))
+		self.assertIsNotNone(results[1][1].fetched)
+		self.assertEqual(len(provider.app.http_client.requests), 3)
+
+	@mock.patch.object(DummyProvider, 'reset_location')
+	def test_run_locations_not_found(self, reset_location):
+		""" Test not found extra location is skipped keeping configuration.
+		"""
+
+		class NotFoundHttpClient(UrlHttpClient):
+			def get(self, url, headers=None):
+				if url.endswith('missing'):
+					self.requests.append(url)
+					raise urllib.error.HTTPError(url, 404, 'Not Found', {}, 
+						                         None)
+				return super().get(url, headers)
+
+		provider = DummyProvider(DummyApp(NotFoundHttpClient(), 
+			                              cache=self.cache))
+		provider.app.messages = io.StringIO()
+		provider.settings = ConfigSection('dummy', {'locations': 
+			'Lviv = http://dummy/missing\nOdesa = http://dummy/odesa'})
+
+		with self.assertLogs(provider.logger, 'ERROR'):
+			results = provider.run_locations([])
+
+		self.assertEqual([name for name, info in results], ['Kyiv', 'Odesa'])
+		self.assertIn('Location = Lviv', provider.app.messages.getvalue())
+		reset_location.assert_not_called()
+
+	def test_clear_not_valid_cache_keeps_validated(self):
+		""" Test expired cache with validators is kept for revalidation.
+		"""
+
+		provider = self.get_provider()
+		provider.save_cache(self.url, b'page', {'ETag': '"v1"'})
+		provider.save_cache('http://dummy/lviv', b'page')
+		self.expire(provider, self.url)
+		self.expire(provider, 'http://dummy/lviv')
+
+		provider.clear_not_valid_cache()
+
+		self.assertEqual(provider.get_cache_validators(self.url), 
+			             {'ETag': '"v1"'})
+		self.assertIsNone(provider.get_cache_entry('http://dummy/lviv'))
+
 
 if __name__ == '__main__':
 	unittest.main()
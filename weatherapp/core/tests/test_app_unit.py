@@ -1,11 +1,75 @@
+import io
 import os
+import sys
+import csv
+import json
+import time
 import unittest
+import threading
 import argparse
+import tempfile
+import subprocess
 import logging
 import configparser
 from pathlib import Path
+from unittest import mock
 
+from weatherapp.core import config
 from weatherapp.core.app import App
+from weatherapp.core.abstract import WeatherProvider
+from weatherapp.core.exception import RequestError
+from weatherapp.core.managers import CommandManager
+from weatherapp.core.tests.test_abstract_provider_unit import DummyProvider
+
+
+class SleepyProvider:
+	""" Dummy provider which answers after a given delay.
+	"""
+
+	delay = 0
+
+	def __init__(self, app):
+		self.title = self.name
+		self.location = 'Kyiv'
+
+	def run(self, argv):
+		time.sleep(self.delay)
+		return {'temp': self.name}
+
+	def run_locations(self, argv):
+		return [(self.location, self.run(argv))]
+
+
+class SlowProvider(SleepyProvider):
+	name = 'slow'
+	delay = 0.3
+
+
+class FastProvider(SleepyProvider):
+	name = 'fast'
+	delay = 0.05
+
+
+class HungProvider(SleepyProvider):
+	name = 'hung'
+	delay = 2
+
+
+class StaleProvider(DummyProvider):
+	""" Provider which shows a stale page and refreshes it slowly.
+	"""
+
+	name = 'stale'
+	refreshed = []
+
+	def fetch_page_source(self, url):
+		time.sleep(0.2)
+		StaleProvider.refreshed.append(url)
+		return b'new'
+
+	def run_locations(self, argv):
+		self.refresh_in_background(self.url)
+		return [(self.location, {'temp': 'stale'})]
 
 
 class AppTestCase(unittest.TestCase):
@@ -35,6 +99,9 @@ class AppTestCase(unittest.TestCase):
 		self.assertFalse(parsed_args.write_file)
 		self.assertEqual(parsed_args.formatter, 'list')
 		self.assertEqual(parsed_args.verbose_level, 0)
+		self.assertEqual(parsed_args.workers, 8)
+		self.assertEqual(parsed_args.timeout, 30)
+		self.assertFalse(parsed_args.stream)
 
 	def test_arg_parse_arg(self):
 		""" Test application argument parser.
@@ -53,6 +120,207 @@ class AppTestCase(unittest.TestCase):
 		self.assertTrue(parsed_args.write_file)
 		self.assertEqual(parsed_args.verbose_level, 1)
 
+	def get_app(self, argv, providers):
+		""" Build application with the given dummy providers.
+		"""
+
+		app = App(stdout=io.StringIO())
+		app.options, _ = app.arg_parser.parse_known_args(argv)
+		app.providermanager = CommandManager()
+		app.providermanager._commands = {}
+		for provider in providers:
+			app.providermanager.add(provider.name, provider)
+		return app
+
+	def test_run_providers_concurrently(self):
+		""" Test 'run_providers' runs providers at the same time.
+		"""
+
+		app = self.get_app([], [SlowProvider, FastProvider])
+		app.providermanager.add('slow2', SlowProvider)
+
+		start = time.monotonic()
+		app.run_providers([])
+		run_time = time.monotonic() - start
+
+		self.assertLess(run_time, 0.6)
+		output = app.stdout.getvalue()
+		self.assertLess(output.index('fast'), output.rindex('slow'))
+		self.assertLess(output.index('slow'), output.index('fast'))
+
+	def test_run_providers_stream(self):
+		""" Test 'run_providers' shows providers in order of completion.
+		"""
+
+		app = self.get_app(['--stream'], [SlowProvider, FastProvider])
+
+		app.run_providers([])
+
+		output = app.stdout.getvalue()
+		self.assertLess(output.index('fast'), output.index('slow'))
+
+	def test_run_providers_timeout(self):
+		""" Test 'run_providers' skips providers which hang.
+		"""
+
+		app = self.get_app(['--timeout=0.5'], [HungProvider, FastProvider])
+
+		start = time.monotonic()
+		app.run_providers([])
+		run_time = time.monotonic() - start
+
+		self.assertLess(run_time, 1)
+		output = app.stdout.getvalue()
+		self.assertIn('fast', output)
+		self.assertNotIn('hung', output)
+
+	def test_run_providers_timeout_exit(self):
+		""" Test hung providers don't keep the process alive.
+		"""
+
+		code = ('from weatherapp.core.tests.test_app_unit import '
+		        'AppTestCase, HungProvider, FastProvider\n'
+		        'HungProvider.delay = 5\n'
+		        'app = AppTestCase.get_app(None, ["--timeout=0.3"], '
+		        '[HungProvider, FastProvider])\n'
+		        'app.run_providers([])\n')
+		root = Path(__file__).resolve().parents[3]
+
+		start = time.monotonic()
+		subprocess.run([sys.executable, '-c', code], cwd=root, check=True,
+			           capture_output=True, timeout=10)
+
+		self.assertLess(time.monotonic() - start, 3)
+
+	def test_close_joins_refreshes(self):
+		""" Test background refreshes started by provider workers are
+		daemons and finished by 'close'.
+		"""
+
+		app = self.get_app([], [StaleProvider, FastProvider])
+		StaleProvider.refreshed = []
+
+		app.run_providers([])
+		threads = [thread for thread in threading.enumerate()
+		           if thread.name == 'refresh http://dummy/kyiv']
+		app.close()
+
+		self.assertTrue(threads)
+		self.assertTrue(all(thread.daemon for thread in threads))
+		self.assertEqual(StaleProvider.refreshed, ['http://dummy/kyiv'])
+		self.assertIn('stale', app.stdout.getvalue())
+
+	@mock.patch.object(config, 'CACHE_REFRESH_WAIT', 0.05)
+	def test_close_refresh_timeout(self):
+		""" Test 'close' waits for background refreshes for a short time.
+		"""
+
+		app = self.get_app([], [StaleProvider])
+		StaleProvider.refreshed = []
+
+		app.run_providers([])
+		start = time.monotonic()
+		app.close()
+
+		self.assertLess(time.monotonic() - start, 0.15)
+		self.assertEqual(StaleProvider.refreshed, [])
+		WeatherProvider.join_refreshes(1)
+
+	def test_run_providers_stream_timeout(self):
+		""" Test 'run_providers' streaming skips providers which hang.
+		"""
+
+		app = self.get_app(['--stream', '--timeout=0.5'], 
+			               [HungProvider, FastProvider])
+
+		start = time.monotonic()
+		app.run_providers([])
+		run_time = time.monotonic() - start
+
+		self.assertLess(run_time, 1)
+		output = app.stdout.getvalue()
+		self.assertIn('fast', output)
+		self.assertNotIn('hung', output)
+
+	def test_run_providers_combined_csv(self):
+		""" Test '--combined' writes all providers in one CSV.
+		"""
+
+		app = self.get_app(['--combined', '-f', 'csv'], 
+			               [SlowProvider, FastProvider])
+
+		app.run_providers([])
+
+		rows = list(csv.reader(io.StringIO(app.stdout.getvalue())))
+		self.assertEqual(rows[0], ['Day', 'Provider', 'Location', 
+			                       'Parameter', 'Value'])
+		self.assertEqual(rows[1:3], 
+			             [['Today', 'slow', 'Kyiv', 'temp', 'slow'],
+			              ['Today', 'fast', 'Kyiv', 'temp', 'fast']])
+
+	def test_run_providers_combined_table(self):
+		""" Test '--combined' writes one table and parses its options once.
+		"""
+
+		app = self.get_app(['--combined', '-f', 'table'], 
+			               [SlowProvider, FastProvider])
+		formatter = app.formattermanager.get('table')()
+		configure = mock.Mock(wraps=formatter.configure)
+		formatter.configure = configure
+		app.formattermanager.add('table', lambda: formatter)
+
+		app.run_providers(['-align', 'r'])
+
+		output = app.stdout.getvalue()
+		configure.assert_called_once_with(['-align', 'r'])
+		self.assertEqual(output.count('Provider'), 1)
+		self.assertIn('slow', output)
+		self.assertIn('fast', output)
+
+	def test_run_providers_unknown_formatter(self):
+		""" Test unknown formatter is logged and providers are not run.
+		"""
+
+		app = self.get_app(['-f', 'bogus'], [SlowProvider, FastProvider])
+
+		with self.assertLogs(app.logger, 'ERROR') as logs:
+			app.run_providers([])
+
+		self.assertIn('unknown formatter bogus', logs.output[0])
+		self.assertEqual(app.stdout.getvalue(), '')
+
+	def test_messages_structured(self):
+		""" Test error messages don't get into structured output.
+		"""
+
+		app = self.get_app(['-f', 'ndjson'], [FastProvider])
+		app.stderr = io.StringIO()
+
+		RequestError(app).run('Incorrectly set location!', 'Kyiv')
+		app.run_providers([])
+
+		self.assertIn('Location = Kyiv', app.stderr.getvalue())
+		self.assertEqual(json.loads(app.stdout.getvalue())['provider'], 
+			             'fast')
+		app = self.get_app([], [])
+		self.assertIs(app.messages, app.stdout)
+
+	def test_run_providers_ndjson(self):
+		""" Test NDJSON output has one object per provider and location.
+		"""
+
+		app = self.get_app(['-f', 'ndjson'], [SlowProvider, FastProvider])
+
+		app.run_providers([])
+
+		objects = [json.loads(line) 
+		           for line in app.stdout.getvalue().splitlines()]
+		self.assertEqual([(item['provider'], item['location'], item['info'])
+			              for item in objects],
+			             [('slow', 'Kyiv', {'temp': 'slow'}),
+			              ('fast', 'Kyiv', {'temp': 'fast'})])
+		self.assertTrue(all(item['day'] == 'today' for item in objects))
+
 	def test_get_log_configuration_file(self):
 		""" Test 'get_log_configuration_file' method.
 		"""
@@ -118,17 +386,22 @@ class AppTestCase(unittest.TestCase):
 		""" 
 
 		root_logger = logging.getLogger('')
+		level = root_logger.level
+		self.addCleanup(root_logger.setLevel, level)
 		root_logger.setLevel(logging.DEBUG)
 
+		log_dir = tempfile.TemporaryDirectory()
+		self.addCleanup(log_dir.cleanup)
 		log_level = logging.WARNING
 		log_output = 'console' 
-		log_filename = 'w.log'
+		log_filename = os.path.join(log_dir.name, 'w.log')
 		
 		console = logging.StreamHandler()
 		console.setLevel(log_level)
 		formatter = logging.Formatter('%(message)s')
 		console.setFormatter(formatter)
 		root_logger.addHandler(console)
+		self.addCleanup(root_logger.removeHandler, console)
 
 		self.assertTrue(console)
 		self.assertTrue(root_logger)
@@ -141,6 +414,8 @@ class AppTestCase(unittest.TestCase):
 		formatter = logging.Formatter('%(message)s')
 		fl.setFormatter(formatter)
 		root_logger.addHandler(fl)
+		self.addCleanup(fl.close)
+		self.addCleanup(root_logger.removeHandler, fl)
 
 		self.assertTrue(fl)
 		self.assertTrue(root_logger)
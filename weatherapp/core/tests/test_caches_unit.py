@@ -0,0 +1,500 @@
+import os
+import time
+import sqlite3
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from weatherapp.core import config
+from weatherapp.core.abstract.cache import CacheEntry
+from weatherapp.core.caches import codec
+from weatherapp.core.caches import (FileCache, SqliteCache, MemoryCache,
+	                                TieredCache)
+from weatherapp.core.managers import CacheManager
+
+
+class CacheStoreTests:
+
+	""" Tests shared by all cache stores.
+	"""
+
+	cache_class = None
+
+	def setUp(self):
+		self.cache_dir = tempfile.TemporaryDirectory()
+		self.addCleanup(self.cache_dir.cleanup)
+		self.cache = self.cache_class(Path(self.cache_dir.name))
+		self.now = time.time()
+
+	def get_entry(self, key='a' * 32, body=b'page', fetched=None, ttl=300,
+		          keep=900, provider='dummy'):
+		fetched = fetched or self.now
+		return CacheEntry(key, 'http://dummy/' + key, body, fetched, ttl,
+			              fetched + keep, {'ETag': '"v1"'}, provider)
+
+	def test_set_get(self):
+		""" Test saved entry is returned by key.
+		"""
+
+		self.cache.set(self.get_entry())
+		entry = self.cache.get('a' * 32)
+
+		self.assertEqual(entry.body, b'page')
+		self.assertEqual(entry.url, 'http://dummy/' + 'a' * 32)
+		self.assertEqual(entry.ttl, 300)
+		self.assertAlmostEqual(entry.fetched, self.now, delta=0.01)
+		self.assertAlmostEqual(entry.keep_until, self.now + 900, delta=0.01)
+		self.assertEqual(entry.headers, {'ETag': '"v1"'})
+		self.assertEqual(entry.provider, 'dummy')
+		self.assertTrue(entry.is_valid())
+		self.assertIsNone(self.cache.get('b' * 32))
+
+	def test_set_replace(self):
+		""" Test entry with the same key is replaced.
+		"""
+
+		self.cache.set(self.get_entry())
+		self.cache.set(self.get_entry(body=b'new'))
+
+		self.assertEqual(self.cache.get('a' * 32).body, b'new')
+		self.assertEqual(self.cache.stats()['count'], 1)
+
+	def test_touch(self):
+		""" Test 'touch' moves fetch and keep time.
+		"""
+
+		self.cache.set(self.get_entry(fetched=self.now - 1000))
+		self.assertFalse(self.cache.get('a' * 32).is_valid())
+
+		self.cache.touch('a' * 32, self.now)
+		entry = self.cache.get('a' * 32)
+
+		self.assertTrue(entry.is_valid())
+		self.assertAlmostEqual(entry.keep_until, self.now + 900, delta=0.01)
+
+	def test_delete(self):
+		""" Test 'delete' removes entry.
+		"""
+
+		self.cache.set(self.get_entry())
+		self.cache.delete('a' * 32)
+		self.cache.delete('a' * 32)
+
+		self.assertIsNone(self.cache.get('a' * 32))
+
+	def test_expire(self):
+		""" Test 'expire' removes only entries kept too long.
+		"""
+
+		self.cache.set(self.get_entry('a' * 32, fetched=self.now - 1000))
+		self.cache.set(self.get_entry('b' * 32, fetched=self.now - 500))
+
+		self.assertEqual(self.cache.expire(), 1)
+		self.assertIsNone(self.cache.get('a' * 32))
+		self.assertIsNotNone(self.cache.get('b' * 32))
+
+	def test_sweep(self):
+		""" Test 'sweep' expires entries at most once per interval.
+		"""
+
+		self.cache.set(self.get_entry('a' * 32, fetched=self.now - 1000))
+		self.assertEqual(self.cache.sweep(interval=60), 1)
+
+		self.cache.set(self.get_entry('b' * 32, fetched=self.now - 1000))
+		other_process = self.cache_class(Path(self.cache_dir.name))
+
+		self.assertEqual(self.cache.sweep(interval=60), 0)
+		self.assertEqual(other_process.sweep(interval=60), 0)
+		self.assertIsNotNone(self.cache.get('b' * 32))
+
+	def test_sweep_locks(self):
+		""" Test 'sweep' removes download locks which are not used.
+		"""
+
+		lock_dir = Path(self.cache_dir.name) / config.CACHE_LOCK_DIR
+		lock_dir.mkdir()
+		old_lock = lock_dir / ('a' * 32 + '.lock')
+		new_lock = lock_dir / ('b' * 32 + '.lock')
+		old_lock.touch()
+		new_lock.touch()
+		old_time = self.now - config.CACHE_LOCK_TTL - 10
+		os.utime(old_lock, (old_time, old_time))
+
+		self.cache.sweep(interval=60)
+
+		self.assertFalse(old_lock.exists())
+		self.assertTrue(new_lock.exists())
+
+	def test_sweep_no_directory(self):
+		""" Test 'sweep' does nothing without cache directory.
+		"""
+
+		cache = self.cache_class(Path(self.cache_dir.name) / 'missing')
+
+		self.assertEqual(cache.sweep(), 0)
+		self.assertFalse(cache.directory.exists())
+
+	def test_get_without_body(self):
+		""" Test 'get' may skip the page but keeps other fields.
+		"""
+
+		self.cache.set(self.get_entry('a' * 32))
+
+		entry = self.cache.get('a' * 32, body=False)
+
+		self.assertIn(entry.body, (None, b'page'))
+		self.assertEqual(entry.url, 'http://dummy/' + 'a' * 32)
+		self.assertEqual(entry.headers, {'ETag': '"v1"'})
+		self.assertTrue(entry.is_valid())
+
+	def test_stats(self):
+		""" Test 'stats' counts entries and their size.
+		"""
+
+		self.assertEqual(self.cache.stats()['count'], 0)
+
+		self.cache.set(self.get_entry('a' * 32, fetched=self.now - 100))
+		self.cache.set(self.get_entry('b' * 32, body=b'longer page'))
+		stats = self.cache.stats()
+
+		self.assertEqual(stats['count'], 2)
+		self.assertEqual(stats['bytes'], len(b'page') + len(b'longer page'))
+		self.assertAlmostEqual(stats['oldest'], self.now - 100, delta=0.01)
+		self.assertAlmostEqual(stats['newest'], self.now, delta=0.01)
+
+	def test_compressed(self):
+		""" Test pages are compressed on disk with the codec in config.
+		"""
+
+		page = b'<html>' + b'<p>+12</p>' * 1000 + b'</html>'
+		for name in ('zlib', 'lzma', ''):
+			with mock.patch.object(config, 'CACHE_CODEC', name):
+				self.cache.set(self.get_entry(body=page))
+				stats = self.cache.stats()
+
+			self.assertEqual(self.cache.get('a' * 32).body, page)
+			if name:
+				self.assertLess(stats['bytes'], len(page) / 5)
+			else:
+				self.assertEqual(stats['bytes'], len(page))
+
+	def test_record_lookup(self):
+		""" Test hits and misses are counted in memory and saved by
+		'flush_lookups'.
+		"""
+
+		self.cache.set(self.get_entry())
+		other_process = self.cache_class(Path(self.cache_dir.name))
+		self.cache.record_lookup('a' * 32, True)
+		self.cache.record_lookup('a' * 32, True)
+		self.cache.record_lookup('b' * 32, False)
+
+		stats = other_process.stats()
+		self.assertEqual((stats['hits'], stats['misses']), (0, 0))
+
+		self.cache.flush_lookups()
+		self.cache.flush_lookups()
+		stats = other_process.stats()
+		self.assertEqual((stats['hits'], stats['misses']), (2, 1))
+		stats = self.cache.stats()
+		self.assertEqual((stats['hits'], stats['misses']), (2, 1))
+
+	def test_evict(self):
+		""" Test the least recently used entries are removed first.
+		"""
+
+		for key in ('a' * 32, 'b' * 32, 'c' * 32):
+			self.cache.set(self.get_entry(key, body=b'x' * 10))
+			time.sleep(0.01)
+		self.cache.record_lookup('a' * 32, True)
+		self.cache.flush_lookups()
+
+		self.assertEqual(self.cache.evict(25), 1)
+		self.assertIsNone(self.cache.get('b' * 32))
+		self.assertIsNotNone(self.cache.get('a' * 32))
+		self.assertEqual(self.cache.evict(25), 0)
+
+	def test_sweep_evicts(self):
+		""" Test 'sweep' keeps the cache under size limit.
+		"""
+
+		for key in ('a' * 32, 'b' * 32):
+			self.cache.set(self.get_entry(key, body=b'x' * 10))
+
+		self.assertEqual(self.cache.sweep(max_bytes=10), 1)
+		self.assertEqual(self.cache.stats()['bytes'], 10)
+
+	def test_purge(self):
+		""" Test only entries of the provider are removed.
+		"""
+
+		self.cache.set(self.get_entry('a' * 32, provider='accu'))
+		self.cache.set(self.get_entry('b' * 32, provider='rp5'))
+
+		self.assertEqual(self.cache.purge('accu'), 1)
+		self.assertIsNone(self.cache.get('a' * 32))
+		self.assertIsNotNone(self.cache.get('b' * 32))
+
+
+class FileCacheTestCase(CacheStoreTests, unittest.TestCase):
+
+	""" Unit test case for one file per page cache store.
+	"""
+
+	cache_class = FileCache
+
+	def test_mmap(self):
+		""" Test big files are read by mmap.
+		"""
+
+		page = b'<p>+12</p>' * 1000
+		self.cache.set(self.get_entry(body=page))
+
+		with mock.patch.object(config, 'CACHE_MMAP_SIZE', 1), \
+		     mock.patch('mmap.mmap', wraps=__import__('mmap').mmap) as mapped:
+			self.assertEqual(self.cache.get('a' * 32).body, page)
+
+		self.assertEqual(mapped.call_count, 1)
+
+	def test_expire_other_files(self):
+		""" Test 'expire' keeps files which are not cache entries.
+		"""
+
+		other = Path(self.cache_dir.name) / 'accu.circuit'
+		other.write_text('{}')
+
+		self.cache.expire()
+
+		self.assertTrue(other.exists())
+
+
+class SqliteCacheTestCase(CacheStoreTests, unittest.TestCase):
+
+	""" Unit test case for SQLite cache store.
+	"""
+
+	cache_class = SqliteCache
+
+	def test_database_file(self):
+		""" Test all entries are kept in one file.
+		"""
+
+		for key in ('a' * 32, 'b' * 32):
+			self.cache.set(self.get_entry(key))
+
+		self.assertEqual([path.name for path in 
+			              Path(self.cache_dir.name).glob('*.sqlite')],
+			             ['cache.sqlite'])
+
+	def test_mmap(self):
+		""" Test database is read by mmap up to the configured size.
+		"""
+
+		with mock.patch.object(config, 'CACHE_DB_MMAP_SIZE', 1024 * 1024):
+			cache = SqliteCache(Path(self.cache_dir.name) / 'mmap')
+			cache.set(self.get_entry('a' * 32))
+
+			self.assertEqual(
+				cache.connect().execute('PRAGMA mmap_size').fetchone()[0], 
+				1024 * 1024)
+			self.assertEqual(cache.get('a' * 32).body, 
+				             self.get_entry('a' * 32).body)
+
+	def test_migrate(self):
+		""" Test columns are added to the table of the older version.
+		"""
+
+		connection = sqlite3.connect(str(self.cache.path))
+		connection.executescript('''
+			CREATE TABLE pages (
+				key TEXT PRIMARY KEY, url TEXT NOT NULL, body BLOB NOT NULL,
+				fetched REAL NOT NULL, ttl REAL NOT NULL, 
+				keep_until REAL NOT NULL, headers TEXT NOT NULL DEFAULT '{}');
+			INSERT INTO pages VALUES ('aaa', 'http://dummy', X'00', 0, 1, 2, 
+				                      '{}');
+		''')
+		connection.close()
+
+		self.assertEqual(self.cache.get('aaa').provider, '')
+		self.cache.set(self.get_entry())
+		self.assertEqual(self.cache.get('a' * 32).provider, 'dummy')
+
+
+class CodecTestCase(unittest.TestCase):
+
+	""" Unit test case for page compression.
+	"""
+
+	def test_encode_decode(self):
+		""" Test data is restored by the codec it was compressed with.
+		"""
+
+		data = b'<p>+12</p>' * 100
+		for name in ('zlib', 'lzma'):
+			compressed, used = codec.encode(data, name)
+
+			self.assertEqual(used, name)
+			self.assertLess(len(compressed), len(data))
+			self.assertEqual(codec.decode(memoryview(compressed), used), data)
+
+	def test_not_compressible(self):
+		""" Test data which doesn't get smaller is kept as is.
+		"""
+
+		self.assertEqual(codec.encode(b'+12', 'zlib'), (b'+12', ''))
+
+	def test_unknown(self):
+		""" Test unknown codec is rejected.
+		"""
+
+		with self.assertRaises(ValueError):
+			codec.encode(b'+12', 'zip')
+
+
+class MemoryCacheTestCase(unittest.TestCase):
+
+	""" Unit test case for in-process LRU cache.
+	"""
+
+	def setUp(self):
+		self.cache = MemoryCache(max_bytes=10)
+		self.now = time.time()
+
+	def get_entry(self, key, body=b'page', fetched=None):
+		return CacheEntry(key, 'http://dummy/' + key, body, 
+			              fetched or self.now, 300, self.now + 900)
+
+	def test_get(self):
+		""" Test hits and misses are counted.
+		"""
+
+		self.cache.set(self.get_entry('kyiv'))
+
+		self.assertEqual(self.cache.get('kyiv').body, b'page')
+		self.assertIsNone(self.cache.get('lviv'))
+		self.assertEqual(self.cache.stats()['hits'], 1)
+		self.assertEqual(self.cache.stats()['misses'], 1)
+
+	def test_get_expired(self):
+		""" Test expired entries are dropped.
+		"""
+
+		self.cache.set(self.get_entry('kyiv', fetched=self.now - 400))
+
+		self.assertIsNone(self.cache.get('kyiv'))
+		self.assertEqual(self.cache.stats()['count'], 0)
+		self.assertEqual(self.cache.size, 0)
+
+	def test_evictions(self):
+		""" Test the least recently used entries are evicted.
+		"""
+
+		self.cache.set(self.get_entry('kyiv'))
+		self.cache.set(self.get_entry('lviv'))
+		self.cache.get('kyiv')
+		self.cache.set(self.get_entry('odesa'))
+
+		self.assertIsNotNone(self.cache.get('kyiv'))
+		self.assertIsNone(self.cache.get('lviv'))
+		self.assertEqual(self.cache.stats()['evictions'], 1)
+		self.assertEqual(self.cache.size, 8)
+
+	def test_too_big(self):
+		""" Test page bigger than memory budget is not kept.
+		"""
+
+		self.cache.set(self.get_entry('kyiv', body=b'x' * 11))
+
+		self.assertEqual(self.cache.stats()['count'], 0)
+
+
+class TieredCacheTestCase(unittest.TestCase):
+
+	""" Unit test case for memory cache in front of disk cache.
+	"""
+
+	def setUp(self):
+		self.cache_dir = tempfile.TemporaryDirectory()
+		self.addCleanup(self.cache_dir.cleanup)
+		self.disk = SqliteCache(Path(self.cache_dir.name))
+		self.cache = TieredCache(MemoryCache(), self.disk)
+		self.now = time.time()
+		self.entry = CacheEntry('a' * 32, 'http://dummy/kyiv', b'page',
+			                    self.now, 300, self.now + 900)
+
+	def test_get(self):
+		""" Test page read from disk is kept in memory.
+		"""
+
+		self.disk.set(self.entry)
+
+		self.assertEqual(self.cache.get('a' * 32).body, b'page')
+		self.disk.delete('a' * 32)
+		self.assertEqual(self.cache.get('a' * 32).body, b'page')
+		self.assertEqual(self.cache.stats()['memory']['hits'], 1)
+
+	def test_record_lookup(self):
+		""" Test lookups are written to disk only when flushed.
+		"""
+
+		self.cache.set(self.entry)
+		with mock.patch.object(self.disk, 'save_lookups') as save_lookups:
+			for _ in range(3):
+				self.cache.get('a' * 32)
+				self.cache.record_lookup('a' * 32, True)
+			save_lookups.assert_not_called()
+
+			self.cache.flush_lookups()
+
+		save_lookups.assert_called_once_with(3, 0, {'a' * 32: mock.ANY})
+
+	def test_get_expired(self):
+		""" Test expired page is read from disk and not kept in memory.
+		"""
+
+		self.entry.fetched -= 400
+		self.disk.set(self.entry)
+
+		self.assertIsNotNone(self.cache.get('a' * 32))
+		self.assertEqual(self.cache.memory.stats()['count'], 0)
+
+	def test_set_delete(self):
+		""" Test both tiers are updated.
+		"""
+
+		self.cache.set(self.entry)
+		self.assertIsNotNone(self.disk.get('a' * 32))
+		self.assertIsNotNone(self.cache.memory.get('a' * 32))
+
+		self.cache.delete('a' * 32)
+		self.assertIsNone(self.cache.get('a' * 32))
+
+	def test_purge(self):
+		""" Test entries of the provider are removed from both tiers.
+		"""
+
+		self.entry.provider = 'accu'
+		self.cache.set(self.entry)
+
+		self.assertEqual(self.cache.purge('accu'), 1)
+		self.assertIsNone(self.cache.get('a' * 32))
+
+
+class CacheManagerTestCase(unittest.TestCase):
+
+	""" Unit test case for cache stores manager.
+	"""
+
+	def test_load_commands(self):
+		""" Test all cache stores are registered.
+		"""
+
+		cache_manager = CacheManager()
+
+		self.assertEqual(cache_manager.get('file'), FileCache)
+		self.assertEqual(cache_manager.get('sqlite'), SqliteCache)
+
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,146 @@
+import time
+import tempfile
+import unittest
+import threading
+from pathlib import Path
+
+from weatherapp.core.circuitbreaker import CircuitBreaker
+from weatherapp.core import decorators
+
+
+class CircuitBreakerTestCase(unittest.TestCase):
+
+	""" Unit test case for circuit breaker.
+	"""
+
+	def setUp(self):
+		self.cache_dir = tempfile.TemporaryDirectory()
+		self.addCleanup(self.cache_dir.cleanup)
+		self.path = Path(self.cache_dir.name) / 'accu.circuit'
+		self.breaker = CircuitBreaker(self.path, failures=2, reset_time=60)
+
+	def test_closed(self):
+		""" Test calls are allowed until too many failures.
+		"""
+
+		self.assertTrue(self.breaker.allow())
+		self.breaker.record_failure()
+		self.assertTrue(self.breaker.allow())
+		self.assertFalse(self.breaker.is_open())
+
+	def test_open(self):
+		""" Test calls are refused after too many failures.
+		"""
+
+		self.breaker.record_failure()
+		self.breaker.record_failure()
+
+		self.assertTrue(self.breaker.is_open())
+		self.assertFalse(self.breaker.allow())
+		self.assertFalse(CircuitBreaker(self.path, failures=2).allow())
+
+	def test_success(self):
+		""" Test success resets failures.
+		"""
+
+		self.breaker.record_failure()
+		self.breaker.record_success()
+		self.breaker.record_failure()
+
+		self.assertTrue(self.breaker.allow())
+		self.assertEqual(self.breaker.get_state()[0], 1)
+
+	def test_trial_call(self):
+		""" Test one trial call is allowed after reset time.
+		"""
+
+		self.breaker.save_state(2, time.time() - 61)
+
+		self.assertTrue(self.breaker.allow())
+		self.assertFalse(self.breaker.allow())
+
+		self.breaker.record_success()
+		self.assertTrue(self.breaker.allow())
+		self.assertFalse(self.path.exists())
+
+	def test_concurrent_failures(self):
+		""" Test failures recorded by many threads are all counted.
+		"""
+
+		breaker = CircuitBreaker(self.path, failures=1000, reset_time=60)
+		errors = []
+
+		def fail():
+			try:
+				for _ in range(20):
+					CircuitBreaker(self.path, failures=1000).record_failure()
+			except Exception as error:
+				errors.append(error)
+
+		threads = [threading.Thread(target=fail) for _ in range(8)]
+		for thread in threads:
+			thread.start()
+		for thread in threads:
+			thread.join()
+
+		self.assertEqual(errors, [])
+		self.assertEqual(breaker.get_state()[0], 160)
+		self.assertEqual(list(self.path.parent.glob('*.tmp')), [])
+
+	def test_bad_state_file(self):
+		""" Test broken state file is treated as closed circuit.
+		"""
+
+		self.path.write_text('{broken')
+
+		self.assertTrue(self.breaker.allow())
+
+
+class RetryTestCase(unittest.TestCase):
+
+	""" Unit test case for 'retry' decorator.
+	"""
+
+	def setUp(self):
+		self.calls = 0
+
+	def flaky(self, failures, error=ConnectionError):
+		self.calls += 1
+		if self.calls <= failures:
+			raise error('site is down')
+		return 'page'
+
+	def test_retry(self):
+		""" Test function is called again after errors.
+		"""
+
+		flaky = decorators.retry(attempts=3, delay=0.01)(self.flaky)
+
+		self.assertEqual(flaky(2), 'page')
+		self.assertEqual(self.calls, 3)
+
+	def test_retry_attempts(self):
+		""" Test error is raised when attempts are over.
+		"""
+
+		flaky = decorators.retry(attempts=2, delay=0.01)(self.flaky)
+
+		with self.assertRaises(ConnectionError):
+			flaky(2)
+		self.assertEqual(self.calls, 2)
+
+	def test_retry_when(self):
+		""" Test only selected errors are retried.
+		"""
+
+		connection_error = lambda exc: isinstance(exc, ConnectionError)
+		flaky = decorators.retry(attempts=3, delay=0.01, 
+			                     when=connection_error)(self.flaky)
+
+		with self.assertRaises(ValueError):
+			flaky(1, ValueError)
+		self.assertEqual(self.calls, 1)
+
+
+if __name__ == '__main__':
+	unittest.main()
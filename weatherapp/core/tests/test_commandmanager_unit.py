@@ -51,7 +51,7 @@ class CommandManagerTestCase(unittest.TestCase):
 
 		self.command_manager.add('dummy', DummyCommand)
 
-		self.assertEqual(self.command_manager._commands.__len__(), 4)
+		self.assertEqual(self.command_manager._commands.__len__(), 6)
 
 	def test_getitem(self):
 		""" Test if '__getitem__' method is working.
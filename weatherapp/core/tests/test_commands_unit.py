@@ -1,12 +1,17 @@
+import io
 import os
+import time
 import argparse
+import tempfile
 import unittest
 from pathlib import Path
 from shutil import rmtree
 
 from weatherapp.core.app import App
 from weatherapp.core.abstract import Command
-from weatherapp.core.commands import Configurate
+from weatherapp.core.commands import Configurate, CacheStats, Prefetch
+from weatherapp.core.caches import SqliteCache
+from weatherapp.core.abstract.cache import CacheEntry
 
 
 class CommandsTestCase(unittest.TestCase):
@@ -30,5 +35,129 @@ class CommandsTestCase(unittest.TestCase):
 	    self.assertIsNone(parsed_args.provider)
 
 
+class DummyApp:
+
+	""" Application with cache in a temporary directory.
+	"""
+
+	def __init__(self, cache):
+		self.cache = cache
+		self.stdout = io.StringIO()
+
+
+class CacheStatsTestCase(unittest.TestCase):
+
+	""" Test case for cache command.
+	"""
+
+	def setUp(self):
+		self.cache_dir = tempfile.TemporaryDirectory()
+		self.addCleanup(self.cache_dir.cleanup)
+		self.app = DummyApp(SqliteCache(Path(self.cache_dir.name)))
+		now = time.time()
+		for key, provider in (('a' * 32, 'accu'), ('b' * 32, 'rp5')):
+			self.app.cache.set(CacheEntry(key, 'http://dummy', b'page', now,
+				                          300, now + 900, None, provider))
+
+	def test_stats(self):
+		""" Test cache command shows entries and hit ratio.
+		"""
+
+		for hit in (True, True, True, False):
+			self.app.cache.record_lookup('a' * 32, hit)
+
+		CacheStats(self.app).run([])
+		output = self.app.stdout.getvalue()
+
+		self.assertIn('Entries: 2 \n', output)
+		self.assertIn('Size: 8 bytes', output)
+		self.assertIn('Hit ratio: 75.0% (3 hits, 1 misses)', output)
+
+	def test_purge(self):
+		""" Test cache command removes cache of the provider.
+		"""
+
+		CacheStats(self.app).run(['--purge', 'accu'])
+
+		self.assertEqual(self.app.stdout.getvalue(), 
+			             'Removed 1 cache entries of accu. \n')
+		self.assertEqual(self.app.cache.stats()['count'], 1)
+
+
+class ReadOnlyOptions(argparse.Namespace):
+
+	""" Options which can't be changed once they are set.
+	"""
+
+	def __setattr__(self, name, value):
+		if name in self.__dict__:
+			raise AttributeError(f'{name} is read-only')
+		super().__setattr__(name, value)
+
+
+class DummyPrefetchProvider:
+
+	""" Provider which records modes it was prefetched in.
+	"""
+
+	url = 'http://dummy'
+
+	def __init__(self, app):
+		self.app = app
+		self.modes = app.prefetched
+
+	def get_locations(self):
+		return [('Kyiv', self.url)]
+
+	def prefetch(self, url, margin, tomorrow):
+		if self.app.fail:
+			raise ValueError('site is down')
+		if self.app.options.tomorrow != tomorrow:
+			raise AssertionError('parsed in other mode')
+		self.modes.append((url, margin, tomorrow))
+
+
+class PrefetchTestCase(unittest.TestCase):
+
+	""" Test case for prefetch command.
+	"""
+
+	def setUp(self):
+		self.cache_dir = tempfile.TemporaryDirectory()
+		self.addCleanup(self.cache_dir.cleanup)
+		self.app = DummyApp(SqliteCache(Path(self.cache_dir.name)))
+		self.app.options = argparse.Namespace(tomorrow=False, workers=2,
+			                                  timeout=5, debug=False)
+		self.app.providermanager = {'dummy': DummyPrefetchProvider}.items()
+		self.app.prefetched = []
+		self.app.fail = False
+
+	def test_prefetch(self):
+		""" Test pages are prefetched for today and tomorrow.
+		"""
+
+		self.app.options = ReadOnlyOptions(**vars(self.app.options))
+
+		Prefetch(self.app).run(['--margin', '60'])
+
+		self.assertEqual(sorted(self.app.prefetched), 
+			             [('http://dummy', 60, False), 
+			              ('http://dummy', 60, True)])
+		self.assertFalse(self.app.options.tomorrow)
+		self.assertEqual(self.app.stdout.getvalue(), 
+			             'Prefetched 2 of 2 pages. \n')
+
+	def test_prefetch_error(self):
+		""" Test failed providers are not counted.
+		"""
+
+		self.app.fail = True
+		with self.assertLogs('weatherapp.core.commands.prefetch'):
+			Prefetch(self.app).run([])
+
+		self.assertEqual(self.app.stdout.getvalue(), 
+			             'Prefetched 0 of 2 pages. \n')
+
+
 if __name__ == '__main__':
 	unittest.main()
\ No newline at end of file
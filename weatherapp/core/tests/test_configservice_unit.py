@@ -0,0 +1,143 @@
+import os
+import tempfile
+import unittest
+import configparser
+from pathlib import Path
+from unittest import mock
+
+from weatherapp.core.configservice import ConfigService, ConfigSection
+
+
+class ConfigSectionTestCase(unittest.TestCase):
+
+	""" Unit test case for configuration section view.
+	"""
+
+	def setUp(self):
+		self.section = ConfigSection('accu', {'rate-limit': '2.5', 
+			                                  'rate-burst': '5',
+			                                  'cache-ttl-headers': 'yes',
+			                                  'name': 'Kyiv'})
+
+	def test_typed(self):
+		""" Test options are converted to the asked type.
+		"""
+
+		self.assertEqual(self.section.getfloat('rate-limit'), 2.5)
+		self.assertEqual(self.section.getint('rate-burst'), 5)
+		self.assertTrue(self.section.getboolean('cache-ttl-headers'))
+		self.assertEqual(self.section.getint('cache-ttl', 300), 300)
+
+		with self.assertRaises(ValueError):
+			self.section.getint('name')
+		with self.assertRaises(ValueError):
+			self.section.getboolean('name')
+
+	def test_read_only(self):
+		""" Test section can't be changed.
+		"""
+
+		with self.assertRaises(TypeError):
+			self.section['name'] = 'Lviv'
+		self.assertEqual(dict(self.section)['name'], 'Kyiv')
+
+
+class ConfigServiceTestCase(unittest.TestCase):
+
+	""" Unit test case for configuration service.
+	"""
+
+	def setUp(self):
+		self.config_dir = tempfile.TemporaryDirectory()
+		self.addCleanup(self.config_dir.cleanup)
+		self.path = Path(self.config_dir.name) / 'weatherapp_ini'
+		self.path.write_text('[accu]\nname = Kyiv\nurl = http://accu/kyiv\n'
+			                 'rate-limit = 2\n')
+		self.service = ConfigService(self.path, 
+			                         Path(self.config_dir.name) / 'lock')
+
+	def test_parse_once(self):
+		""" Test file is parsed once while it is not changed.
+		"""
+
+		with mock.patch.object(ConfigService, 'read', 
+			                   wraps=self.service.read) as read:
+			for _ in range(3):
+				self.assertEqual(self.service.section('accu')['name'], 'Kyiv')
+			self.assertEqual(self.service.sections(), ['accu'])
+
+		self.assertEqual(read.call_count, 1)
+
+	def test_file_changed(self):
+		""" Test changed file is parsed again.
+		"""
+
+		self.service.section('accu')
+		self.path.write_text('[accu]\nname = Lviv\nurl = http://accu/lviv\n')
+
+		self.assertEqual(self.service.section('accu')['name'], 'Lviv')
+
+	def test_no_file(self):
+		""" Test missing file gives empty sections.
+		"""
+
+		os.remove(self.path)
+
+		self.assertEqual(self.service.sections(), [])
+		self.assertEqual(len(self.service.section('accu')), 0)
+
+	def test_bad_file(self):
+		""" Test bad file raises parser error.
+		"""
+
+		self.path.write_text('name = Kyiv\n')
+
+		with self.assertRaises(configparser.Error):
+			self.service.section('accu')
+
+	def test_update(self):
+		""" Test update keeps other options and sections.
+		"""
+
+		self.service.update('accu', {'name': 'Lviv', 
+			                         'url': 'http://accu/lviv'})
+		self.service.update('App', {'log-level': 'INFO'})
+
+		parser = configparser.ConfigParser(interpolation=None)
+		parser.read(self.path)
+		self.assertEqual(dict(parser['accu']), 
+			             {'name': 'Lviv', 'url': 'http://accu/lviv',
+			              'rate-limit': '2'})
+		self.assertEqual(self.service.section('App')['log-level'], 'INFO')
+		self.assertEqual(sorted(os.listdir(self.config_dir.name)), 
+			             ['lock', 'weatherapp_ini'])
+
+	def test_update_other_writer(self):
+		""" Test update doesn't lose changes made by other process.
+		"""
+
+		self.service.section('accu')
+		with open(self.path, 'a') as configfile:
+			configfile.write('[rp5]\nname = Odesa\n')
+
+		self.service.update('accu', {'name': 'Lviv'})
+
+		self.assertEqual(self.service.section('rp5')['name'], 'Odesa')
+
+	def test_remove_options(self):
+		""" Test removed options don't take other options and sections.
+		"""
+
+		self.service.update('accu', {'name': 'Lviv', 
+			                         'url': 'http://accu/lviv'})
+		self.service.update('App', {'log-level': 'INFO'})
+
+		self.service.remove_options('accu', ('name', 'url', 'missing'))
+
+		self.assertEqual(dict(self.service.section('accu')), 
+			             {'rate-limit': '2'})
+		self.assertEqual(self.service.section('App')['log-level'], 'INFO')
+
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,58 @@
+import time
+import threading
+import unittest
+
+from weatherapp.core.executor import DaemonExecutor
+
+
+class DaemonExecutorTestCase(unittest.TestCase):
+
+	""" Test case for thread pool of daemon threads.
+	"""
+
+	def test_submit(self):
+		""" Test results and errors are set to futures.
+		"""
+
+		with DaemonExecutor(max_workers=2) as executor:
+			result = executor.submit(pow, 2, 10)
+			error = executor.submit(int, 'bad')
+
+		self.assertEqual(result.result(), 1024)
+		self.assertIsInstance(error.exception(), ValueError)
+
+	def test_max_workers(self):
+		""" Test calls run in at most 'max_workers' daemon threads.
+		"""
+
+		threads = set()
+
+		def work():
+			threads.add(threading.current_thread())
+			time.sleep(0.01)
+
+		with DaemonExecutor(max_workers=2) as executor:
+			for _ in range(6):
+				executor.submit(work)
+
+		self.assertEqual(len(threads), 2)
+		self.assertTrue(all(thread.daemon for thread in threads))
+
+	def test_shutdown_cancel_futures(self):
+		""" Test queued calls are cancelled without waiting for running.
+		"""
+
+		event = threading.Event()
+		executor = DaemonExecutor(max_workers=1)
+		running = executor.submit(event.wait)
+		time.sleep(0.05)
+		queued = executor.submit(pow, 2, 2)
+
+		executor.shutdown(wait=False, cancel_futures=True)
+
+		self.assertTrue(queued.cancelled())
+		self.assertTrue(running.running())
+		with self.assertRaises(RuntimeError):
+			executor.submit(pow, 2, 2)
+		event.set()
+		self.assertTrue(running.result(timeout=1))
@@ -0,0 +1,196 @@
+import io
+import csv
+import json
+import unittest
+import tracemalloc
+from unittest import mock
+
+from weatherapp.core.formatters import ListFormatter, CsvFormatter, \
+                                       TableFormatter, JsonFormatter, \
+                                       NdjsonFormatter
+from weatherapp.core.formatters import json as json_formatters
+
+
+class CountingStream(io.TextIOBase):
+
+	""" Stream which only counts written characters.
+	"""
+
+	def __init__(self):
+		self.size = 0
+
+	def write(self, text):
+		self.size += len(text)
+		return len(text)
+
+
+def generate_rows(count):
+	""" Rows made on demand, like info for many locations.
+	"""
+
+	for number in range(count):
+		yield f'Location {number}', f'+{number % 30} °C'
+
+
+class FormattersTestCase(unittest.TestCase):
+
+	""" Test case for output formatters.
+	"""
+
+	columns = ['Provider', 'Kyiv']
+	data = {'cond': 'Sunny', 'temp': '+12', 'wind': "3 m/s, 'NW' [gusts]"}
+
+	def test_list(self):
+		""" Values with quotes and brackets are written as they are.
+		"""
+
+		stream = io.StringIO()
+		ListFormatter().emit_rows(self.columns, iter(self.data.items()),
+			                      stream)
+
+		self.assertEqual(stream.getvalue(),
+			             'Provider\n' + '*' * 12 + '\nKyiv\n' + '=' * 12 +
+			             "\n cond : Sunny\n temp : +12\n"
+			             " wind : 3 m/s, 'NW' [gusts]\n")
+
+	def test_csv(self):
+		""" CSV output is read back with the same values.
+		"""
+
+		data = dict(self.data, note='say "hi"\nbye')
+		stream = io.StringIO()
+		CsvFormatter().emit_rows(self.columns, iter(data.items()), stream)
+
+		rows = list(csv.reader(io.StringIO(stream.getvalue())))
+		self.assertEqual(rows[0], self.columns)
+		self.assertEqual(rows[1:], [list(item) for item in data.items()])
+
+	def test_table(self):
+		""" Table options are parsed by 'configure'.
+		"""
+
+		formatter = TableFormatter()
+		formatter.configure(['-align', 'r', '--unknown'])
+		stream = io.StringIO()
+		formatter.emit_rows(self.columns, iter(self.data.items()), stream)
+
+		self.assertEqual(formatter.params.align, 'r')
+		self.assertIn('Provider', stream.getvalue())
+		self.assertIn("3 m/s, 'NW' [gusts]", stream.getvalue())
+
+	def test_emit_records(self):
+		""" Records are written by 'emit_rows' by default.
+		"""
+
+		stream = io.StringIO()
+		ListFormatter().emit_records(iter([
+			{'provider': 'Provider', 'location': 'Kyiv', 'day': 'today',
+			 'fetched': 0, 'info': self.data}]), stream)
+
+		self.assertEqual(stream.getvalue(), 
+			             ListFormatter().emit(self.columns, self.data, []) + 
+			             '\n')
+
+	def test_emit(self):
+		""" 'emit' returns what 'emit_rows' writes.
+		"""
+
+		formatter = CsvFormatter()
+		stream = io.StringIO()
+		formatter.emit_rows(self.columns, iter(self.data.items()), stream)
+
+		self.assertEqual(formatter.emit(self.columns, self.data, []),
+			             stream.getvalue())
+
+	def test_constant_memory(self):
+		""" Streaming formatters don't hold written rows.
+		"""
+
+		for formatter in (ListFormatter(), CsvFormatter()):
+			with self.subTest(formatter=formatter.name):
+				peaks = []
+				for count in (1000, 20000):
+					stream = CountingStream()
+					tracemalloc.start()
+					formatter.emit_rows(self.columns, generate_rows(count),
+						                stream)
+					peaks.append(tracemalloc.get_traced_memory()[1])
+					tracemalloc.stop()
+					self.assertGreater(stream.size, count * 10)
+
+				self.assertLess(peaks[1], peaks[0] * 2 + 4096)
+
+
+class JsonFormattersTestCase(unittest.TestCase):
+
+	""" Test case for JSON and NDJSON formatters.
+	"""
+
+	records = [
+		{'provider': 'AccuWeather', 'location': 'Kyiv', 'day': 'today',
+		 'fetched': 0, 'info': {'cond': 'Sunny', 'temp': '+12°', 
+		                        'wind': '3.5 m/s', 'feels_like': '+10°C'}},
+		{'provider': 'RP5', 'location': 'Lviv', 'day': 'today',
+		 'fetched': 60, 'info': {'cond': 'Дощ "heavy"'}},
+	]
+
+	def check_objects(self, objects):
+		self.assertEqual(objects[0], {
+			'provider': 'AccuWeather', 'location': 'Kyiv', 'day': 'today',
+			'fetched': '1970-01-01T00:00:00+00:00',
+			'info': {'cond': 'Sunny', 'temp': 12, 'wind': 3.5, 
+			         'feels_like': 10}})
+		self.assertEqual(objects[1]['info'], {'cond': 'Дощ "heavy"'})
+		self.assertEqual(objects[1]['fetched'], '1970-01-01T00:01:00+00:00')
+
+	def test_json(self):
+		""" JSON output is one array of all records.
+		"""
+
+		stream = io.StringIO()
+		JsonFormatter().emit_records(iter(self.records), stream)
+
+		self.check_objects(json.loads(stream.getvalue()))
+
+	def test_json_empty(self):
+		""" JSON output without records is an empty array.
+		"""
+
+		stream = io.StringIO()
+		JsonFormatter().emit_records(iter([]), stream)
+
+		self.assertEqual(json.loads(stream.getvalue()), [])
+
+	def test_ndjson(self):
+		""" NDJSON output has one object per line.
+		"""
+
+		stream = io.StringIO()
+		NdjsonFormatter().emit_records(iter(self.records), stream)
+
+		lines = stream.getvalue().splitlines()
+		self.assertEqual(len(lines), 2)
+		self.check_objects([json.loads(line) for line in lines])
+
+	@mock.patch.object(json_formatters, 'orjson', None)
+	def test_stdlib_backend(self):
+		""" Standard json module is used without orjson.
+		"""
+
+		stream = io.StringIO()
+		NdjsonFormatter().emit_records(iter(self.records), stream)
+
+		self.assertIn('Дощ', stream.getvalue())
+		self.check_objects([json.loads(line) 
+			                for line in stream.getvalue().splitlines()])
+
+	def test_emit(self):
+		""" 'emit' writes one object of provider and location.
+		"""
+
+		output = JsonFormatter().emit(['RP5', 'Lviv'], {'temp': '-1°C'}, [])
+
+		objects = json.loads(output)
+		self.assertEqual(objects[0]['provider'], 'RP5')
+		self.assertEqual(objects[0]['info'], {'temp': -1})
+		self.assertIsNone(objects[0]['fetched'])
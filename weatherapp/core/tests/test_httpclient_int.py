@@ -0,0 +1,231 @@
+import gzip
+import zlib
+import threading
+import unittest
+import urllib.error
+from unittest import mock
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from weatherapp.core.httpclient import HttpClient, DnsCache, ContentDecoder
+from weatherapp.core.httpclient import get_freshness_lifetime
+
+
+PAGE = b'<html>' + b'<p>Kyiv +12</p>' * 1000 + b'</html>'
+
+
+def raw_deflate(data):
+	compressor = zlib.compressobj(wbits=-zlib.MAX_WBITS)
+	return compressor.compress(data) + compressor.flush()
+
+
+ENCODERS = {'gzip': gzip.compress,
+            'deflate': zlib.compress,
+            'raw': raw_deflate}
+
+
+class DummyHandler(BaseHTTPRequestHandler):
+
+	""" Local weather site answering with the requested path.
+	"""
+
+	protocol_version = 'HTTP/1.1'
+	clients = set()
+
+	def do_GET(self):
+		self.clients.add(self.client_address)
+		if self.path == '/moved':
+			self.send_response(302)
+			self.send_header('Location', '/weather')
+			self.send_header('Content-Length', '0')
+			self.end_headers()
+			return
+
+		if self.path.startswith('/page/'):
+			encoding = self.path.split('/')[-1]
+			body = ENCODERS[encoding](PAGE)
+			self.send_response(200)
+			self.send_header('Content-Encoding', 
+				             'deflate' if encoding == 'raw' else encoding)
+			self.send_header('Content-Length', str(len(body)))
+			self.end_headers()
+			self.wfile.write(body)
+			return
+
+		status = 404 if self.path == '/missing' else 200
+		body = self.path.encode('utf-8')
+		if self.path.endswith('/proxy-auth'):
+			body = self.headers.get('Proxy-Authorization', '').encode('utf-8')
+		self.send_response(status)
+		self.send_header('Content-Length', str(len(body)))
+		self.end_headers()
+		self.wfile.write(body)
+
+	def log_message(self, *args):
+		pass
+
+
+class HttpClientTestCase(unittest.TestCase):
+
+	""" Test case for shared http client.
+	"""
+
+	@classmethod
+	def setUpClass(cls):
+		cls.server = ThreadingHTTPServer(('127.0.0.1', 0), DummyHandler)
+		cls.port = cls.server.server_address[1]
+		cls.thread = threading.Thread(target=cls.server.serve_forever,
+			                          daemon=True)
+		cls.thread.start()
+
+	@classmethod
+	def tearDownClass(cls):
+		cls.server.shutdown()
+		cls.server.server_close()
+
+	def setUp(self):
+		DummyHandler.clients.clear()
+		self.client = HttpClient(proxies={})
+		self.url = f'http://127.0.0.1:{self.port}'
+
+	def tearDown(self):
+		self.client.close()
+
+	def test_get(self):
+		""" Test 'get' method.
+		"""
+
+		response = self.client.get(self.url + '/weather')
+
+		self.assertEqual(response.status, 200)
+		self.assertEqual(response.body, b'/weather')
+
+	def test_keep_alive(self):
+		""" Test connection is reused by requests to the same host.
+		"""
+
+		for _ in range(3):
+			self.client.get(self.url + '/weather')
+
+		self.assertEqual(len(DummyHandler.clients), 1)
+
+	def test_redirect(self):
+		""" Test redirects are followed.
+		"""
+
+		response = self.client.get(self.url + '/moved')
+
+		self.assertEqual(response.body, b'/weather')
+		self.assertEqual(response.url, self.url + '/weather')
+
+	def test_http_error(self):
+		""" Test error status raises 'HTTPError'.
+		"""
+
+		with self.assertRaises(urllib.error.HTTPError) as error:
+			self.client.get(self.url + '/missing')
+
+		self.assertEqual(error.exception.code, 404)
+
+	def test_pool_size(self):
+		""" Test pool never keeps more than 'pool_size' connections.
+		"""
+
+		client = HttpClient(pool_size=1)
+		client.get(self.url + '/weather')
+		client.get(f'http://localhost:{self.port}/weather')
+
+		self.assertEqual(client._open, 1)
+		self.assertEqual(len(client._idle), 1)
+		client.close()
+
+	def test_compressed(self):
+		""" Test gzip and deflate bodies are decompressed.
+		"""
+
+		for encoding in ENCODERS:
+			response = self.client.get(f'{self.url}/page/{encoding}')
+
+			self.assertEqual(response.body, PAGE)
+			self.assertEqual(response.decoded_bytes, len(PAGE))
+			self.assertLess(response.wire_bytes, len(PAGE) / 10)
+
+	def test_decoder_chunks(self):
+		""" Test decoder works with body split into small chunks.
+		"""
+
+		data = gzip.compress(PAGE)
+		decoder = ContentDecoder('gzip')
+		body = b''.join(decoder.decompress(data[i:i + 7]) 
+			            for i in range(0, len(data), 7))
+
+		self.assertEqual(body + decoder.flush(), PAGE)
+
+	def test_dns_cache(self):
+		""" Test host is resolved once for many connections.
+		"""
+
+		dns_cache = DnsCache()
+		with mock.patch('socket.getaddrinfo', 
+			            wraps=__import__('socket').getaddrinfo) as resolver:
+			for _ in range(3):
+				dns_cache.create_connection(('127.0.0.1', self.port)).close()
+
+		self.assertEqual(resolver.call_count, 1)
+
+	def test_proxy(self):
+		""" Test http requests are forwarded by the proxy.
+		"""
+
+		client = HttpClient(
+			proxies={'http': f'user:p%40ss@127.0.0.1:{self.port}'})
+		self.addCleanup(client.close)
+
+		response = client.get('http://weather.test/weather?q=1')
+		auth = client.get('http://weather.test/proxy-auth')
+
+		self.assertEqual(response.body, b'http://weather.test/weather?q=1')
+		self.assertEqual(auth.body, b'Basic dXNlcjpwQHNz')
+
+	def test_proxy_tunnel(self):
+		""" Test https connections are tunneled through the proxy.
+		"""
+
+		client = HttpClient(proxies={'https': 'http://proxy.test:3128'})
+		proxy = client.get_proxy('https', 'weather.test')
+
+		connection = client._new_connection('https', 'weather.test', 443, 
+			                                proxy)
+
+		self.assertEqual((connection.host, connection.port), 
+			             ('proxy.test', 3128))
+		self.assertEqual(connection._tunnel_host, 'weather.test')
+
+	def test_no_proxy(self):
+		""" Test hosts of 'no_proxy' are connected directly.
+		"""
+
+		client = HttpClient(proxies={'http': 'http://proxy.test:3128',
+			                         'no': '127.0.0.1,.local'})
+
+		self.assertIsNone(client.get_proxy('http', '127.0.0.1'))
+		self.assertIsNone(client.get_proxy('http', 'weather.local'))
+		self.assertEqual(client.get_proxy('http', 'weather.test'),
+			             ('proxy.test', 3128, {}))
+
+	def test_freshness_lifetime(self):
+		""" Test cache time is taken from response headers.
+		"""
+
+		self.assertEqual(get_freshness_lifetime(
+			{'Cache-Control': 'public, max-age=600', 'Age': '100'}), 500)
+		self.assertEqual(get_freshness_lifetime(
+			{'Cache-Control': 'no-cache, max-age=600'}), 0)
+		self.assertEqual(get_freshness_lifetime(
+			{'Date': 'Sun, 18 Oct 2026 10:00:00 GMT',
+			 'Expires': 'Sun, 18 Oct 2026 11:00:00 GMT'}), 3600)
+		self.assertEqual(get_freshness_lifetime({'Expires': '0'}), 0)
+		self.assertIsNone(get_freshness_lifetime({'Server': 'dummy'}))
+
+
+if __name__ == '__main__':
+	unittest.main()
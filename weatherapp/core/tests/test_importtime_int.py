@@ -0,0 +1,56 @@
+import os
+import sys
+import tempfile
+import unittest
+import subprocess
+from pathlib import Path
+
+
+class ImportTimeTestCase(unittest.TestCase):
+
+	""" Test case for start up time of the application.
+	"""
+
+	# cumulative import time of weatherapp.core.app(in microseconds)
+	budget = 150000
+
+	# modules which commands without providers must not import
+	heavy_modules = {'prettytable', 'pkg_resources', 'importlib.metadata',
+	                 'http.client', 'ssl', 'sqlite3',
+	                 'weatherapp.core.abstract.provider'}
+
+	def run_importtime(self, argv):
+		""" Run application with '-X importtime' and return import times
+		by module name.
+		"""
+
+		with tempfile.TemporaryDirectory() as home:
+			env = dict(os.environ, HOME=home)
+			code = f'from weatherapp.core.app import main; main({argv!r})'
+			for _ in range(2):
+				# the first run saves providers index to the cache directory
+				process = subprocess.run(
+					[sys.executable, '-X', 'importtime', '-c', code],
+					cwd=Path(__file__).parents[3], env=env, 
+					capture_output=True, text=True, check=True)
+
+		times = {}
+		for line in process.stderr.splitlines():
+			if not line.startswith('import time:') or 'cumulative' in line:
+				continue
+			_, cumulative, name = line[len('import time:'):].split('|')
+			times[name.strip()] = int(cumulative)
+		return times
+
+	def test_providers_command(self):
+		""" Test 'wfapp providers' imports only what it needs in time.
+		"""
+
+		times = self.run_importtime(['providers'])
+
+		self.assertFalse(self.heavy_modules & set(times))
+		self.assertLess(times['weatherapp.core.app'], self.budget)
+
+
+if __name__ == '__main__':
+	unittest.main()
@@ -1,6 +1,13 @@
+import sys
+import tempfile
 import unittest
+from pathlib import Path
+from unittest import mock
+from importlib import metadata
 
+from weatherapp.core import config
 from weatherapp.core.managers import ProviderManager
+from weatherapp.core.managers.commandmanager import LazyCommand
 
 
 class DummyCommand:
@@ -87,5 +94,86 @@ class ProviderManagerTestCase(unittest.TestCase):
 		self.assertFalse('bar' in self.provider_manager)
 
 
+class LazyProviderManagerTestCase(unittest.TestCase):
+
+	""" Unit test case for lazy discovery of providers.
+	"""
+
+	def setUp(self):
+		self.index_dir = tempfile.TemporaryDirectory()
+		self.addCleanup(self.index_dir.cleanup)
+		patcher = mock.patch.object(
+			ProviderManager, 'get_index_path', 
+			return_value=Path(self.index_dir.name) / 'providers.json')
+		patcher.start()
+		self.addCleanup(patcher.stop)
+
+		self.entry_points = [
+			metadata.EntryPoint('dummy', f'{__name__}:DummyCommand', 
+				                config.PROVIDER_EP_NAMESPACE),
+			metadata.EntryPoint('broken', 'weatherapp.no_such_module:Bar',
+				                config.PROVIDER_EP_NAMESPACE)]
+		patcher = mock.patch.object(metadata, 'entry_points', 
+			                        return_value=self.entry_points)
+		self.scan = patcher.start()
+		self.addCleanup(patcher.stop)
+
+	def test_lazy(self):
+		""" Test providers are imported on first access only.
+		"""
+
+		provider_manager = ProviderManager()
+
+		self.assertIn('dummy', provider_manager)
+		self.assertIsInstance(provider_manager._commands['dummy'], 
+			                  LazyCommand)
+		self.assertEqual(provider_manager.get('dummy'), DummyCommand)
+		self.assertEqual(provider_manager['dummy'], DummyCommand)
+
+	def test_broken(self):
+		""" Test provider which can't be imported is skipped.
+		"""
+
+		provider_manager = ProviderManager()
+
+		with self.assertLogs(provider_manager.logger, 'ERROR'):
+			self.assertEqual(list(provider_manager), 
+				             [('dummy', DummyCommand)])
+		self.assertIsNone(provider_manager.get('broken'))
+
+	def test_index(self):
+		""" Test entry points are scanned again only when distributions
+		change.
+		"""
+
+		ProviderManager()
+		provider_manager = ProviderManager()
+
+		self.assertEqual(self.scan.call_count, 1)
+		self.assertIn('broken', provider_manager)
+
+		with tempfile.TemporaryDirectory() as work_dir, \
+		     mock.patch.object(sys, 'path', sys.path + [work_dir]):
+			ProviderManager()
+			Path(work_dir, 'weather.log').touch()
+			ProviderManager()
+			self.assertEqual(self.scan.call_count, 1)
+
+			metadata_dir = Path(work_dir, 'provider.egg-info')
+			metadata_dir.mkdir()
+			(metadata_dir / 'entry_points.txt').touch()
+			ProviderManager()
+
+		self.assertEqual(self.scan.call_count, 2)
+
+		with tempfile.TemporaryDirectory() as temp_dir:
+			site_dir = Path(temp_dir, 'site-packages')
+			site_dir.mkdir()
+			with mock.patch.object(sys, 'path', sys.path + [str(site_dir)]):
+				ProviderManager()
+
+		self.assertEqual(self.scan.call_count, 3)
+
+
 if __name__ == '__main__':
 	unittest.main()
@@ -0,0 +1,97 @@
+import time
+import unittest
+
+from weatherapp.core.ratelimit import TokenBucket, RateLimiter
+from weatherapp.core import decorators
+
+
+class TokenBucketTestCase(unittest.TestCase):
+
+	""" Unit test case for token bucket.
+	"""
+
+	def test_burst(self):
+		""" Test calls within burst don't wait.
+		"""
+
+		bucket = TokenBucket(rate=1, burst=3)
+
+		self.assertEqual([bucket.reserve() for _ in range(3)], [0, 0, 0])
+
+	def test_reserve(self):
+		""" Test calls over budget wait for next tokens.
+		"""
+
+		bucket = TokenBucket(rate=10, burst=1)
+		bucket.reserve()
+
+		self.assertAlmostEqual(bucket.reserve(), 0.1, delta=0.01)
+		self.assertAlmostEqual(bucket.reserve(), 0.2, delta=0.01)
+
+	def test_refill(self):
+		""" Test bucket is refilled with time.
+		"""
+
+		bucket = TokenBucket(rate=20, burst=1)
+		bucket.acquire()
+		time.sleep(0.06)
+
+		self.assertEqual(bucket.reserve(), 0)
+
+	def test_no_limit(self):
+		""" Test zero rate disables the limit.
+		"""
+
+		bucket = TokenBucket(rate=0, burst=1)
+
+		self.assertEqual([bucket.reserve() for _ in range(5)], [0] * 5)
+
+
+class RateLimiterTestCase(unittest.TestCase):
+
+	""" Unit test case for rate limiter of the hosts.
+	"""
+
+	def test_hosts(self):
+		""" Test each host has own bucket.
+		"""
+
+		limiter = RateLimiter(rate=1, burst=1)
+		limiter.acquire('accuweather.com')
+
+		self.assertEqual(limiter.acquire('rp5.ua'), 0)
+		self.assertGreater(limiter.get_bucket('accuweather.com').reserve(), 0)
+
+	def test_configure(self):
+		""" Test host limit configuration.
+		"""
+
+		limiter = RateLimiter()
+		limiter.configure('rp5.ua', rate=5, burst=2)
+		bucket = limiter.get_bucket('rp5.ua')
+		limiter.configure('rp5.ua', rate=5, burst=2)
+
+		self.assertIs(limiter.get_bucket('rp5.ua'), bucket)
+		self.assertEqual(bucket.rate, 5)
+		self.assertEqual(bucket.burst, 2)
+
+		limiter.configure('rp5.ua', rate=1, burst=2)
+		self.assertIsNot(limiter.get_bucket('rp5.ua'), bucket)
+
+	def test_rate_limit_decorator(self):
+		""" Test 'rate_limit' decorator waits only over budget.
+		"""
+
+		calls = []
+		limited = decorators.rate_limit(rate=10, burst=2)(calls.append)
+
+		start = time.monotonic()
+		for i in range(3):
+			limited(i)
+
+		self.assertEqual(calls, [0, 1, 2])
+		self.assertAlmostEqual(time.monotonic() - start, 0.1, delta=0.05)
+
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,147 @@
+import time
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+
+from weatherapp.core.singleflight import SingleFlight, FileLock, \
+                                         remove_stale_locks
+
+
+class SingleFlightTestCase(unittest.TestCase):
+
+	""" Unit test case for calls coalescing.
+	"""
+
+	def setUp(self):
+		self.flights = SingleFlight()
+		self.calls = 0
+
+	def slow_call(self, value):
+		self.calls += 1
+		time.sleep(0.2)
+		return value
+
+	def failed_call(self):
+		self.calls += 1
+		time.sleep(0.2)
+		raise ValueError('site is down')
+
+	def run_threads(self, target, count=5):
+		results = []
+		def run():
+			try:
+				results.append(target())
+			except ValueError as exc:
+				results.append(exc)
+
+		threads = [threading.Thread(target=run) for _ in range(count)]
+		for thread in threads:
+			thread.start()
+		for thread in threads:
+			thread.join()
+		return results
+
+	def test_do(self):
+		""" Test same calls at the same time run once.
+		"""
+
+		results = self.run_threads(
+			lambda: self.flights.do('kyiv', self.slow_call, 'page'))
+
+		self.assertEqual(self.calls, 1)
+		self.assertEqual(results, ['page'] * 5)
+
+	def test_do_other_keys(self):
+		""" Test calls with different keys are not coalesced.
+		"""
+
+		self.flights.do('kyiv', self.slow_call, 'page')
+		self.flights.do('lviv', self.slow_call, 'page')
+
+		self.assertEqual(self.calls, 2)
+
+	def test_do_error(self):
+		""" Test error of the call is raised to all callers.
+		"""
+
+		results = self.run_threads(
+			lambda: self.flights.do('kyiv', self.failed_call))
+
+		self.assertEqual(self.calls, 1)
+		self.assertTrue(all(isinstance(result, ValueError) 
+			                for result in results))
+		self.assertEqual(self.flights._calls, {})
+
+
+class FileLockTestCase(unittest.TestCase):
+
+	""" Unit test case for lock file.
+	"""
+
+	def test_lock(self):
+		""" Test only one holder of the lock file at a time.
+		"""
+
+		with tempfile.TemporaryDirectory() as tmp_dir:
+			path = Path(tmp_dir) / 'page.lock'
+			events = []
+
+			def hold():
+				with FileLock(path):
+					events.append('start')
+					time.sleep(0.1)
+					events.append('end')
+
+			threads = [threading.Thread(target=hold) for _ in range(3)]
+			for thread in threads:
+				thread.start()
+			for thread in threads:
+				thread.join()
+
+		self.assertEqual(events, ['start', 'end'] * 3)
+
+	def test_remove_stale_locks(self):
+		""" Test old lock files are removed unless they are held.
+		"""
+
+		with tempfile.TemporaryDirectory() as tmp_dir:
+			lock_dir = Path(tmp_dir)
+			for name in ('old', 'held', 'new'):
+				(lock_dir / f'{name}.lock').touch()
+			now = time.time() + 100
+
+			with FileLock(lock_dir / 'held.lock'):
+				removed = remove_stale_locks(lock_dir, 50, now)
+
+			self.assertEqual(removed, 2)
+			self.assertEqual([path.name for path in lock_dir.iterdir()], 
+				             ['held.lock'])
+
+	def test_lock_removed_while_awaited(self):
+		""" Test waiter takes the lock again if the file was removed.
+		"""
+
+		with tempfile.TemporaryDirectory() as tmp_dir:
+			path = Path(tmp_dir) / 'page.lock'
+			events = []
+
+			def wait():
+				with FileLock(path):
+					events.append('waiter')
+
+			with FileLock(path):
+				thread = threading.Thread(target=wait)
+				thread.start()
+				time.sleep(0.05)
+				path.unlink()
+				with FileLock(path):
+					events.append('other')
+					time.sleep(0.05)
+			thread.join()
+
+		self.assertEqual(events, ['other', 'waiter'])
+
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,128 @@
+import unittest
+import tracemalloc
+
+from weatherapp.core.weatherinfo import WeatherInfo, normalize, \
+                                        parse_temperature, parse_wind
+
+
+class WeatherInfoTestCase(unittest.TestCase):
+
+	""" Test case for WeatherInfo record.
+	"""
+
+	def test_normalize(self):
+		""" Test provider dict is parsed to numbers.
+		"""
+
+		info = normalize({'cond': ' Sunny ', 'temp': '+12°C', 
+			              'feels_like': '−3,5°', 'wind': '4 m/s', 
+			              'humidity': '65%'}, fetched=100)
+
+		self.assertEqual(info.cond, 'Sunny')
+		self.assertEqual(info.temp, 12)
+		self.assertEqual(info.feels_like, -3.5)
+		self.assertEqual(info.wind, 4)
+		self.assertEqual(info.humidity, 65)
+		self.assertIsNone(info.raw)
+		self.assertEqual(info.fetched, 100)
+
+	def test_raw_fallback(self):
+		""" Test values which can't be parsed and other fields are kept.
+		"""
+
+		info = normalize({'temp': 'n/a', 'pressure': '750 mm'})
+
+		self.assertIsNone(info.temp)
+		self.assertEqual(info.raw, (('temp', 'n/a'), ('pressure', '750 mm')))
+		self.assertEqual(info.as_dict(), {'temp': 'n/a', 
+			                              'pressure': '750 mm'})
+
+	def test_units(self):
+		""" Test values are converted to Celsius and meters per second.
+		"""
+
+		self.assertEqual(parse_temperature('+50°F'), 10)
+		self.assertEqual(parse_wind('18 km/h'), 5)
+		self.assertEqual(parse_wind('10 mph'), 4.5)
+
+	def test_cyrillic_units(self):
+		""" Test units of Ukrainian and Russian sites are recognised.
+		"""
+
+		self.assertEqual(parse_wind('18 км/год'), 5)
+		self.assertEqual(parse_wind('3 м/с'), 3)
+		self.assertEqual(parse_temperature('+12 °С'), 12)
+
+	def test_ambiguous_values(self):
+		""" Test values without one known unit are kept as text.
+		"""
+
+		data = {'wind': 'Північно-західний, 3 м/с', 'temp': '54°F / 12°C',
+		        'feels_like': 'від +3 до +5°', 'humidity': '<p>12</p>'}
+		info = normalize(data)
+
+		for name in data:
+			self.assertIsNone(getattr(info, name))
+		self.assertEqual(info.raw, tuple(data.items()))
+		self.assertEqual(dict(info.items()), data)
+		self.assertIsNone(parse_temperature('12'))
+		self.assertIsNone(parse_wind('3'))
+
+	def test_items_provider_text(self):
+		""" Test parsed values are shown by the text of the provider.
+		"""
+
+		data = {'cond': 'Clear', 'temp': '54°F', 'feels_like': '−3,5°', 
+		        'wind': '18 км/год', 'humidity': '65%'}
+		info = normalize(data)
+
+		self.assertEqual(info.temp, 12.2)
+		self.assertEqual(info.wind, 5)
+		self.assertEqual(dict(info.items()), data)
+		self.assertEqual(info.text, (('temp', '54°F'), 
+			                         ('feels_like', '−3,5°'),
+			                         ('wind', '18 км/год')))
+
+	def test_items(self):
+		""" Test fields are shown as text.
+		"""
+
+		info = WeatherInfo(cond='Rain', temp=-1.5, wind=3, 
+			               raw=(('pressure', '750 mm'),))
+
+		self.assertEqual(list(info.items()), [('cond', 'Rain'), 
+			                                  ('temp', '-1.5°C'),
+			                                  ('wind', '3 m/s'),
+			                                  ('pressure', '750 mm')])
+		self.assertEqual(info.as_dict(), {'cond': 'Rain', 'temp': -1.5, 
+			                              'wind': 3, 'pressure': '750 mm'})
+
+	def test_normalize_record(self):
+		""" Test WeatherInfo is returned as it is.
+		"""
+
+		info = WeatherInfo(temp=1)
+
+		self.assertIs(normalize(info), info)
+
+	def test_memory(self):
+		""" Test records take much less memory than provider dicts.
+		"""
+
+		def measure(make):
+			tracemalloc.start()
+			items = [make(number) for number in range(5000)]
+			size = tracemalloc.get_traced_memory()[0]
+			tracemalloc.stop()
+			del items
+			return size
+
+		def make_dict(number):
+			return {'cond': 'Cloudy', 'temp': f'+{number % 30}°C', 
+			        'feels_like': f'+{number % 25}°C', 
+			        'wind': f'{number % 9} m/s', 'humidity': f'{number % 99}%'}
+
+		dicts = measure(make_dict)
+		records = measure(lambda number: normalize(make_dict(number)))
+
+		self.assertLess(records, dicts / 2)
@@ -0,0 +1,172 @@
+""" Weather information record shared by providers and formatters.
+"""
+
+import re
+import sys
+
+
+NUMBER = r'([-+−]?\d+(?:[.,]\d+)?)\s*'
+
+TEMPERATURE = re.compile(NUMBER + r'(°\s*[CСF]?|℃|℉)', re.IGNORECASE)
+
+WIND = re.compile(NUMBER + r'(m/s|м/с|km/h|км/год|км/ч|mph)', 
+                  re.IGNORECASE)
+
+HUMIDITY = re.compile(NUMBER + r'(%)')
+
+
+def parse_value(pattern, text):
+	""" Return (number, unit) if the whole text is one value, else None.
+	"""
+
+	match = pattern.fullmatch(text)
+	if match is None:
+		return None
+	number, unit = match.groups()
+	return float(number.replace('−', '-').replace(',', '.')), unit.lower()
+
+
+def parse_temperature(text):
+	""" Return temperature in degrees Celsius, e.g. 12.0 for '+12°C'.
+
+	Degrees without a unit are taken as Celsius.
+	"""
+
+	value = parse_value(TEMPERATURE, text)
+	if value is None:
+		return None
+	number, unit = value
+	if unit.endswith(('f', '℉')):
+		number = round((number - 32) / 1.8, 1)
+	return number
+
+
+def parse_wind(text):
+	""" Return wind speed in meters per second, e.g. 3.0 for '3 m/s'.
+	"""
+
+	value = parse_value(WIND, text)
+	if value is None:
+		return None
+	number, unit = value
+	if unit in ('km/h', 'км/год', 'км/ч'):
+		number = round(number / 3.6, 1)
+	elif unit == 'mph':
+		number = round(number * 0.44704, 1)
+	return number
+
+
+def parse_humidity(text):
+	""" Return humidity in percent, e.g. 65.0 for '65%'.
+	"""
+
+	value = parse_value(HUMIDITY, text)
+	return None if value is None else value[0]
+
+
+class WeatherInfo:
+
+	""" Weather of one location with numeric values.
+
+	Temperatures are in degrees Celsius, wind speed in meters per second
+	and humidity in percent, fields not given by the provider are None.
+	Values are parsed only when the whole text is one value with a known
+	unit. Text of other values and fields is kept in 'raw' as (name, text)
+	pairs, text of parsed values which differs from their default format
+	is kept in 'text' to show them as the provider did.
+
+	:param fetched: when the page was fetched(unix time)
+	:type fetched: float
+	"""
+
+	__slots__ = ('cond', 'temp', 'feels_like', 'wind', 'humidity', 'raw',
+	             'text', 'fetched')
+
+	PARSERS = {
+		'temp': parse_temperature,
+		'feels_like': parse_temperature,
+		'wind': parse_wind,
+		'humidity': parse_humidity,
+	}
+
+	FORMATS = {
+		'temp': '{:+g}°C',
+		'feels_like': '{:+g}°C',
+		'wind': '{:g} m/s',
+		'humidity': '{:g}%',
+	}
+
+	def __init__(self, cond=None, temp=None, feels_like=None, wind=None,
+		         humidity=None, raw=None, text=None, fetched=None):
+		self.cond = cond
+		self.temp = temp
+		self.feels_like = feels_like
+		self.wind = wind
+		self.humidity = humidity
+		self.raw = raw
+		self.text = text
+		self.fetched = fetched
+
+	def __repr__(self):
+		return f'WeatherInfo({self.as_dict()!r}, fetched={self.fetched!r})'
+
+	def items(self):
+		""" Yield (name, text) pairs of given fields to show them.
+
+		Parsed values are shown by the text of the provider.
+		"""
+
+		if self.cond is not None:
+			yield 'cond', self.cond
+		text = dict(self.text or ())
+		for name, text_format in self.FORMATS.items():
+			value = getattr(self, name)
+			if value is not None:
+				yield name, text.get(name) or text_format.format(value)
+		if self.raw:
+			yield from self.raw
+
+	def as_dict(self):
+		""" Return dict of given fields with numeric values.
+		"""
+
+		data = {name: getattr(self, name)
+		        for name in ('cond', *self.PARSERS)
+		        if getattr(self, name) is not None}
+		data.update(self.raw or ())
+		return data
+
+
+def normalize(data, fetched=None):
+	""" Return WeatherInfo of the weather info dict made by a provider.
+
+	WeatherInfo is returned as it is. Conditions are interned, as many
+	locations share the same few ones.
+
+	:param data: weather info, e.g. {'cond': 'Sunny', 'temp': '+12°C'}
+	:type data: dict or WeatherInfo
+	:param fetched: when the page was fetched(unix time)
+	:type fetched: float
+	"""
+
+	if isinstance(data, WeatherInfo):
+		return data
+
+	fields = {}
+	raw = []
+	texts = []
+	for name, value in data.items():
+		text = str(value).strip()
+		parser = WeatherInfo.PARSERS.get(name)
+		value = parser(text) if parser is not None else None
+		if name == 'cond':
+			fields[name] = sys.intern(text)
+		elif value is not None:
+			fields[name] = value
+			if text != WeatherInfo.FORMATS[name].format(value):
+				texts.append((name, text))
+		else:
+			raw.append((name, text))
+
+	return WeatherInfo(raw=tuple(raw) or None, text=tuple(texts) or None,
+		               fetched=fetched, **fields)